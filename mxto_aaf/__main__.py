@@ -11,22 +11,40 @@ import sys
 from pathlib import Path
 
 from .__version__ import __version__
-from .batch import process_directory
+from .batch import process_directory, default_jobs, parse_shard, parse_stage_workers, print_conversion_stats, print_memory_stats, print_metadata_cache_stats, print_pcm_cache_stats, print_pipeline_stats, print_schedule_stats, print_tag_read_stats
+from .metacache import default_metadata_cache_path
+from .convert import ConversionTarget, PCMFileReader, parse_target_value, plan_conversion
+from .schedule import SCHEDULE_POLICIES, parse_size
 from .utils import ffmpeg_available
-from .metadata import extract_music_metadata
+from .metadata import DURATION_POLICIES, extract_music_metadata
 from .aaf import create_music_aaf
 
 
 def main(argv: list[str] | None = None) -> int:
+    # Subcommands ahead of the file/directory auto-detection
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] == "merge":
+        from .report import main as merge_main
+        return merge_main(argv[1:])
+    if argv and argv[0] == "watch":
+        from .watch import main as watch_main
+        return watch_main(argv[1:])
+
     parser = argparse.ArgumentParser(
         prog="mxtoaaf",
-        description="Convert music files to AAF with metadata - supports single files or batch directories"
+        description="Convert music files to AAF with metadata - supports single files or batch directories",
+        epilog="Subcommands: 'mxtoaaf merge <reports...>' combines per-shard logs/CSVs; "
+               "'mxtoaaf watch <src> --output <dir>' converts new/changed files continuously",
     )
     parser.add_argument("input", nargs="?", help="input music file or directory")
     parser.add_argument("--output", help="output AAF file or directory (required for batch)", required=False)
     parser.add_argument("--embed", action="store_true", help="embed audio essence into AAF (requires ffmpeg + aaf2)")
     parser.add_argument("--tag-map", help="JSON file mapping metadata fields to AAF tag names (optional)")
     parser.add_argument("--fps", type=float, default=24.0, help="frame rate for AAF timeline (default: 24.0)")
+    parser.add_argument("--sample-rate", type=parse_target_value, default=48000, help="target sample rate in Hz, or 'source' to keep PCM inputs' rate (default: 48000)")
+    parser.add_argument("--bit-depth", type=parse_target_value, choices=[None, 16, 24, 32], default=None, help="target bit depth 16/24/32, or 'source' (default: keep PCM inputs' depth; transcodes use 16)")
+    parser.add_argument("--pipe-decode", action="store_true", help="stream decoded PCM from ffmpeg into the AAF instead of writing temp WAVs next to it")
+    parser.add_argument("--duration-policy", choices=list(DURATION_POLICIES), help="Duration source: header estimate, full MP3 frame scan, or decoded PCM (default: pcm when embedding, else header)")
     parser.add_argument("--version", action="version", version=f"MXToAAF {__version__}")
     
     # Batch-specific options
@@ -34,10 +52,30 @@ def main(argv: list[str] | None = None) -> int:
     batch_group.add_argument("--batch", action="store_true", help="force batch mode (auto-detected if input is directory)")
     batch_group.add_argument("--no-recursive", action="store_true", help="do not recurse into subdirectories (batch only)")
     batch_group.add_argument("--max-files", type=int, help="limit to N files for quick runs (batch only)")
+    batch_group.add_argument("--stream", action="store_true", help="start converting while the directory walk is still running (batch only)")
     batch_group.add_argument("--skip-existing", action="store_true", help="skip files if output AAF already exists (batch only)")
+    batch_group.add_argument("--incremental", action="store_true", help="only rebuild inputs whose content or conversion options changed (batch only)")
     batch_group.add_argument("--log-file", help="write detailed results to JSON log file (batch only)")
+    batch_group.add_argument("--pack", choices=["folder", "album"], help="write one multi-track AAF per folder or per album instead of one per file (batch only)")
+    batch_group.add_argument("--pack-size", type=int, help="max tracks per packed AAF, implies --pack folder (batch only)")
+    batch_group.add_argument("--schedule", choices=list(SCHEDULE_POLICIES), default="discovery", help="dispatch order: discovery (default), or largest first by file size or probed duration (batch only)")
+    batch_group.add_argument("--ffmpeg-batch", type=int, default=1, help="decode up to N short files per ffmpeg process (batch only)")
+    batch_group.add_argument("--max-memory", help="memory budget for concurrent conversions, e.g. 8G (batch only)")
+    batch_group.add_argument("--link-media", help="write linked AAFs referencing mono WAVs kept in this folder instead of embedding (batch only)")
+    batch_group.add_argument("--mxf-media", help="write per-channel OP-Atom MXF media into this folder plus AAFs linking it (batch only)")
+    batch_group.add_argument("--pcm-cache", help="directory to cache decoded audio in, reused by later runs with other options (batch only, not with --pipe-decode)")
+    batch_group.add_argument("--pcm-cache-size", default="10G", help="size cap for --pcm-cache, LRU eviction (default: 10G, batch only)")
+    batch_group.add_argument("--no-metadata-cache", action="store_true", help="don't reuse tags read by earlier runs from the per-user metadata cache (batch only)")
+    batch_group.add_argument("--ranged-tags", action="store_true", help="read only tag blocks and stream headers with small ranged reads, for network storage (batch only)")
+    batch_group.add_argument("--shard", help="only process shard i of N (e.g. 2/4), partitioned by a stable hash of the relative path (batch only)")
+    batch_group.add_argument("--journal", help="append each finished file to this crash-safe JSONL journal (batch only)")
+    batch_group.add_argument("--resume", help="resume an interrupted run from its journal, skipping finished files (batch only)")
     batch_group.add_argument("--export-csv", help="write per-file results to CSV report (batch only)")
     batch_group.add_argument("--export-metadata-csv", help="write per-file parsed metadata fields to CSV report (batch only)")
+    batch_group.add_argument("-j", "--jobs", type=int, help=f"number of parallel worker processes (batch only, default: {default_jobs()})")
+    batch_group.add_argument("--pipeline", action="store_true", help="use the staged probe/decode/embed pipeline (batch only)")
+    batch_group.add_argument("--stage-workers", help="pipeline threads per stage, e.g. probe=2,decode=8,embed=2 (batch only)")
+    batch_group.add_argument("--queue-depth", type=int, default=4, help="max files waiting between pipeline stages (batch only, default: 4)")
     
     # Single-file specific
     single_group = parser.add_argument_group("single-file options")
@@ -121,7 +159,7 @@ def main(argv: list[str] | None = None) -> int:
                 tag_map = json.load(fh)
         
         print(f"Batch mode: Processing {args.input} -> {args.output}")
-        print(f"Embed: {args.embed}, Skip existing: {args.skip_existing}")
+        print(f"Embed: {args.embed}, Skip existing: {args.skip_existing}, Incremental: {args.incremental}, Jobs: {args.jobs or default_jobs()}")
         
         summary = process_directory(
             args.input,
@@ -135,6 +173,30 @@ def main(argv: list[str] | None = None) -> int:
             export_csv=args.export_csv,
             export_metadata_csv=args.export_metadata_csv,
             fps=args.fps,
+            jobs=args.jobs,
+            pipeline=args.pipeline,
+            stage_workers=parse_stage_workers(args.stage_workers) if args.stage_workers else None,
+            queue_depth=args.queue_depth,
+            incremental=args.incremental,
+            stream=args.stream,
+            journal=args.journal,
+            resume=args.resume,
+            pack=args.pack,
+            pack_size=args.pack_size,
+            schedule=args.schedule,
+            shard=parse_shard(args.shard) if args.shard else None,
+            max_memory=parse_size(args.max_memory) if args.max_memory else None,
+            pipe_decode=args.pipe_decode,
+            sample_rate=args.sample_rate,
+            bit_depth=args.bit_depth,
+            ffmpeg_batch=args.ffmpeg_batch,
+            pcm_cache=args.pcm_cache,
+            pcm_cache_size=parse_size(args.pcm_cache_size),
+            link_media=args.link_media,
+            mxf_media=args.mxf_media,
+            metadata_cache=None if args.no_metadata_cache else default_metadata_cache_path(),
+            ranged_tags=args.ranged_tags,
+            duration_policy=args.duration_policy,
         )
         
         print(f"\n{'='*60}")
@@ -145,6 +207,14 @@ def main(argv: list[str] | None = None) -> int:
         print(f"⊘ Skipped:      {summary['skipped_count']}")
         print(f"✗ Failed:       {summary['failed_count']}")
         print(f"Duration:       {summary['total_duration']:.1f}s")
+        if summary.get('pipeline'):
+            print_pipeline_stats(summary['pipeline'])
+        print_schedule_stats(summary.get('schedule'))
+        print_memory_stats(summary.get('memory'))
+        print_pcm_cache_stats(summary.get('pcm_cache'))
+        print_metadata_cache_stats(summary.get('metadata_cache'))
+        print_tag_read_stats(summary.get('tag_reads'))
+        print_conversion_stats(summary.get('conversions'))
         
         if summary['failed_files']:
             print(f"\nFailed files:")
@@ -177,7 +247,9 @@ def main(argv: list[str] | None = None) -> int:
             with open(args.tag_map, "r", encoding="utf-8") as fh:
                 tag_map = json.load(fh)
         
-        metadata = extract_music_metadata(str(input_path))
+        duration_policy = args.duration_policy or ("pcm" if args.embed and not args.dry_run else "header")
+        metadata = extract_music_metadata(str(input_path), duration_policy=duration_policy)
+        pcm_duration = duration_policy == "pcm"
         
         if args.dry_run:
             print("Single-file mode (dry-run): Writing manifest")
@@ -186,21 +258,41 @@ def main(argv: list[str] | None = None) -> int:
             return 0
         
         if args.embed:
+            plan = plan_conversion(input_path, ConversionTarget(args.sample_rate, args.bit_depth))
+            print(f"Conversion: {plan.action} ({plan.reason})")
+            if plan.action != "transcode":
+                pcm = PCMFileReader(input_path, plan.fmt) if plan.action == "repack" else None
+                created = create_music_aaf(str(input_path), metadata, out, embed=True, tag_map=tag_map,
+                                           fps=args.fps, pcm=pcm, pcm_duration=pcm_duration)
+                print("Single-file mode: AAF created:", created[0] if pcm_duration else created)
+                return 0
+
             if not ffmpeg_available():
                 print("ffmpeg required to convert to WAV for AAF embedding — install it or run with --dry-run")
                 return 2
             
-            from .utils import convert_to_wav
-            tmp = str(Path(out).with_suffix('.tmp.wav'))
-            convert_to_wav(str(input_path), tmp)
+            if args.pipe_decode:
+                from .utils import PCMPipe
+                created = create_music_aaf(str(input_path), metadata, out, embed=True, tag_map=tag_map,
+                                           fps=args.fps,
+                                           pcm=PCMPipe(str(input_path), plan.samplerate, plan.channels, bits=plan.bits),
+                                           pcm_duration=pcm_duration)
+                print("Single-file mode: AAF created:", created[0] if pcm_duration else created)
+                return 0
+
+            from .utils import split_to_mono_wavs
+            channel_wavs = split_to_mono_wavs(str(input_path), str(Path(out).with_suffix('.tmp')),
+                                              plan.channels, samplerate=plan.samplerate, bits=plan.bits)
             try:
-                created = create_music_aaf(tmp, metadata, out, embed=True, tag_map=tag_map, fps=args.fps)
-                print("Single-file mode: AAF created:", created)
+                created = create_music_aaf(str(input_path), metadata, out, embed=True, tag_map=tag_map,
+                                           fps=args.fps, channel_wavs=channel_wavs, pcm_duration=pcm_duration)
+                print("Single-file mode: AAF created:", created[0] if pcm_duration else created)
             finally:
-                try:
-                    os.remove(tmp)
-                except Exception:
-                    pass
+                for tmp in channel_wavs:
+                    try:
+                        os.remove(tmp)
+                    except Exception:
+                        pass
         else:
             created = create_music_aaf(str(input_path), metadata, out, embed=False, tag_map=tag_map, fps=args.fps)
             print("Single-file mode: AAF created:", created)
@@ -209,4 +301,6 @@ def main(argv: list[str] | None = None) -> int:
 
 
 if __name__ == "__main__":
+    import multiprocessing
+    multiprocessing.freeze_support()
     raise SystemExit(main())
@@ -1,21 +1,32 @@
 """MXToAAF AAF writer — embed PCM WAV into AAF using aaf2 when available."""
 from __future__ import annotations
 
+import datetime
 import json
 import os
 import wave
-import tempfile
 import hashlib
 import importlib.util
 import sys
+import tempfile
+import uuid
+import weakref
 from pathlib import Path
+from .convert import PCMFileReader, probe_audio_format
 from .metadata import MusicMetadata
 
 try:
     import aaf2
+    import aaf2.ama
+    import aaf2.mxf
 except Exception as exc:  # pragma: no cover - optional runtime dep
     aaf2 = None
 
+try:
+    import numpy as np
+except Exception:  # pragma: no cover - optional speedup for channel splitting
+    np = None
+
 # Standard AAF parameter and operation definitions for pan control
 AAF_PARAMETERDEF_PAN = None
 AAF_OPERATIONDEF_MONOAUDIOPAN = None
@@ -27,6 +38,108 @@ if aaf2:
         pass
 
 
+# Start new AAFs from a pre-built skeleton (see `_open_new_aaf`)
+USE_AAF_TEMPLATE = True
+
+# Definitions registered in each open container, keyed by file handle
+_DEFINITIONS: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+_TEMPLATE: bytes | None = None
+
+
+def _definitions(f) -> dict:
+    """Pan/interpolation/operation and sound data definitions for `f`.
+
+    Each definition is looked up (or created and registered) once per
+    container and then reused for every track and channel written to it.
+    Pan entries are None when the pan AUIDs are unavailable.
+    """
+    defs = _DEFINITIONS.get(f)
+    if defs is not None:
+        return defs
+    defs = {"sound": f.dictionary.lookup_datadef("sound"), "pan": None, "interp": None, "pan_op": None}
+    if AAF_PARAMETERDEF_PAN is not None and AAF_OPERATIONDEF_MONOAUDIOPAN is not None:
+        try:
+            param_def = f.dictionary.lookup_parameterdef(AAF_PARAMETERDEF_PAN)
+            if param_def is None:
+                typedef = f.dictionary.lookup_typedef("Rational")
+                param_def = f.create.ParameterDef(AAF_PARAMETERDEF_PAN, "Pan", "Pan", typedef)
+                f.dictionary.register_def(param_def)
+
+            interp_def = f.dictionary.lookup_interperlationdef(aaf2.misc.LinearInterp)
+            if interp_def is None:
+                interp_def = f.create.InterpolationDef(aaf2.misc.LinearInterp, "LinearInterp", "LinearInterp")
+                f.dictionary.register_def(interp_def)
+
+            opdef = f.dictionary.lookup_operationdef(AAF_OPERATIONDEF_MONOAUDIOPAN)
+            if opdef is None:
+                opdef = f.create.OperationDef(AAF_OPERATIONDEF_MONOAUDIOPAN, "Audio Pan")
+                opdef.media_kind = "sound"
+                opdef["NumberInputs"].value = 1
+                f.dictionary.register_def(opdef)
+            defs.update(pan=param_def, interp=interp_def, pan_op=opdef)
+        except Exception:
+            pass
+    _DEFINITIONS[f] = defs
+    return defs
+
+
+def _template_bytes() -> bytes:
+    """An empty AAF with our definitions registered, built once per process."""
+    global _TEMPLATE
+    if _TEMPLATE is None:
+        fd, path = tempfile.mkstemp(prefix="mxto_template_", suffix=".aaf")
+        os.close(fd)
+        try:
+            with aaf2.open(path, "w") as f:
+                _definitions(f)
+            with open(path, "rb") as fh:
+                _TEMPLATE = fh.read()
+        finally:
+            os.unlink(path)
+    return _TEMPLATE
+
+
+def _open_new_aaf(path: str):
+    """Open a new AAF for writing.
+
+    Building the header and dictionary of an empty AAF costs about as much
+    as writing a short track's essence, so with `USE_AAF_TEMPLATE` the file
+    starts as a copy of a skeleton built once per process and is opened
+    for update instead. Falls back to a fresh file if that fails.
+    """
+    if USE_AAF_TEMPLATE:
+        try:
+            data = _template_bytes()
+            with open(path, "wb") as fh:
+                fh.write(data)
+            f = aaf2.open(path, "rw")
+            _stamp_identification(f)
+            return f
+        except Exception:
+            pass
+    return aaf2.open(path, "w")
+
+
+def _stamp_identification(f) -> None:
+    """Give a file copied from the template its own Identification.
+
+    The copy carries the template's GenerationAUID, Date and LastModified;
+    replace them the way aaf2 does for a fresh file, so every output is
+    identified as its own generation.
+    """
+    now = datetime.datetime.now()
+    old = list(f.header["IdentificationList"].value)
+    ident = f.create.Identification()
+    for key in ("ProductName", "CompanyName", "ProductVersionString", "ProductID", "Platform"):
+        if old and key in old[-1]:
+            ident[key].value = old[-1][key].value
+    ident["Date"].value = now
+    ident["GenerationAUID"].value = uuid.uuid4()
+    f.header["IdentificationList"].value = [ident]
+    f.header["LastModified"].value = now
+
+
 def _apply_pan_to_slot(f, mslot, mclip, pan_value: float, length_val: int):
     """Add pan control to a master timeline slot using OperationGroup with VaryingValue.
     
@@ -37,39 +150,14 @@ def _apply_pan_to_slot(f, mslot, mclip, pan_value: float, length_val: int):
         pan_value: Pan position (-1.0 = left, 0.0 = center, 1.0 = right)
         length_val: Length in samples/frames
     """
-    if AAF_PARAMETERDEF_PAN is None or AAF_OPERATIONDEF_MONOAUDIOPAN is None:
+    defs = _definitions(f)
+    param_def, interp_def, opdef = defs["pan"], defs["interp"], defs["pan_op"]
+    if opdef is None:
         # Fallback: no pan control, just use the clip directly
         mslot.segment = mclip
         return
     
     try:
-        # Register ParameterDef for Pan
-        typedef = f.dictionary.lookup_typedef("Rational")
-        param_def = f.create.ParameterDef(AAF_PARAMETERDEF_PAN, "Pan", "Pan", typedef)
-        try:
-            f.dictionary.register_def(param_def)
-        except Exception:
-            # Already registered
-            param_def = f.dictionary.lookup_def(AAF_PARAMETERDEF_PAN)
-        
-        # Register InterpolationDef
-        try:
-            interp_def = f.create.InterpolationDef(
-                aaf2.misc.LinearInterp, "LinearInterp", "LinearInterp"
-            )
-            f.dictionary.register_def(interp_def)
-        except Exception:
-            interp_def = f.dictionary.lookup_def(aaf2.misc.LinearInterp)
-        
-        # Register OperationDef for MonoAudioPan
-        try:
-            opdef = f.create.OperationDef(AAF_OPERATIONDEF_MONOAUDIOPAN, "Audio Pan")
-            opdef.media_kind = "sound"
-            opdef["NumberInputs"].value = 1
-            f.dictionary.register_def(opdef)
-        except Exception:
-            opdef = f.dictionary.lookup_def(AAF_OPERATIONDEF_MONOAUDIOPAN)
-        
         # Create OperationGroup to hold the pan operation
         opgroup = f.create.OperationGroup(opdef)
         opgroup.media_kind = "sound"
@@ -116,7 +204,11 @@ def create_music_aaf(
     embed: bool = True,
     tag_map: dict | None = None,
     fps: float = 24.0,
-) -> str:
+    channel_wavs: list[str] | None = None,
+    pcm=None,
+    link: bool = False,
+    pcm_duration: bool = False,
+) -> str | tuple[str, float | None]:
     """Create AAF embedding the provided WAV file and attach metadata.
 
     Args:
@@ -126,9 +218,32 @@ def create_music_aaf(
         embed: Whether to embed audio essence
         tag_map: Custom metadata field mapping
         fps: Frame rate for AAF timeline (default: 24.0)
+        channel_wavs: Already-split mono WAVs, one per channel (see
+            `utils.split_to_mono_wavs`). When given they are imported as-is
+            and `wav_path` only names the track (Filename, MobID).
+        pcm: A `utils.PCMPipe` (or any iterable of raw interleaved PCM
+            chunks with samplerate/channels/sampwidth attributes). Its
+            chunks are streamed into the essence; `wav_path` only names
+            the track and no temp WAV is needed.
+        link: Reference the audio instead of embedding it: each channel's
+            SourceMob gets a WAVE descriptor and a file:// locator pointing
+            at its mono WAV (`channel_wavs`, or `wav_path` itself when it
+            is mono), so the AAF carries no audio at all. Those WAVs must
+            stay where they are for the AAF to relink. `channel_wavs` may
+            also be mono OP-Atom MXFs (`utils.split_to_opatom_mxfs`), whose
+            file packages are linked as they are. Not available with `pcm`.
+        pcm_duration: Write the Duration comment from the imported
+            audio's frame count and sample rate instead of
+            `metadata.duration`, which for MP3s without a VBR header is only
+            an estimate, and return (path, that duration) instead of the
+            path. `metadata` itself is left as it is. Manifests report
+            `metadata.duration`.
 
     - If embed is False, writes a JSON manifest describing the intended AAF.
-    - If embed is True: requires `aaf2` and a valid WAV to import.
+    - If embed is True: requires `aaf2` and a valid WAV to import. The PCM
+      is streamed into each channel's essence in fixed-size chunks, so
+      memory use does not grow with track length and no temporary channel
+      files are written.
     """
     if embed and aaf2 is None:
         raise ImportError("aaf2 required to embed essence into AAFs")
@@ -145,236 +260,498 @@ def create_music_aaf(
         }
         with open(out_aaf_path + ".manifest.json", "w", encoding="utf-8") as fh:
             json.dump(manifest, fh, indent=2)
-        return out_aaf_path + ".manifest.json"
+        created = out_aaf_path + ".manifest.json"
+        return (created, metadata.duration) if pcm_duration else created
 
     # embed path
-    if not os.path.exists(wav_path):
-        raise FileNotFoundError(wav_path)
-
-    # read sample rate from wav header (expected PCM WAV)
-    try:
-        with wave.open(wav_path, "rb") as wf:
-            framerate = wf.getframerate()
-    except Exception:
-        framerate = None
+    if link and pcm is not None:
+        raise ValueError("linked AAFs need WAV files on disk, not a PCM stream")
+    for path in ([] if pcm is not None else channel_wavs or [wav_path]):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
 
     # Create an AAF file that mirrors WAVsToAAF structure: MasterMob + SourceMob(s)
-    with aaf2.open(out_aaf_path, "w") as f:
+    with _open_new_aaf(out_aaf_path) as f:
+        duration = _add_music_mobs(f, wav_path, metadata, tag_map, fps, channel_wavs, pcm, link, pcm_duration)
+
+    return (out_aaf_path, duration) if pcm_duration else out_aaf_path
+
+
+def create_album_aaf(
+    tracks: list[tuple],
+    out_aaf_path: str,
+    embed: bool = True,
+    tag_map: dict | None = None,
+    fps: float = 24.0,
+    link: bool = False,
+    pcm_duration: bool = False,
+) -> str | tuple[str, list[float | None]]:
+    """Create one AAF holding a MasterMob (+ SourceMobs) for every track.
+
+    Packing a whole album/folder into one container means one CFB file,
+    one dictionary and one set of pan definitions instead of one per
+    track, and a single import in Avid. Each MasterMob is identical to the
+    one `create_music_aaf` would write for that track.
+
+    Args:
+        tracks: (wav_path, metadata) pairs, or (wav_path, metadata,
+            channel_wavs[, pcm]) tuples for pre-split or piped audio (see
+            `create_music_aaf`), in the order they should appear
+        out_aaf_path: Output AAF path
+        embed: Whether to embed audio essence (False writes a JSON manifest)
+        tag_map: Custom metadata field mapping
+        fps: Frame rate for AAF timeline (default: 24.0)
+        link: Reference each track's WAVs instead of embedding them (see
+            `create_music_aaf`)
+        pcm_duration: Take each track's duration from its audio and return
+            (path, durations in track order) (see `create_music_aaf`)
+    """
+    if embed and aaf2 is None:
+        raise ImportError("aaf2 required to embed essence into AAFs")
+
+    if not embed:
+        manifest = {
+            "aaf": out_aaf_path,
+            "tracks": [
+                {
+                    "source": wav_path,
+                    "metadata": metadata.__dict__,
+                    "aaf_metadata": _apply_tag_map(metadata, tag_map),
+                }
+                for wav_path, metadata, *_ in tracks
+            ],
+        }
+        with open(out_aaf_path + ".manifest.json", "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=2)
+        created = out_aaf_path + ".manifest.json"
+        return (created, [metadata.duration for _, metadata, *_ in tracks]) if pcm_duration else created
+
+    tracks = [(wav_path, metadata, *extra, None, None)[:4] for wav_path, metadata, *extra in tracks]
+    if link and any(pcm is not None for *_, pcm in tracks):
+        raise ValueError("linked AAFs need WAV files on disk, not a PCM stream")
+    for wav_path, _, channel_wavs, pcm in tracks:
+        for path in ([] if pcm is not None else channel_wavs or [wav_path]):
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+
+    with _open_new_aaf(out_aaf_path) as f:
+        durations = [_add_music_mobs(f, wav_path, metadata, tag_map, fps, channel_wavs, pcm, link, pcm_duration)
+                     for wav_path, metadata, channel_wavs, pcm in tracks]
+
+    return (out_aaf_path, durations) if pcm_duration else out_aaf_path
+
+
+def _add_music_mobs(
+    f,
+    wav_path: str,
+    metadata: MusicMetadata,
+    tag_map: dict | None,
+    fps: float,
+    channel_wavs: list[str] | None = None,
+    pcm=None,
+    link: bool = False,
+    pcm_duration: bool = False,
+):
+    """Add the MasterMob + per-channel SourceMobs for one track to an open AAF.
+
+    Shared by `create_music_aaf` (one track per file) and
+    `create_album_aaf` (many tracks in one container). Returns the duration
+    written to the Duration comment: measured from the audio with
+    `pcm_duration`, else `metadata.duration`.
+    """
+    header_wav = channel_wavs[0] if channel_wavs else wav_path
+    linked_mxf = link and Path(header_wav).suffix.lower() == ".mxf"
+    if pcm is not None:
+        channels, sample_rate, sampwidth = pcm.channels, pcm.samplerate, pcm.sampwidth
+        frames = 0  # known once the stream has been read
+    elif linked_mxf:
+        channels = len(channel_wavs or [wav_path])
+        sample_rate = sampwidth = frames = 0  # read from the MXF descriptor once linked
+    else:
+        for path in channel_wavs or [wav_path]:
+            if not os.path.exists(path):
+                raise FileNotFoundError(path)
+
         # read raw wav header details
         try:
-            with wave.open(wav_path, "rb") as wf:
-                channels = wf.getnchannels()
+            with wave.open(header_wav, "rb") as wf:
+                channels = len(channel_wavs) if channel_wavs else wf.getnchannels()
                 sample_rate = wf.getframerate()
+                sampwidth = wf.getsampwidth()
                 frames = wf.getnframes()
         except Exception as e:
-            raise RuntimeError(f"Failed to read WAV file {wav_path}: {e}. This file may not be a valid PCM WAV format.") from e
-
-        def _deterministic_mobid(path: str, suffix: str = "master"):
-            try:
-                abs_path = str(Path(path).resolve())
-                stat = Path(path).stat()
-                seed = f"{abs_path}|{stat.st_size}|{int(stat.st_mtime)}|{suffix}".encode("utf-8")
-                h = hashlib.sha256(seed).digest()[:16]
-                parts = [h[i:i+4].hex() for i in range(0, 16, 4)]
-                prefix = "060a2b34.01010105.01010f20.13000000"
-                urn = f"urn:smpte:umid:{prefix}.{'.'.join(parts)}"
-                return aaf2.mobid.MobID(urn)
-            except Exception:
-                return aaf2.mobid.MobID.new()
+            raise RuntimeError(f"Failed to read WAV file {header_wav}: {e}. This file may not be a valid PCM WAV format.") from e
 
+    def _deterministic_mobid(path: str, suffix: str = "master"):
+        try:
+            abs_path = str(Path(path).resolve())
+            stat = Path(path).stat()
+            seed = f"{abs_path}|{stat.st_size}|{int(stat.st_mtime)}|{suffix}".encode("utf-8")
+            h = hashlib.sha256(seed).digest()[:16]
+            parts = [h[i:i+4].hex() for i in range(0, 16, 4)]
+            prefix = "060a2b34.01010105.01010f20.13000000"
+            urn = f"urn:smpte:umid:{prefix}.{'.'.join(parts)}"
+            return aaf2.mobid.MobID(urn)
+        except Exception:
+            return aaf2.mobid.MobID.new()
+
+    stem = Path(wav_path).stem
+    if link:
+        if channels > 1 and not channel_wavs:
+            raise ValueError(f"linked AAFs need one mono file per channel; {wav_path} has {channels} channels")
+        names = [f"{stem}.ch{c}.PHYS" for c in range(1, channels + 1)] if channel_wavs else \
+            _channel_mob_names(wav_path, 1)
+        link_source = _link_mxf_source_mob if linked_mxf else _link_wav_source_mob
+        channel_source_mobs = [link_source(f, name, path)
+                               for name, path in zip(names, channel_wavs or [wav_path])]
+        if linked_mxf:
+            descriptor = channel_source_mobs[0].descriptor
+            # The descriptor's SampleRate is the container edit rate (the
+            # -mxf_audio_edit_rate fps, for some writers) and its Length
+            # counts those edit units; the audio rate is AudioSamplingRate
+            sample_rate = float(descriptor["AudioSamplingRate"].value)
+            edit_rate = float(descriptor["SampleRate"].value) or sample_rate
+            sampwidth = descriptor["QuantizationBits"].value // 8
+            frames = int(round(descriptor.length * sample_rate / edit_rate))
+    elif pcm is not None:
+        channel_source_mobs, frames = _import_pcm_stream(f, _channel_mob_names(wav_path, channels), pcm)
+    elif channel_wavs:
+        # ffmpeg already wrote one mono file per channel; stream each one in
         channel_source_mobs = []
-        tmp_files = []
+        for c, ch_path in enumerate(channel_wavs, start=1):
+            mobs, frames = _import_pcm_stream(f, [f"{stem}.ch{c}.PHYS"], _wav_reader(ch_path))
+            channel_source_mobs.extend(mobs)
+    else:
+        channel_source_mobs, frames = _import_pcm_stream(
+            f, _channel_mob_names(wav_path, channels), _wav_reader(wav_path)
+        )
+
+    duration = metadata.duration
+    if pcm_duration and frames and sample_rate:
+        duration = frames / float(sample_rate)
+
+    master = f.create.MasterMob()
+    # Set MasterMob name to Source_TrackName so Avid "Name" column reflects it
+    _src_val = getattr(metadata, 'source', None) or getattr(metadata, 'album', None)
+    _tn_val = metadata.track_name or Path(wav_path).stem
+    _combined_name = f"{_src_val}_{_tn_val}" if _src_val else _tn_val
+    master.name = _combined_name
+    master.mob_id = _deterministic_mobid(wav_path, "master")
+
+    master_edit_rate = fps
+    for i, src_mob in enumerate(channel_source_mobs, start=1):
+        src_slot_id = 1
+        mslot = master.create_timeline_slot(master_edit_rate)
+        mclip = f.create.SourceClip()
+        mclip["DataDefinition"].value = _definitions(f)["sound"]
+        try:
+            # OP-Atom file packages carry a timecode track before the sound one
+            src_slot = next((s for s in src_mob.slots if s.media_kind == "Sound"), None) or list(src_mob.slots)[0]
+            src_slot_id = src_slot.slot_id
+            length_val = getattr(src_slot, "length", None) or getattr(src_slot.segment, "length", None) or frames
+        except Exception:
+            length_val = frames
+
+        mclip["Length"].value = int(length_val)
+        mclip["StartTime"].value = 0
+        mclip["SourceID"].value = src_mob.mob_id
+        mclip["SourceMobSlotID"].value = src_slot_id
+        
+        # Apply pan based on channel count
+        if len(channel_source_mobs) == 2:
+            # Stereo: channel 1 = left (-1.0), channel 2 = right (1.0)
+            pan_value = -1.0 if i == 1 else 1.0
+            _apply_pan_to_slot(f, mslot, mclip, pan_value, length_val)
+        elif len(channel_source_mobs) == 1:
+            # Mono: center pan (0.0)
+            _apply_pan_to_slot(f, mslot, mclip, 0.0, length_val)
+        else:
+            # Multi-channel (>2): default to no pan control
+            mslot.segment = mclip
+        
+        # Set PhysicalTrackNumber for proper channel identification
+        try:
+            mslot["PhysicalTrackNumber"].value = i
+        except Exception:
+            pass
+
+    aaf_meta = _apply_tag_map(metadata, tag_map)
+    for k, v in aaf_meta.items():
+        try:
+            master.comments[k] = str(v)
+        except Exception:
+            pass
+
+    # Write Avid-friendly field names for key metadata
+    try:
+        # Track Name (primary title)
+        if metadata.track_name:
+            master.comments["Track Name"] = str(metadata.track_name)
+        
+        # Track (track number only, not "6/10" format)
+        if metadata.track:
+            track_val = str(metadata.track).split('/')[0].strip() if '/' in str(metadata.track) else str(metadata.track)
+            master.comments["Track"] = track_val
+        
+        # Total Tracks
+        if metadata.total_tracks is not None:
+            master.comments["Total Tracks"] = str(int(metadata.total_tracks))
+        
+        # Genre
+        if metadata.genre:
+            master.comments["Genre"] = str(metadata.genre)
+    except Exception:
+        pass
+
+    # ensure Description plus a set of Avid-friendly keys are present
+    try:
+        if metadata.description:
+            master.comments["Description"] = str(metadata.description)
+
+        # Friendly name: Source_TrackName (e.g., Flicka_Herd Overlook)
+        src_val = getattr(metadata, 'source', None) or getattr(metadata, 'album', None)
+        tn_val = metadata.track_name or Path(wav_path).stem
+        combined_name = f"{src_val}_{tn_val}" if src_val else tn_val
+        master.comments["Name"] = str(combined_name)
+        master.comments["Filename"] = str(Path(wav_path).name)
+        master.comments["FilePath"] = str(Path(wav_path))
+
+        # audio properties
+        try:
+            master.comments["SampleRate"] = str(int(sample_rate))
+            master.comments["BitDepth"] = str(sampwidth * 8)
+            master.comments["Channels"] = str(len(channel_source_mobs))
+            master.comments["Number of Frames"] = str(int(frames))
+        except Exception:
+            pass
+
+        tracks_label = 'A1' if len(channel_source_mobs) == 1 else ('A1A2' if len(channel_source_mobs) == 2 else f"A1A{len(channel_source_mobs)}")
+        master.comments['Tracks'] = tracks_label
+
+        # Duration (seconds) — measured or probed, if known
+        if duration:
+            master.comments['Duration'] = f"{float(duration):.3f}"
+        else:
+            master.comments['Duration'] = str(int(frames))
+
+        # If metadata provides total_tracks or genre, write those too
+        try:
+            if getattr(metadata, 'total_tracks', None) is not None:
+                master.comments['TotalTracks'] = str(int(metadata.total_tracks))
+        except Exception:
+            pass
+
+        try:
+            if getattr(metadata, 'genre', None):
+                master.comments['Genre'] = str(metadata.genre)
+        except Exception:
+            pass
+
+        # Artist & Talent handling: write both Artist and Talent.
+        # If both artist and album_artist are present and different,
+        # preserve both separately. Otherwise, set both to the same value
         try:
-            if channels > 1:
-                with wave.open(wav_path, "rb") as r:
-                    nframes = r.getnframes()
-                    sampwidth = r.getsampwidth()
-                    fr = r.getframerate()
-                    nch = r.getnchannels()
-                    raw = r.readframes(nframes)
-
-                bytes_per_frame = sampwidth * nch
-                channel_bytes = [bytearray() for _ in range(nch)]
-                for i in range(nframes):
-                    off = i * bytes_per_frame
-                    for c in range(nch):
-                        start = off + c * sampwidth
-                        channel_bytes[c].extend(raw[start:start+sampwidth])
-
-                for idx, chdata in enumerate(channel_bytes, start=1):
-                    tmp = tempfile.NamedTemporaryFile(prefix=f"mxto_ch{idx}_", suffix=".wav", delete=False)
-                    tmp_files.append(tmp.name)
-                    tmp.close()
-                    with wave.open(tmp.name, "wb") as w:
-                        w.setnchannels(1)
-                        w.setsampwidth(sampwidth)
-                        w.setframerate(fr)
-                        w.writeframes(bytes(chdata))
-
-                    src_mob = f.create.SourceMob(Path(tmp.name).stem + ".PHYS")
-                    src_mob.import_audio_essence(tmp.name, edit_rate=sample_rate)
-                    channel_source_mobs.append(src_mob)
+            artist_val = getattr(metadata, 'artist', None)
+            album_artist_val = getattr(metadata, 'album_artist', None)
+            talent_val = getattr(metadata, 'talent', None)
+
+            # Decide values
+            if artist_val and album_artist_val and artist_val != album_artist_val:
+                master.comments['Artist'] = str(artist_val)
+                master.comments['Talent'] = str(album_artist_val)
             else:
-                src_mob = f.create.SourceMob(Path(wav_path).name + ".PHYS")
-                src_mob.import_audio_essence(wav_path, edit_rate=sample_rate)
-                channel_source_mobs.append(src_mob)
-
-            master = f.create.MasterMob()
-            # Set MasterMob name to Source_TrackName so Avid "Name" column reflects it
-            _src_val = getattr(metadata, 'source', None) or getattr(metadata, 'album', None)
-            _tn_val = metadata.track_name or Path(wav_path).stem
-            _combined_name = f"{_src_val}_{_tn_val}" if _src_val else _tn_val
-            master.name = _combined_name
-            master.mob_id = _deterministic_mobid(wav_path, "master")
-
-            master_edit_rate = fps
-            for i, src_mob in enumerate(channel_source_mobs, start=1):
-                src_slot_id = 1
-                mslot = master.create_timeline_slot(master_edit_rate)
-                mclip = f.create.SourceClip()
-                mclip["DataDefinition"].value = f.dictionary.lookup_datadef("sound")
-                try:
-                    src_slot = list(src_mob.slots)[0]
-                    length_val = getattr(src_slot, "length", None) or getattr(src_slot.segment, "length", None) or frames
-                except Exception:
-                    length_val = frames
-
-                mclip["Length"].value = int(length_val)
-                mclip["StartTime"].value = 0
-                mclip["SourceID"].value = src_mob.mob_id
-                mclip["SourceMobSlotID"].value = src_slot_id
-                
-                # Apply pan based on channel count
-                if len(channel_source_mobs) == 2:
-                    # Stereo: channel 1 = left (-1.0), channel 2 = right (1.0)
-                    pan_value = -1.0 if i == 1 else 1.0
-                    _apply_pan_to_slot(f, mslot, mclip, pan_value, length_val)
-                elif len(channel_source_mobs) == 1:
-                    # Mono: center pan (0.0)
-                    _apply_pan_to_slot(f, mslot, mclip, 0.0, length_val)
-                else:
-                    # Multi-channel (>2): default to no pan control
-                    mslot.segment = mclip
-                
-                # Set PhysicalTrackNumber for proper channel identification
-                try:
-                    mslot["PhysicalTrackNumber"].value = i
-                except Exception:
-                    pass
-
-            aaf_meta = _apply_tag_map(metadata, tag_map)
-            for k, v in aaf_meta.items():
-                try:
-                    master.comments[k] = str(v)
-                except Exception:
-                    pass
-
-            # Write Avid-friendly field names for key metadata
-            try:
-                # Track Name (primary title)
-                if metadata.track_name:
-                    master.comments["Track Name"] = str(metadata.track_name)
-                
-                # Track (track number only, not "6/10" format)
-                if metadata.track:
-                    track_val = str(metadata.track).split('/')[0].strip() if '/' in str(metadata.track) else str(metadata.track)
-                    master.comments["Track"] = track_val
-                
-                # Total Tracks
-                if metadata.total_tracks is not None:
-                    master.comments["Total Tracks"] = str(int(metadata.total_tracks))
-                
-                # Genre
-                if metadata.genre:
-                    master.comments["Genre"] = str(metadata.genre)
-            except Exception:
-                pass
-
-            # ensure Description plus a set of Avid-friendly keys are present
-            try:
-                if metadata.description:
-                    master.comments["Description"] = str(metadata.description)
-
-                # Friendly name: Source_TrackName (e.g., Flicka_Herd Overlook)
-                src_val = getattr(metadata, 'source', None) or getattr(metadata, 'album', None)
-                tn_val = metadata.track_name or Path(wav_path).stem
-                combined_name = f"{src_val}_{tn_val}" if src_val else tn_val
-                master.comments["Name"] = str(combined_name)
-                master.comments["Filename"] = str(Path(wav_path).name)
-                master.comments["FilePath"] = str(Path(wav_path))
-
-                # audio properties
-                try:
-                    master.comments["SampleRate"] = str(int(sample_rate))
-                    # we can compute bit depth if a source frame size is available
-                    # but we don't have sampwidth here for the split case; default to empty
-                    try:
-                        with wave.open(wav_path, 'rb') as _w:
-                            master.comments["BitDepth"] = str(_w.getsampwidth() * 8)
-                    except Exception:
-                        pass
-                    master.comments["Channels"] = str(len(channel_source_mobs))
-                    master.comments["Number of Frames"] = str(int(frames))
-                except Exception:
-                    pass
-
-                tracks_label = 'A1' if len(channel_source_mobs) == 1 else ('A1A2' if len(channel_source_mobs) == 2 else f"A1A{len(channel_source_mobs)}")
-                master.comments['Tracks'] = tracks_label
-
-                # Duration (seconds) — prefer metadata.duration if present
-                if metadata.duration:
-                    master.comments['Duration'] = f"{float(metadata.duration):.3f}"
-                else:
-                    master.comments['Duration'] = str(int(frames))
-
-                # If metadata provides total_tracks or genre, write those too
-                try:
-                    if getattr(metadata, 'total_tracks', None) is not None:
-                        master.comments['TotalTracks'] = str(int(metadata.total_tracks))
-                except Exception:
-                    pass
-
-                try:
-                    if getattr(metadata, 'genre', None):
-                        master.comments['Genre'] = str(metadata.genre)
-                except Exception:
-                    pass
-
-                # Artist & Talent handling: write both Artist and Talent.
-                # If both artist and album_artist are present and different,
-                # preserve both separately. Otherwise, set both to the same value
-                try:
-                    artist_val = getattr(metadata, 'artist', None)
-                    album_artist_val = getattr(metadata, 'album_artist', None)
-                    talent_val = getattr(metadata, 'talent', None)
-
-                    # Decide values
-                    if artist_val and album_artist_val and artist_val != album_artist_val:
-                        master.comments['Artist'] = str(artist_val)
-                        master.comments['Talent'] = str(album_artist_val)
-                    else:
-                        # prefer explicit talent field, then artist, then album_artist
-                        chosen = talent_val or artist_val or album_artist_val
-                        if chosen:
-                            master.comments['Artist'] = str(chosen)
-                            master.comments['Talent'] = str(chosen)
-                except Exception:
-                    pass
-            except Exception:
-                # Don't fail the whole write if comments fail
-                pass
-
-            f.content.mobs.append(master)
-            for src in channel_source_mobs:
-                f.content.mobs.append(src)
-        finally:
-            for p in tmp_files:
-                try:
-                    os.unlink(p)
-                except Exception:
-                    pass
+                # prefer explicit talent field, then artist, then album_artist
+                chosen = talent_val or artist_val or album_artist_val
+                if chosen:
+                    master.comments['Artist'] = str(chosen)
+                    master.comments['Talent'] = str(chosen)
+        except Exception:
+            pass
+    except Exception:
+        # Don't fail the whole write if comments fail
+        pass
+
+    f.content.mobs.append(master)
+    for src in channel_source_mobs:
+        f.content.mobs.append(src)
+    return duration
+
+
+# memoryview formats for splitting interleaved PCM by sample width
+_SAMPLE_FORMATS = {1: "B", 2: "h", 4: "i"}
 
-    return out_aaf_path
+
+def _split_channels(data, nch: int, width: int) -> list:
+    """Split interleaved PCM (whole frames only) into one contiguous buffer per channel.
+
+    `data` can be any buffer (bytes, memoryview, ...) and is not copied
+    before splitting. With NumPy the samples are viewed as
+    width-byte records (so 24-bit needs no special case) and each channel
+    is one strided copy; without it, memoryview casts or per-byte-lane
+    slices are used.
+    Returns bytes-like objects whose len() is their size in bytes.
+    """
+    if nch == 1:
+        return [data]
+    if np is not None:
+        frames = np.frombuffer(data, dtype=f"V{width}").reshape(-1, nch)
+        return [np.ascontiguousarray(frames[:, c]).view(np.uint8) for c in range(nch)]
+    fmt = _SAMPLE_FORMATS.get(width)
+    if fmt:
+        samples = memoryview(data).cast("B").cast(fmt)
+        return [samples[c::nch].tobytes() for c in range(nch)]
+    # e.g. 24-bit: no memoryview format, so move each byte lane
+    data = bytes(data)
+    frame_bytes = nch * width
+    out = [bytearray(len(data) // nch) for _ in range(nch)]
+    for c in range(nch):
+        for k in range(width):
+            out[c][k::width] = data[c * width + k::frame_bytes]
+    return out
+
+
+def _channel_mob_names(wav_path: str, channels: int) -> list[str]:
+    if channels == 1:
+        return [Path(wav_path).name + ".PHYS"]
+    stem = Path(wav_path).stem
+    return [f"{stem}.ch{c}.PHYS" for c in range(1, channels + 1)]
+
+
+def _wav_reader(wav_path: str) -> PCMFileReader:
+    """Chunked reader over the data chunk of a PCM WAV (see `_import_pcm_stream`)."""
+    fmt = probe_audio_format(wav_path)
+    if fmt is None or fmt.container != "wav" or not fmt.pcm:
+        raise RuntimeError(f"Failed to locate PCM data in {wav_path}")
+    return PCMFileReader(wav_path, fmt)
+
+
+def _link_wav_source_mob(f, name: str, wav_path: str):
+    """A SourceMob that references a mono PCM WAV on disk instead of embedding it.
+
+    Same slot layout as an embedded SourceMob, but with a WAVEDescriptor
+    (the file's RIFF/fmt header as Summary) and a file:// NetworkLocator,
+    as aaf2's AMA linking writes them.
+    """
+    fmt = probe_audio_format(wav_path)
+    if fmt is None or fmt.container != "wav" or not fmt.pcm:
+        raise RuntimeError(f"Failed to locate PCM data in {wav_path}")
+    frames = fmt.data_size // (fmt.channels * fmt.bits // 8)
+    src_mob = f.create.SourceMob(name)
+    _, slot = src_mob.create_essence(fmt.samplerate, "sound", offline=True)
+    descriptor = f.create.WAVEDescriptor()
+    descriptor["SampleRate"].value = fmt.samplerate
+    descriptor["Summary"].value = aaf2.ama.get_wave_fmt(wav_path)
+    descriptor["ContainerFormat"].value = f.dictionary.lookup_containerdef("AAF")
+    descriptor["Locator"].append(aaf2.ama.create_network_locator(f, os.path.abspath(wav_path)))
+    src_mob.descriptor = descriptor
+    descriptor.length = frames
+    slot.segment.length = frames
+    return src_mob
+
+
+def _link_mxf_source_mob(f, name: str, mxf_path: str):
+    """The file SourceMob of a mono OP-Atom MXF, linked rather than embedded.
+
+    The MXF's file package is copied into the AAF with its own MobID,
+    PCMDescriptor and a file:// locator (aaf2's MXF reader), which is what
+    Avid matches against its MediaFiles database. The MXF's material
+    package is left out: the caller's MasterMob takes its place.
+    """
+    mxf = aaf2.mxf.MXFFile(os.path.abspath(mxf_path))
+    if mxf.operation_pattern != "OPAtom":
+        raise RuntimeError(f"{mxf_path} is not an OP-Atom MXF")
+    mxf.aaf = f
+    for package in mxf.packages():
+        if not isinstance(package, aaf2.mxf.MXFSourcePackage):
+            continue
+        src_mob = f.content.mobs.get(package.mob_id) or package.link()
+        descriptor = src_mob.descriptor
+        if descriptor is not None and descriptor["Locator"].value:
+            # Detached again so the caller adds it after its MasterMob, like the other modes
+            f.content.mobs.pop(src_mob.mob_id)
+            src_mob.name = name
+            return src_mob
+    raise RuntimeError(f"No file package found in {mxf_path}")
+
+
+def write_channel_wavs(pcm, dst_prefix: str) -> list[str]:
+    """Stream an interleaved PCM source into `<dst_prefix>.chN.wav` mono files.
+
+    `pcm` is shaped like `utils.PCMPipe` / `convert.PCMFileReader`; the
+    files are named like `utils.split_to_mono_wavs` output, so they can be
+    passed as `channel_wavs`. Used to keep linked media without ffmpeg.
+    """
+    nch, width = pcm.channels, pcm.sampwidth
+    paths = [f"{dst_prefix}.ch{c}.wav" for c in range(1, nch + 1)]
+    writers = []
+    try:
+        for path in paths:
+            w = wave.open(path, "wb")
+            writers.append(w)
+            w.setnchannels(1)
+            w.setsampwidth(width)
+            w.setframerate(pcm.samplerate)
+        pending = b""
+        for chunk in pcm:
+            data = pending + chunk if pending else chunk
+            usable = len(data) - len(data) % (nch * width)
+            pending = data[usable:]
+            if usable:
+                for w, chdata in zip(writers, _split_channels(memoryview(data)[:usable], nch, width)):
+                    w.writeframesraw(chdata)
+    finally:
+        for w in writers:
+            w.close()
+    return paths
+
+
+def _import_pcm_stream(f, names: list[str], pcm) -> tuple[list, int]:
+    """Stream interleaved PCM chunks into one mono SourceMob per channel.
+
+    `pcm` is anything with samplerate/channels/sampwidth that iterates
+    over interleaved little-endian chunks (`utils.PCMPipe`,
+    `convert.PCMFileReader`); `names` gives each channel's SourceMob name.
+    Each chunk is split with `_split_channels` (no per-sample Python loop)
+    and appended to the channels' essence streams as it arrives, so at
+    most one chunk is held in memory whatever the track length, and no
+    temporary channel files are written. Returns the SourceMobs and the
+    number of frames written.
+    """
+    nch, width, rate = pcm.channels, pcm.sampwidth, pcm.samplerate
+
+    mobs, slots, streams = [], [], []
+    for name in names[:nch]:
+        src_mob = f.create.SourceMob(name)
+        essencedata, slot = src_mob.create_essence(rate, "sound")
+        descriptor = f.create.PCMDescriptor()
+        src_mob.descriptor = descriptor
+        descriptor["Channels"].value = 1
+        descriptor["BlockAlign"].value = width
+        descriptor["SampleRate"].value = rate
+        descriptor["AverageBPS"].value = rate * width
+        descriptor["QuantizationBits"].value = width * 8
+        descriptor["AudioSamplingRate"].value = rate
+        mobs.append(src_mob)
+        slots.append(slot)
+        streams.append(essencedata.open("w"))
+
+    frame_bytes = nch * width
+    frames = 0
+    pending = b""
+    for chunk in pcm:
+        data = pending + chunk if pending else chunk
+        usable = len(data) - len(data) % frame_bytes
+        pending = data[usable:]
+        if not usable:
+            continue
+        for stream, chdata in zip(streams, _split_channels(memoryview(data)[:usable], nch, width)):
+            stream.write(chdata)
+        frames += usable // frame_bytes
+
+    for src_mob, slot in zip(mobs, slots):
+        src_mob.descriptor.length = frames
+        slot.segment.length = frames
+    return mobs, frames
 
 
 def _apply_tag_map(metadata: MusicMetadata, tag_map: dict | None) -> dict:
@@ -407,4 +784,4 @@ def _apply_tag_map(metadata: MusicMetadata, tag_map: dict | None) -> dict:
     return out
 
 
-__all__ = ["create_music_aaf"]
+__all__ = ["create_music_aaf", "create_album_aaf"]
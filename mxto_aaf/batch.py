@@ -7,34 +7,144 @@ embedding when ffmpeg + aaf2 are present.
 from __future__ import annotations
 
 import argparse
+import hashlib
 import os
 import json
 import sys
+import threading
 import time
-import csv
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice
 from pathlib import Path
-from typing import Iterable, Dict, Any, List
+from typing import Iterable, Dict, Any, List, Tuple
 
-from .metadata import extract_music_metadata, MusicMetadata
-from .aaf import create_music_aaf
-from .utils import ffmpeg_available, convert_to_wav
+from .metadata import DURATION_POLICIES, extract_music_metadata, MusicMetadata
+from .aaf import create_music_aaf, create_album_aaf, write_channel_wavs
+from .convert import (
+    CONVERSION_ACTIONS,
+    ConversionTarget,
+    PCMFileReader,
+    parse_target_value,
+    plan_conversion,
+)
+from .utils import (
+    MXF_BITS, MXF_SAMPLERATE, PCMPipe, ffmpeg_available, split_many_to_mono_wavs, split_to_mono_wavs,
+    split_to_opatom_mxfs,
+)
+from .pipeline import Stage, run_pipeline
+from .cache import BuildCache, CACHE_FILENAME, file_sha256, options_fingerprint
+from .pcmcache import DEFAULT_MAX_BYTES, PCMCache
+from .metacache import MetadataCache, default_metadata_cache_path
+from .probe import DEFAULT_PROBE_WORKERS
+from .journal import BatchJournal, load_journal
+from .schedule import (
+    SCHEDULE_POLICIES,
+    MemoryBudget,
+    estimate_costs,
+    estimate_peak_memory,
+    parse_size,
+    simulate_makespan,
+)
+from .report import count_conversions, write_json_log, write_results_csv, write_metadata_csv
 
 
 SUPPORTED = {".mp3", ".m4a", ".wav", ".aif", ".aiff"}
 
 
+def default_jobs() -> int:
+    """Default worker count for batch runs: one worker per CPU core."""
+    return max(1, os.cpu_count() or 1)
+
+
+def default_stage_workers(jobs: int | None = None) -> Dict[str, int]:
+    """Default thread counts for the pipeline stages.
+
+    Decoding runs in ffmpeg subprocesses, so it gets one thread per job;
+    probing and AAF writing are Python-bound and only need a couple.
+    """
+    jobs = jobs or default_jobs()
+    return {"probe": 2, "decode": max(1, jobs), "embed": 2}
+
+
+def parse_stage_workers(spec: str) -> Dict[str, int]:
+    """Parse a CLI spec like "probe=2,decode=8,embed=2"."""
+    out: Dict[str, int] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, value = part.partition("=")
+        name = name.strip()
+        if name not in {"probe", "decode", "embed"} or not value.strip().isdigit():
+            raise ValueError(f"invalid stage worker spec: {part!r}")
+        out[name] = max(1, int(value))
+    return out
+
+
 def _iter_audio_files(path: Path, recursive: bool = True) -> Iterable[Path]:
-    if recursive:
-        for p in path.rglob("*"):
-            if p.is_file() and p.suffix.lower() in SUPPORTED:
-                yield p
-    else:
-        for p in path.iterdir():
-            if p.is_file() and p.suffix.lower() in SUPPORTED:
-                yield p
+    """Yield supported audio files under `path` as they are found.
 
+    Built on `os.scandir` so file type checks come from the directory
+    listing itself instead of one stat call per entry (which matters on
+    SMB/NFS mounts). Each directory's files are yielded (sorted by name)
+    before descending into its subdirectories; symlinked directories are
+    not followed and unreadable directories are skipped.
+    """
+    stack = [str(path)]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                elif os.path.splitext(entry.name)[1].lower() in SUPPORTED and entry.is_file():
+                    yield Path(entry.path)
+            except OSError:
+                continue
+        if recursive:
+            stack.extend(reversed(subdirs))
 
-def _process_single_file(
+
+def _metadata_dict(md: MusicMetadata) -> Dict[str, Any]:
+    return {
+        "track_name": md.track_name,
+        "track": md.track,
+        "total_tracks": md.total_tracks,
+        "genre": md.genre,
+        "artist": md.artist,
+        "album_artist": md.album_artist,
+        "talent": md.talent,
+        "composer": md.composer,
+        "source": md.source,
+        "album": md.album,
+        "catalog_number": md.catalog_number,
+        "description": md.description,
+        "duration": md.duration,
+    }
+
+
+def _new_result(p: Path, status: str = "success", output: str | None = None, error: str | None = None) -> Dict[str, Any]:
+    return {
+        "input": str(p),
+        "output": output,
+        "status": status,
+        "error": error,
+        "duration": 0.0,
+        "metadata": None,
+        "conversion": None,
+        "pcm_cache": None,
+        "metadata_cache": None,
+        "tag_bytes": None,
+    }
+
+
+def _new_job(
     p: Path,
     src_root: Path,
     out_dir: Path,
@@ -42,73 +152,605 @@ def _process_single_file(
     tag_map: dict | None,
     skip_existing: bool,
     fps: float = 24.0,
+    index: int = 0,
+    pipe_decode: bool = False,
+    target: ConversionTarget | None = None,
+    pcm_cache: PCMCache | None = None,
+    media_dir: Path | None = None,
+    media_format: str = "wav",
+    metadata_cache: MetadataCache | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str = "header",
+    hash_input: bool = False,
 ) -> Dict[str, Any]:
-    """Process a single audio file and return result dict"""
-    result = {
-        "input": str(p),
-        "output": None,
-        "status": "success",
-        "error": None,
-        "duration": 0.0,
-        "metadata": None,
+    """Per-file work item shared by the sequential, pool and pipeline engines.
+
+    `hash_input` attaches the input's build-cache signature to a successful
+    result (see `_sign_input`).
+    """
+    return {
+        "index": index,
+        "path": p,
+        "src_root": src_root,
+        "out_dir": out_dir,
+        "embed": embed,
+        "tag_map": tag_map,
+        "skip_existing": skip_existing,
+        "fps": fps,
+        "pipe_decode": pipe_decode,
+        "target": target,
+        "pcm_cache": pcm_cache,
+        "media_dir": media_dir,
+        "media_format": media_format,
+        "metadata_cache": metadata_cache,
+        "ranged_tags": ranged_tags,
+        "duration_policy": duration_policy,
+        "hash_input": hash_input,
+        "plan": None,
+        "dest": None,
+        "md": None,
+        "wav": None,
+        "channels": None,
+        "pcm": None,
+        "tmp": [],
+        "done": False,
+        "start": time.time(),
+        "result": _new_result(p),
     }
-    
-    start_time = time.time()
-    
+
+
+def _remove_tmp(job: Dict[str, Any]) -> None:
+    for tmp in job.get("tmp") or []:
+        try:
+            os.remove(tmp)
+        except Exception:
+            pass
+    job["tmp"] = []
+
+
+def _fail_job(job: Dict[str, Any], e: Exception) -> None:
+    job["result"]["status"] = "failed"
+    job["result"]["error"] = str(e)
+    job["done"] = True
+    _remove_tmp(job)
+
+
+def _probe_step(job: Dict[str, Any]) -> None:
+    """Resolve the destination, honour skip-existing and read tags."""
+    if job["done"]:
+        return
     try:
+        p = job["path"]
+        if job["hash_input"]:
+            # Taken before anything reads the file; see _sign_input
+            st = p.stat()
+            job["input_stat"] = (st.st_size, st.st_mtime_ns)
         # Mirror source directory structure under out_dir
-        rel = p.relative_to(src_root)
-        dest_dir = out_dir / rel.parent
+        rel = p.relative_to(job["src_root"])
+        dest_dir = job["out_dir"] / rel.parent
         dest_dir.mkdir(parents=True, exist_ok=True)
         dest = dest_dir / (p.stem + ".aaf")
-        
+        job["dest"] = dest
+
         # Skip if already exists
-        if skip_existing and dest.exists():
-            result["status"] = "skipped"
-            result["output"] = str(dest)
-            return result
-        
-        md = extract_music_metadata(str(p))
-        result["metadata"] = {
-            "track_name": md.track_name,
-            "track": md.track,
-            "total_tracks": md.total_tracks,
-            "genre": md.genre,
-            "artist": md.artist,
-            "album_artist": md.album_artist,
-            "talent": md.talent,
-            "composer": md.composer,
-            "source": md.source,
-            "album": md.album,
-            "catalog_number": md.catalog_number,
-            "description": md.description,
-            "duration": md.duration,
-        }
-
-        # If the file is not a WAV, convert it first (for reading metadata + audio).
-        # This ensures the wave module can parse it without extensible format errors.
-        if p.suffix.lower() != ".wav":
-            tmp = str(dest_dir / (p.stem + ".tmp.wav"))
-            convert_to_wav(str(p), tmp)
-            if not os.path.exists(tmp):
-                raise RuntimeError(f"Conversion failed: {tmp} was not created")
-            created = create_music_aaf(tmp, md, str(dest), embed=embed, tag_map=tag_map, fps=fps)
-            try:
-                os.remove(tmp)
-            except Exception:
-                pass
+        if job["skip_existing"] and dest.exists():
+            job["result"]["status"] = "skipped"
+            job["result"]["output"] = str(dest)
+            job["done"] = True
+            return
+
+        options = {"ranged": job["ranged_tags"], "duration_policy": job["duration_policy"]}
+        if job["metadata_cache"] is not None:
+            md, hit = job["metadata_cache"].fetch(str(p), lambda path: extract_music_metadata(path, **options))
+            job["result"]["metadata_cache"] = "hit" if hit else "miss"
         else:
-            created = create_music_aaf(str(p), md, str(dest), embed=embed, tag_map=tag_map, fps=fps)
+            md = extract_music_metadata(str(p), **options)
+        job["md"] = md
+        job["result"]["tag_bytes"] = md.bytes_read
+        job["result"]["metadata"] = _metadata_dict(md)
+    except Exception as e:
+        _fail_job(job, e)
 
-        result["output"] = created
-        result["duration"] = time.time() - start_time
-        
+
+def _probe_jobs(jobs: List[Dict[str, Any]]) -> None:
+    """Probe several jobs at once.
+
+    Untagged files are read with one ffprobe process each, so probing a
+    batch or folder in threads overlaps those spawns (the probe service
+    caps how many run at a time).
+    """
+    if len(jobs) < 2:
+        for job in jobs:
+            _probe_step(job)
+        return
+    with ThreadPoolExecutor(max_workers=min(len(jobs), DEFAULT_PROBE_WORKERS)) as pool:
+        list(pool.map(_probe_step, jobs))
+
+
+def _decode_step(job: Dict[str, Any]) -> None:
+    """Plan the conversion and get the input into importable PCM.
+
+    PCM WAV in the target format is imported as-is and PCM AIFF /
+    extensible WAV is streamed with a byte-swap/re-wrap; everything else is
+    decoded by ffmpeg into temporary per-channel mono WAVs next to the
+    destination (or, with pipe_decode, streamed from ffmpeg's stdout).
+    With a PCM cache, transcodes are looked up there first and misses are
+    decoded into it instead. With a media folder (linked AAFs) the
+    per-channel WAVs or MXFs are written there to stay, see
+    `_decode_to_media`.
+    """
+    if job["done"]:
+        return
+    try:
+        p = job["path"]
+        job["wav"] = str(p)
+        plan = job["plan"] or plan_conversion(p, job["target"])
+        job["plan"] = plan
+        job["result"]["conversion"] = plan.action
+        if job["media_dir"] is not None:
+            _decode_to_media(job)
+        elif plan.action == "repack":
+            job["pcm"] = PCMFileReader(p, plan.fmt)
+        elif plan.action == "transcode" and job["pcm_cache"] is not None:
+            if not _cache_lookup(job):
+                staging = job["pcm_cache"].stage()
+                try:
+                    split_to_mono_wavs(str(p), os.path.join(staging, "pcm"), plan.channels,
+                                       samplerate=plan.samplerate, bits=plan.bits)
+                except Exception:
+                    job["pcm_cache"].discard(staging)
+                    raise
+                _cache_store(job, staging)
+        elif plan.action == "transcode" and job["pipe_decode"]:
+            # Pipe mode: ffmpeg's stdout is streamed into the AAF by the embed
+            # step, so the only bytes written to the destination are the AAF
+            job["pcm"] = PCMPipe(str(p), plan.samplerate, plan.channels, bits=plan.bits)
+        elif plan.action == "transcode":
+            # ffmpeg decodes and splits in one go; the mono files are imported
+            # directly, so there is no interleaved temp WAV to deinterleave
+            job["channels"] = split_to_mono_wavs(str(p), str(job["dest"].parent / (p.stem + ".tmp")),
+                                                 plan.channels, samplerate=plan.samplerate, bits=plan.bits)
+            job["tmp"] = list(job["channels"])
     except Exception as e:
-        result["status"] = "failed"
-        result["error"] = str(e)
-        result["duration"] = time.time() - start_time
-    
-    return result
+        _fail_job(job, e)
+
+
+def _media_prefix(job: Dict[str, Any]) -> Path:
+    """`<media_dir>/<relative folder>/<stem>`: where a linked track's media lives."""
+    p = job["path"]
+    folder = job["media_dir"] / p.relative_to(job["src_root"]).parent
+    folder.mkdir(parents=True, exist_ok=True)
+    return folder / p.stem
+
+
+def _decode_to_media(job: Dict[str, Any]) -> None:
+    """Produce the mono files a linked AAF points at.
+
+    For WAV media, a mono PCM WAV that needs no conversion is linked where
+    it is; other PCM is split into the media folder without ffmpeg, and
+    everything else is transcoded there by ffmpeg. For MXF media every
+    input goes through ffmpeg into per-channel OP-Atom files (48 kHz,
+    24-bit when the plan asks for 32). Nothing is added to job["tmp"].
+    """
+    p, plan = job["path"], job["plan"]
+    if job["media_format"] == "mxf":
+        bits = plan.bits if plan.bits in MXF_BITS else 24
+        job["channels"] = split_to_opatom_mxfs(str(p), str(_media_prefix(job)), plan.channels, bits=bits,
+                                               fps=job["fps"])
+        job["result"]["conversion"] = "transcode"
+    elif plan.action == "transcode":
+        job["channels"] = split_to_mono_wavs(str(p), str(_media_prefix(job)), plan.channels,
+                                             samplerate=plan.samplerate, bits=plan.bits)
+    elif plan.action == "repack" or plan.fmt.channels > 1:
+        job["channels"] = write_channel_wavs(PCMFileReader(p, plan.fmt), str(_media_prefix(job)))
+
+
+def _cache_lookup(job: Dict[str, Any]) -> bool:
+    """Use the PCM cache's decode of this job's input if there is one.
+
+    Cached WAVs belong to the cache, so they are never added to job["tmp"].
+    """
+    plan = job["plan"]
+    job["sha256"] = file_sha256(job["path"])
+    job["pcm_key"] = job["pcm_cache"].key(job["path"], plan.samplerate, plan.bits, plan.channels,
+                                          digest=job["sha256"])
+    hit = job["pcm_cache"].lookup(job["pcm_key"], plan.channels)
+    job["result"]["pcm_cache"] = "hit" if hit else "miss"
+    if hit:
+        job["channels"] = hit
+    return bool(hit)
+
+
+def _cache_store(job: Dict[str, Any], staging: str) -> None:
+    job["channels"] = job["pcm_cache"].commit(job.pop("pcm_key"), staging, job["plan"].channels)
+
+
+def _embed_step(job: Dict[str, Any]) -> None:
+    """Write the AAF (or dry-run manifest) and remove the temporary WAVs."""
+    if job["done"]:
+        return
+    try:
+        pcm_duration = job["duration_policy"] == "pcm"
+        created = create_music_aaf(
+            job["wav"], job["md"], str(job["dest"]),
+            embed=job["embed"], tag_map=job["tag_map"], fps=job["fps"],
+            channel_wavs=job["channels"], pcm=job["pcm"], link=job["media_dir"] is not None,
+            pcm_duration=pcm_duration,
+        )
+        duration = job["md"].duration
+        if pcm_duration:
+            created, duration = created
+        job["result"]["output"] = created
+        job["result"]["metadata"]["duration"] = duration
+        _remove_tmp(job)
+        job["done"] = True
+        _sign_input(job)
+    except Exception as e:
+        _fail_job(job, e)
+
+
+def _sign_input(job: Dict[str, Any]) -> None:
+    """Attach the input's (size, mtime_ns, sha256) for the build cache.
+
+    Runs where the file was converted (a worker process or pipeline
+    thread), so the dispatcher only has to write the row; the PCM cache's
+    hash is reused when it computed one. An input that changed since it
+    was probed gets no signature, so it isn't recorded as up to date.
+    """
+    if not job["hash_input"]:
+        return
+    p = job["path"]
+    try:
+        st = p.stat()
+        if (st.st_size, st.st_mtime_ns) != job.get("input_stat"):
+            return
+        digest = job.get("sha256") or file_sha256(p)
+    except OSError:
+        return
+    job["result"]["input_signature"] = (st.st_size, st.st_mtime_ns, digest)
+
+
+def _finish_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    job["result"]["duration"] = time.time() - job["start"]
+    return job["result"]
+
+
+def _cache_key(p: Path, src_root: Path) -> str:
+    return p.relative_to(src_root).as_posix()
+
+
+def _open_metadata_cache(path: str | Path | None, duration_policy: str) -> MetadataCache | None:
+    """The metadata cache at `path` (None for none), split by the durations it holds."""
+    if not path:
+        return None
+    return MetadataCache(path, variant="duration=scan" if duration_policy == "scan" else "")
+
+
+def _cache_options(
+    embed: bool,
+    tag_map: dict | None,
+    fps: float,
+    pack: str | None,
+    pack_size: int | None,
+    sample_rate: int | None,
+    bit_depth: int | None,
+    media_dir: Path | None,
+    media_format: str,
+    duration_policy: str,
+) -> str:
+    """Build-cache fingerprint of the options that shape an output.
+
+    Watch mode records into the same cache file, so both build it here;
+    the same options then give the same fingerprint and neither run
+    invalidates the other's entries.
+    """
+    return options_fingerprint(
+        {"embed": embed, "tag_map": tag_map, "fps": fps, "pack": pack, "pack_size": pack_size,
+         "sample_rate": sample_rate, "bit_depth": bit_depth,
+         "link_media": str(media_dir) if media_dir else None, "media_format": media_format,
+         "duration_policy": duration_policy}
+    )
+
+
+def _process_single_file(
+    p: Path,
+    src_root: Path,
+    out_dir: Path,
+    embed: bool,
+    tag_map: dict | None,
+    skip_existing: bool,
+    fps: float = 24.0,
+    pipe_decode: bool = False,
+    target: ConversionTarget | None = None,
+    pcm_cache: PCMCache | None = None,
+    media_dir: Path | None = None,
+    media_format: str = "wav",
+    metadata_cache: MetadataCache | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str = "header",
+    hash_input: bool = False,
+) -> Dict[str, Any]:
+    """Process a single audio file and return result dict"""
+    job = _new_job(p, src_root, out_dir, embed, tag_map, skip_existing, fps, pipe_decode=pipe_decode, target=target,
+                   pcm_cache=pcm_cache, media_dir=media_dir, media_format=media_format,
+                   metadata_cache=metadata_cache, ranged_tags=ranged_tags,
+                   duration_policy=duration_policy, hash_input=hash_input)
+    _probe_step(job)
+    _decode_step(job)
+    _embed_step(job)
+    return _finish_job(job)
+
+
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """Parse a CLI shard spec "i/N" (1-based) into (i, N)."""
+    try:
+        i, n = (int(x) for x in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"invalid shard {spec!r}: expected i/N, e.g. 2/4") from None
+    if n < 1 or not 1 <= i <= n:
+        raise ValueError(f"invalid shard {spec!r}: need 1 <= i <= N")
+    return i, n
+
+
+def _shard_of(key: str, count: int) -> int:
+    """Stable 1-based shard number for a relative path (same on every machine)."""
+    digest = hashlib.sha1(key.encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def _batched(units: Iterable[List[Tuple[int, Path]]], size: int) -> Iterable[List[Tuple[int, Path]]]:
+    """Merge consecutive single-file units into units of `size` files."""
+    batch: List[Tuple[int, Path]] = []
+    for unit in units:
+        batch.extend(unit)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _folder_groups(items: Iterable[Tuple[int, Path]]) -> Iterable[List[Tuple[int, Path]]]:
+    """Group consecutive discovered files that share a parent folder.
+
+    Discovery yields each directory's files together, so this streams.
+    """
+    group: List[Tuple[int, Path]] = []
+    for idx, p in items:
+        if group and group[-1][1].parent != p.parent:
+            yield group
+            group = []
+        group.append((idx, p))
+    if group:
+        yield group
+
+
+def _pack_filename(name: str) -> str:
+    cleaned = "".join("_" if c in '<>:"/\\|?*' or ord(c) < 32 else c for c in str(name)).strip(" .")
+    return cleaned or "Untitled"
+
+
+def _process_group(
+    paths: List[Path],
+    src_root: Path,
+    out_dir: Path,
+    embed: bool,
+    tag_map: dict | None,
+    skip_existing: bool,
+    fps: float = 24.0,
+    pack: str = "folder",
+    pack_size: int | None = None,
+    pipe_decode: bool = False,
+    target: ConversionTarget | None = None,
+    ffmpeg_batch: int = 1,
+    pcm_cache: PCMCache | None = None,
+    media_dir: Path | None = None,
+    media_format: str = "wav",
+    metadata_cache: MetadataCache | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str = "header",
+    hash_input: bool = False,
+) -> List[Dict[str, Any]]:
+    """Convert one folder's files into packed multi-track AAF(s).
+
+    `pack="folder"` writes one AAF per folder; `pack="album"` splits the
+    folder by album (Source/Album tag). `pack_size` further splits each
+    pack into AAFs of at most that many tracks (suffixed _01, _02, ...).
+    Returns one result per input file, in input order.
+    """
+    jobs = [_new_job(p, src_root, out_dir, embed, tag_map, False, fps, pipe_decode=pipe_decode, target=target,
+                     pcm_cache=pcm_cache, media_dir=media_dir, media_format=media_format,
+                     metadata_cache=metadata_cache, ranged_tags=ranged_tags,
+                     duration_policy=duration_policy, hash_input=hash_input)
+            for p in paths]
+    _probe_jobs(jobs)
+
+    rel_parent = paths[0].parent.relative_to(src_root)
+    folder_name = rel_parent.name or src_root.name
+    packs: Dict[str, List[Dict[str, Any]]] = {}
+    for job in jobs:
+        if job["done"]:
+            continue
+        name = folder_name
+        if pack == "album":
+            name = job["md"].source or job["md"].album or folder_name
+        packs.setdefault(name, []).append(job)
+
+    for name, members in packs.items():
+        size = pack_size or len(members)
+        chunks = [members[i:i + size] for i in range(0, len(members), size)]
+        for n, chunk in enumerate(chunks, start=1):
+            stem = _pack_filename(name if len(chunks) == 1 else f"{name}_{n:02d}")
+            dest = out_dir / rel_parent / (stem + ".aaf")
+            if skip_existing and dest.exists():
+                for job in chunk:
+                    job["result"]["status"] = "skipped"
+                    job["result"]["output"] = str(dest)
+                    job["done"] = True
+                continue
+            _decode_jobs(chunk, ffmpeg_batch)
+            ready = [job for job in chunk if not job["done"]]
+            try:
+                if ready:
+                    pcm_duration = duration_policy == "pcm"
+                    created = create_album_aaf(
+                        [(job["wav"], job["md"], job["channels"], job["pcm"]) for job in ready], str(dest),
+                        embed=embed, tag_map=tag_map, fps=fps, link=media_dir is not None,
+                        pcm_duration=pcm_duration,
+                    )
+                    durations = [job["md"].duration for job in ready]
+                    if pcm_duration:
+                        created, durations = created
+                    for job, duration in zip(ready, durations):
+                        job["result"]["output"] = created
+                        job["result"]["metadata"]["duration"] = duration
+                        job["done"] = True
+                        _sign_input(job)
+            except Exception as e:
+                for job in ready:
+                    _fail_job(job, e)
+            finally:
+                for job in ready:
+                    _remove_tmp(job)
+
+    return [_finish_job(job) for job in jobs]
+
+
+# Files at most this long (probed duration, seconds) share ffmpeg runs
+# when batching; longer ones are decoded on their own
+SHORT_FILE_SECONDS = 30.0
+
+
+def _decode_jobs(jobs: List[Dict[str, Any]], ffmpeg_batch: int = 1) -> None:
+    """Run the decode step for several jobs, sharing ffmpeg runs between short transcodes.
+
+    Short files that need a transcode to temp WAVs are decoded up to
+    `ffmpeg_batch` at a time by a single ffmpeg process; everything else
+    goes through `_decode_step` as usual.
+    """
+    batchable: Dict[Tuple[int, int, int], List[Dict[str, Any]]] = {}
+    for job in jobs:
+        if job["done"]:
+            continue
+        if ffmpeg_batch > 1 and not job["pipe_decode"] and job["media_format"] == "wav":
+            try:
+                job["plan"] = plan_conversion(job["path"], job["target"])
+            except Exception as e:
+                _fail_job(job, e)
+                continue
+            duration = job["md"].duration if job["md"] else None
+            if job["plan"].action == "transcode" and duration and duration <= SHORT_FILE_SECONDS:
+                job["wav"] = str(job["path"])
+                job["result"]["conversion"] = job["plan"].action
+                if job["pcm_cache"] is not None:
+                    try:
+                        if _cache_lookup(job):
+                            continue
+                    except Exception as e:
+                        _fail_job(job, e)
+                        continue
+                    job["staging"] = job["pcm_cache"].stage()
+                key = (job["plan"].channels, job["plan"].samplerate, job["plan"].bits)
+                batchable.setdefault(key, []).append(job)
+                continue
+        _decode_step(job)
+
+    for (channels, samplerate, bits), group in batchable.items():
+        for i in range(0, len(group), ffmpeg_batch):
+            chunk = group[i:i + ffmpeg_batch]
+            items = [(str(job["path"]), _batch_prefix(job)) for job in chunk]
+            try:
+                outputs = split_many_to_mono_wavs(items, channels, samplerate=samplerate, bits=bits)
+            except Exception as e:
+                outputs = [e] * len(chunk)
+            for job, out in zip(chunk, outputs):
+                staging = job.pop("staging", None)
+                if isinstance(out, Exception):
+                    if staging:
+                        job["pcm_cache"].discard(staging)
+                    _fail_job(job, out)
+                elif staging:
+                    _cache_store(job, staging)
+                else:
+                    job["channels"] = out
+                    if job["media_dir"] is None:
+                        job["tmp"] = list(out)
+
+
+def _batch_prefix(job: Dict[str, Any]) -> str:
+    if "staging" in job:
+        return os.path.join(job["staging"], "pcm")
+    if job["media_dir"] is not None:
+        return str(_media_prefix(job))
+    return str(job["dest"].parent / (job["path"].stem + ".tmp"))
+
+
+def _process_batch(
+    paths: List[Path],
+    src_root: Path,
+    out_dir: Path,
+    embed: bool,
+    tag_map: dict | None,
+    skip_existing: bool,
+    fps: float = 24.0,
+    pipe_decode: bool = False,
+    target: ConversionTarget | None = None,
+    ffmpeg_batch: int = 1,
+    pcm_cache: PCMCache | None = None,
+    media_dir: Path | None = None,
+    media_format: str = "wav",
+    metadata_cache: MetadataCache | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str = "header",
+    hash_input: bool = False,
+) -> List[Dict[str, Any]]:
+    """Convert several independent files, sharing ffmpeg runs between the short ones."""
+    jobs = [_new_job(p, src_root, out_dir, embed, tag_map, skip_existing, fps, pipe_decode=pipe_decode, target=target,
+                     pcm_cache=pcm_cache, media_dir=media_dir, media_format=media_format,
+                     metadata_cache=metadata_cache, ranged_tags=ranged_tags,
+                     duration_policy=duration_policy, hash_input=hash_input)
+            for p in paths]
+    _probe_jobs(jobs)
+    _decode_jobs(jobs, ffmpeg_batch)
+    for job in jobs:
+        _embed_step(job)
+    return [_finish_job(job) for job in jobs]
+
+
+def _process_unit(
+    paths: List[Path],
+    src_root: Path,
+    out_dir: Path,
+    embed: bool,
+    tag_map: dict | None,
+    skip_existing: bool,
+    fps: float = 24.0,
+    pack: str | None = None,
+    pack_size: int | None = None,
+    pipe_decode: bool = False,
+    target: ConversionTarget | None = None,
+    ffmpeg_batch: int = 1,
+    pcm_cache: PCMCache | None = None,
+    media_dir: Path | None = None,
+    media_format: str = "wav",
+    metadata_cache: MetadataCache | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str = "header",
+    hash_input: bool = False,
+) -> List[Dict[str, Any]]:
+    """Worker entry point: one file, one folder when packing, or a batch of files."""
+    if pack:
+        return _process_group(paths, src_root, out_dir, embed, tag_map, skip_existing, fps, pack, pack_size,
+                              pipe_decode, target, ffmpeg_batch, pcm_cache, media_dir, media_format,
+                              metadata_cache, ranged_tags, duration_policy, hash_input)
+    if ffmpeg_batch > 1 and len(paths) > 1:
+        return _process_batch(paths, src_root, out_dir, embed, tag_map, skip_existing, fps, pipe_decode, target,
+                              ffmpeg_batch, pcm_cache, media_dir, media_format, metadata_cache, ranged_tags,
+                              duration_policy, hash_input)
+    return [_process_single_file(p, src_root, out_dir, embed, tag_map, skip_existing, fps, pipe_decode, target,
+                                 pcm_cache, media_dir, media_format, metadata_cache, ranged_tags,
+                                 duration_policy, hash_input)
+            for p in paths]
 
 
 def process_directory(
@@ -123,69 +765,530 @@ def process_directory(
     export_csv: str | None = None,
     export_metadata_csv: str | None = None,
     fps: float = 24.0,
+    jobs: int | None = None,
+    pipeline: bool = False,
+    stage_workers: Dict[str, int] | None = None,
+    queue_depth: int = 4,
+    incremental: bool = False,
+    stream: bool = False,
+    journal: str | None = None,
+    resume: str | None = None,
+    pack: str | None = None,
+    pack_size: int | None = None,
+    schedule: str = "discovery",
+    shard: Tuple[int, int] | None = None,
+    max_memory: int | None = None,
+    pipe_decode: bool = False,
+    sample_rate: int | None = 48000,
+    bit_depth: int | None = None,
+    ffmpeg_batch: int = 1,
+    pcm_cache: str | Path | None = None,
+    pcm_cache_size: int | None = DEFAULT_MAX_BYTES,
+    link_media: str | Path | None = None,
+    mxf_media: str | Path | None = None,
+    metadata_cache: str | Path | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str | None = None,
 ) -> Dict[str, Any]:
     """Process directory with parallel support and detailed reporting
-    
+
+    Files are converted by a pool of `jobs` worker processes (defaults to
+    `default_jobs()`); `jobs=1` runs everything in the calling process.
+    Results are always reported in discovery order regardless of which
+    worker finishes first. A worker process that dies takes the pool down
+    with it; the pool is replaced and the units it held are rerun one at a
+    time, so only the one that kills its worker again is failed.
+
+    With `pipeline=True` the run uses the staged engine in
+    `mxto_aaf.pipeline` instead: probe -> decode -> embed -> report, linked
+    by queues holding at most `queue_depth` files. `stage_workers` overrides
+    the per-stage thread counts (see `default_stage_workers()`); the
+    per-stage stats are returned under the "pipeline" key.
+
+    With `incremental=True` a build cache (see `mxto_aaf.cache`) in the
+    output root skips inputs whose content, options and output are all
+    unchanged since the last successful conversion, and rebuilds the rest.
+
+    With `stream=True` files are handed to the workers while the directory
+    walk is still running instead of after it; progress shows an open-ended
+    count until discovery completes.
+
+    `journal` names an append-only JSONL journal (see `mxto_aaf.journal`)
+    that records each file as it starts and finishes. `resume` reads such a
+    journal from an interrupted run: finished files are skipped (their
+    results are carried into this summary); failed and in-flight ones are
+    redone.
+    Unless a different `journal` is given, the resumed run keeps appending
+    to the same file.
+
+    `pack="folder"` or `pack="album"` writes one multi-track AAF per folder
+    (or per album within a folder) instead of one AAF per file, optionally
+    capped at `pack_size` tracks per AAF (`pack_size` alone implies
+    "folder"). Results are still reported per input file.
+
+    `schedule` picks the dispatch order (see `mxto_aaf.schedule`):
+    "discovery", or largest-first by "size" or probed "duration". Results
+    keep discovery order either way; the summary's "schedule" entry reports
+    the actual makespan in wall-clock seconds and, for sorted policies, the
+    makespan the pre-run estimates predict for this order, for discovery
+    order and at best, all in estimated audio seconds (so they compare with
+    each other, as the "*_vs_ideal" ratios do, but not with the wall-clock
+    time).
+
+    `shard=(i, N)` keeps only the files whose relative path hashes to shard
+    i of N (whole folders in pack mode), so N machines sharing a library
+    can each convert a disjoint slice into the same output tree. Each shard
+    keeps its own build cache file; combine their logs/CSVs with
+    `mxto_aaf.report.merge_reports`.
+
+    `max_memory` (bytes) caps the estimated peak memory of the conversions
+    running at once (see `mxto_aaf.schedule.MemoryBudget`): the pool only
+    submits, and the pipeline only starts decoding, while the in-flight
+    estimates fit. A file bigger than the budget runs on its own.
+
+    `pipe_decode=True` streams ffmpeg's raw PCM output straight into the
+    AAF essence instead of writing per-channel temp WAVs next to the
+    destination, so only the AAF crosses a network share. (With
+    `pipeline=True` the decoding then happens inside the embed stage.)
+
+    Each input is planned once (`mxto_aaf.convert.plan_conversion`): PCM
+    WAV already at `sample_rate`/`bit_depth` is imported directly, PCM
+    AIFF and extensible WAV are repacked without ffmpeg, and everything
+    else is transcoded to that format. None keeps the source's value for
+    PCM inputs (transcodes then use 48 kHz / 16-bit). Each result records
+    the path taken under "conversion"; the summary counts them.
+
+    `ffmpeg_batch=N` (N > 1) hands files to the workers N at a time and
+    decodes the short ones (up to `SHORT_FILE_SECONDS`) that need a
+    transcode with one ffmpeg process per batch instead of one per file,
+    which dominates runtime on libraries of short clips. Not available
+    with `pipeline=True`.
+
+    `pcm_cache` names a directory for decoded audio (see
+    `mxto_aaf.pcmcache`), keyed by input content and decode format and
+    capped at `pcm_cache_size` bytes (least recently used entries go
+    first). Transcodes found there skip ffmpeg entirely, so re-running a
+    library with a different fps or tag map only rewrites AAFs. The
+    summary's "pcm_cache" entry counts hits and misses. Not combinable with
+    `pipe_decode`, which never writes the decoded audio anywhere.
+
+    `link_media` writes linked AAFs instead of embedded ones: each track's
+    mono WAVs are kept under that folder (mirroring the source tree) and
+    the AAFs only reference them, so they are tiny and quick to write. A
+    mono PCM WAV that needs no conversion is referenced in place. Not
+    combinable with `pipe_decode` or `pcm_cache`.
+
+    `mxf_media` is the same with Avid media instead of WAVs: every track is
+    transcoded by ffmpeg into per-channel OP-Atom MXF files under that
+    folder (48 kHz, 16 or 24-bit), and the AAFs link their file packages.
+    The MXFs can be copied straight into an Avid MediaFiles/MXF folder, so
+    Avid does not re-wrap the audio on import. Needs ffmpeg; not
+    combinable with `link_media`, `pipe_decode` or `pcm_cache`.
+
+    `metadata_cache` names a SQLite file of extracted tags (see
+    `mxto_aaf.metacache`) keyed by path, size, mtime and extractor
+    version, so unchanged files are not opened again just to read their
+    tags or duration on a re-run. The summary's "metadata_cache" entry
+    counts hits and misses.
+
+    `ranged_tags` reads tags with small ranged reads of just the tag
+    blocks and stream headers (see `mxto_aaf.tagread`) instead of through
+    a regular buffered file, which matters on network storage; the
+    summary's "tag_reads" entry totals the bytes read per file.
+
+    `duration_policy` picks where each track's Duration comes from (see
+    `mxto_aaf.metadata.DURATION_POLICIES`): "header" (fast, an estimate
+    for MP3s without a VBR header), "scan" (counts those MP3s' frames) or
+    "pcm" (the decoded audio's frame count, known anyway once the track
+    is converted). Defaults to "pcm" when embedding and "header" for
+    manifests, which have no decoded audio.
+
     Returns:
         Dict with keys: results, success_count, failed_count, skipped_count, 
-        total_duration, failed_files
+        total_duration, failed_files, jobs (and pipeline in pipeline mode)
     """
+    if pack_size and not pack:
+        pack = "folder"
+    if pack not in (None, "folder", "album"):
+        raise ValueError(f"pack must be 'folder' or 'album', not {pack!r}")
+    if pack and pipeline:
+        raise ValueError("pack mode is not supported by the pipeline engine")
+    ffmpeg_batch = max(1, int(ffmpeg_batch or 1))
+    if ffmpeg_batch > 1 and pipeline:
+        raise ValueError("ffmpeg batching is not supported by the pipeline engine")
+    if (link_media or mxf_media) and (pipe_decode or pcm_cache):
+        raise ValueError("linked AAFs keep their own media; don't combine link_media/mxf_media with pipe_decode or pcm_cache")
+    if pipe_decode and pcm_cache:
+        raise ValueError("pipe_decode streams decoded PCM without writing it; it can't fill a pcm_cache")
+    if link_media and mxf_media:
+        raise ValueError("choose one of link_media (WAV) or mxf_media (OP-Atom MXF)")
+    if mxf_media and (sample_rate not in (None, MXF_SAMPLERATE) or bit_depth not in (None,) + MXF_BITS):
+        raise ValueError(f"OP-Atom MXF media is {MXF_SAMPLERATE} Hz, 16 or 24-bit")
+    if shard is not None:
+        shard = (int(shard[0]), int(shard[1]))
+        if shard[1] < 1 or not 1 <= shard[0] <= shard[1]:
+            raise ValueError(f"invalid shard {shard}: need 1 <= i <= N")
+    if schedule not in SCHEDULE_POLICIES:
+        raise ValueError(f"schedule must be one of {', '.join(SCHEDULE_POLICIES)}, not {schedule!r}")
+    if schedule != "discovery" and stream:
+        raise ValueError("largest-first scheduling needs the full file list and cannot be combined with stream")
+
     src = Path(src)
     out_dir = Path(out_dir)
     out_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Collect all files first
-    all_files = list(_iter_audio_files(src, recursive=recursive))
-    if max_files is not None:
-        all_files = all_files[:max_files]
-    
-    total_files = len(all_files)
-    if total_files == 0:
-        return {
-            "results": [],
-            "success_count": 0,
-            "failed_count": 0,
-            "skipped_count": 0,
-            "total_duration": 0.0,
-            "failed_files": [],
-        }
-    
-    results = []
+
+    if jobs is None:
+        jobs = default_jobs()
+    jobs = max(1, int(jobs))
+
+    discovered: List[Path] = []
+    discovery = {"done": False}
+
+    def _discover() -> Iterable[Tuple[int, Path]]:
+        files = _iter_audio_files(src, recursive=recursive)
+        if shard is not None:
+            i, n = shard
+            # Pack mode converts whole folders, so shard by folder there
+            files = (
+                p for p in files
+                if _shard_of(_cache_key(p.parent if pack else p, src), n) == i
+            )
+        if max_files is not None:
+            files = islice(files, max_files)
+        for p in files:
+            discovered.append(p)
+            yield len(discovered) - 1, p
+        discovery["done"] = True
+
+    if stream:
+        source: Iterable[Tuple[int, Path]] = _discover()
+    else:
+        # Collect all files first so progress can show a total and an ETA
+        source = list(_discover())
+        if not source:
+            return {
+                "results": [],
+                "success_count": 0,
+                "failed_count": 0,
+                "skipped_count": 0,
+                "total_duration": 0.0,
+                "failed_files": [],
+                "jobs": jobs,
+            }
+
+    results_by_index: Dict[int, Dict[str, Any]] = {}
     success_count = 0
     failed_count = 0
     skipped_count = 0
-    failed_files = []
     
     start_time = time.time()
     
     # Progress display helper
-    def _print_progress(completed, total, status_msg=""):
+    def _print_progress(completed, status_msg=""):
+        elapsed = time.time() - start_time
+        if not discovery["done"]:
+            # Still walking the tree: open-ended count, no percentage/ETA yet
+            sys.stdout.write(f"\r[{completed}/{len(discovered)}+ found, scanning…] | {status_msg}")
+            sys.stdout.flush()
+            return
+        total = len(discovered)
         pct = (completed / total * 100) if total > 0 else 0
         bar_width = 40
         filled = int(bar_width * completed / total) if total > 0 else 0
         bar = "█" * filled + "░" * (bar_width - filled)
-        elapsed = time.time() - start_time
         rate = completed / elapsed if elapsed > 0 else 0
         eta = (total - completed) / rate if rate > 0 else 0
         
         sys.stdout.write(f"\r[{bar}] {completed}/{total} ({pct:.1f}%) | "
                         f"ETA: {eta:.0f}s | {status_msg}")
         sys.stdout.flush()
-    
-    # Sequential processing only (parallel removed due to I/O-bound workload)
-    for idx, p in enumerate(all_files, 1):
-        result = _process_single_file(p, src, out_dir, embed, tag_map, skip_existing, fps)
-        results.append(result)
-        
+
+    record_lock = threading.Lock()
+
+    def _record(idx: int, result: Dict[str, Any], from_journal: bool = False) -> None:
+        # Cache hits may be recorded from the pipeline's feeder thread
+        with record_lock:
+            _record_locked(idx, result, from_journal)
+
+    def _record_locked(idx: int, result: Dict[str, Any], from_journal: bool) -> None:
+        nonlocal success_count, failed_count, skipped_count
+        signature = result.pop("input_signature", None)
+        results_by_index[idx] = result
+        if journal_writer is not None and not from_journal:
+            journal_writer.done(_cache_key(discovered[idx], src), result)
         if result["status"] == "success":
             success_count += 1
         elif result["status"] == "skipped":
             skipped_count += 1
         else:
             failed_count += 1
-            failed_files.append({"file": str(p), "error": result["error"]})
-        
-        _print_progress(idx, total_files, f"Success: {success_count}, Failed: {failed_count}, Skipped: {skipped_count}")
+        # The worker hashed the input (see _sign_input); files resumed from a
+        # journal were recorded by the run that converted them
+        if build_cache is not None and result["status"] == "success" and result["output"] and signature:
+            p = discovered[idx]
+            try:
+                build_cache.record(p, _cache_key(p, src), cache_options, result["output"], signature)
+            except Exception as e:
+                print(f"\nWarning: unable to update build cache for {p}: {e}")
+        _print_progress(len(results_by_index), f"Success: {success_count}, Failed: {failed_count}, Skipped: {skipped_count}")
+
+    journal_writer = None
+    resumed: Dict[str, Dict[str, Any]] = {}
+    if bit_depth not in (None, 16, 24, 32):
+        raise ValueError(f"bit_depth must be 16, 24 or 32, got {bit_depth}")
+    target = ConversionTarget(sample_rate, bit_depth)
+    decoded_cache = PCMCache(pcm_cache, pcm_cache_size) if pcm_cache else None
+    if duration_policy is None:
+        duration_policy = "pcm" if embed else "header"
+    if duration_policy not in DURATION_POLICIES:
+        raise ValueError(f"duration_policy must be one of {', '.join(DURATION_POLICIES)}, not {duration_policy!r}")
+    md_cache = _open_metadata_cache(metadata_cache, duration_policy)
+    media_dir = Path(link_media or mxf_media).resolve() if (link_media or mxf_media) else None
+    media_format = "mxf" if mxf_media else "wav"
+    journal_options = {"embed": embed, "tag_map": tag_map, "fps": fps, "recursive": recursive,
+                       "max_files": max_files, "pack": pack, "pack_size": pack_size,
+                       "shard": list(shard) if shard else None,
+                       "sample_rate": sample_rate, "bit_depth": bit_depth,
+                       "link_media": str(media_dir) if media_dir else None,
+                       "media_format": media_format, "duration_policy": duration_policy}
+    if resume:
+        state = load_journal(resume)
+        resumed = state["done"]
+        header = state["header"] or {}
+        if header.get("options") not in (None, journal_options):
+            print("Warning: resuming with different options than the journaled run")
+        print(f"Resuming from {resume}: {len(resumed)} finished, "
+              f"{len(state['in_flight'])} failed or in-flight re-queued")
+        journal = journal or resume
+    if journal:
+        appending = bool(resume) and os.path.abspath(journal) == os.path.abspath(resume)
+        journal_writer = BatchJournal(journal, append=appending)
+        if appending:
+            journal_writer.resume()
+        else:
+            journal_writer.start(str(src), str(out_dir), journal_options)
+            for key, result in resumed.items():
+                journal_writer.done(key, result)
+
+    build_cache = None
+    cache_options = None
+    if incremental:
+        cache_name = CACHE_FILENAME
+        if shard is not None:
+            # Shards share the output tree; give each its own SQLite file
+            cache_name = f"{CACHE_FILENAME[:-len('.sqlite')]}.shard-{shard[0]}of{shard[1]}.sqlite"
+        build_cache = BuildCache(out_dir / cache_name)
+        cache_options = _cache_options(embed, tag_map, fps, pack, pack_size, sample_rate, bit_depth,
+                                       media_dir, media_format, duration_policy)
+
+    # Work is dispatched in units: one file normally, one folder in pack mode.
+    # A unit is only skipped when every file in it is already finished.
+    units: Iterable[List[Tuple[int, Path]]] = (
+        _folder_groups(source) if pack else ([item] for item in source)
+    )
+
+    def _unfinished(units: Iterable[List[Tuple[int, Path]]]) -> Iterable[List[Tuple[int, Path]]]:
+        for unit in units:
+            keys = [_cache_key(p, src) for _, p in unit]
+            if resumed and all(k in resumed for k in keys):
+                for (idx, _), k in zip(unit, keys):
+                    _record(idx, resumed[k], from_journal=True)
+                continue
+            if build_cache is not None:
+                hits = [build_cache.lookup(p, k, cache_options) for (_, p), k in zip(unit, keys)]
+                if all(hits):
+                    for (idx, p), hit in zip(unit, hits):
+                        _record(idx, _new_result(p, "skipped", output=hit))
+                    continue
+            yield unit
+
+    units = _unfinished(units)
+    if ffmpeg_batch > 1 and not pack:
+        units = _batched(units, ffmpeg_batch)
+
+    discovery_costs: List[float] = []
+    scheduled: List[Tuple[List[Tuple[int, Path]], float]] = []
+    file_costs: Dict[Path, float] = {}
+    if schedule != "discovery":
+        # Longest-job-first: needs every unit up front to sort them
+        units = list(units)
+        file_costs = estimate_costs([p for unit in units for _, p in unit], schedule,
+                                    metadata_cache=md_cache)
+        unit_costs = [(unit, sum(file_costs[p] for _, p in unit)) for unit in units]
+        discovery_costs = [cost for _, cost in unit_costs]
+        scheduled = sorted(unit_costs, key=lambda uc: uc[1], reverse=True)
+        units = [unit for unit, _ in scheduled]
+
+    if journal_writer is not None:
+        def _mark_started(units: Iterable[List[Tuple[int, Path]]]) -> Iterable[List[Tuple[int, Path]]]:
+            # Pulled by the engine right before dispatch, so "started" means in flight
+            for unit in units:
+                for _, p in unit:
+                    journal_writer.started(_cache_key(p, src))
+                yield unit
+
+        units = _mark_started(units)
+
+    dispatch_start = time.time()
+
+    budget = MemoryBudget(max_memory) if max_memory else None
+
+    def _unit_memory(unit: List[Tuple[int, Path]]) -> int:
+        # Tracks of a packed folder are written one after another, so the
+        # largest track sets the peak; duration-scheduled runs reuse probes,
+        # the rest estimate from file size rather than reading tags here
+        def _peak(p: Path) -> int:
+            duration = file_costs.get(p) if schedule == "duration" else None
+            return estimate_peak_memory(p, duration)
+        return max(_peak(p) for _, p in unit)
+
+    def _admit_decode(job: Dict[str, Any]) -> None:
+        # Pipeline admission happens after probing, using the probed duration
+        if not job["done"]:
+            md = job["md"]
+            job["memory"] = estimate_peak_memory(job["path"], md.duration if md else None)
+            budget.acquire(job["memory"])
+        _decode_step(job)
+
+    def _embed_and_release(job: Dict[str, Any]) -> None:
+        try:
+            _embed_step(job)
+        finally:
+            budget.release(job.pop("memory", 0))
+
+    pipeline_stats = None
+    stage_counts = default_stage_workers(jobs)
+    stage_counts.update(stage_workers or {})
+    if pipeline:
+        pipeline_stats = run_pipeline(
+            (_new_job(p, src, out_dir, embed, tag_map, skip_existing, fps, index=idx, pipe_decode=pipe_decode,
+                      target=target, pcm_cache=decoded_cache, media_dir=media_dir,
+                      media_format=media_format, metadata_cache=md_cache, ranged_tags=ranged_tags,
+                      duration_policy=duration_policy, hash_input=build_cache is not None)
+             for unit in units for idx, p in unit),
+            [
+                Stage("probe", _probe_step, stage_counts["probe"]),
+                Stage("decode", _admit_decode if budget else _decode_step, stage_counts["decode"]),
+                Stage("embed", _embed_and_release if budget else _embed_step, stage_counts["embed"]),
+            ],
+            on_result=lambda job: _record(job["index"], _finish_job(job)),
+            queue_depth=queue_depth,
+        )
+    elif jobs == 1:
+        for unit in units:
+            unit_results = _process_unit([p for _, p in unit], src, out_dir, embed, tag_map,
+                                         skip_existing, fps, pack, pack_size, pipe_decode, target,
+                                         ffmpeg_batch, decoded_cache, media_dir, media_format, md_cache,
+                                         ranged_tags, duration_policy, build_cache is not None)
+            for (idx, _), result in zip(unit, unit_results):
+                _record(idx, result)
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        try:
+            # Keep a bounded window of submitted work so files start converting
+            # while discovery (and cache checks) are still producing items
+            # (only as many as can run at once under a memory budget, since
+            # queued work would otherwise hold budget without using it)
+            in_flight: Dict[Any, Tuple[List[Tuple[int, Path]], int, bool]] = {}
+            unit_iter = iter(units)
+            held = None  # (unit, memory, suspect) waiting for budget or a working pool
+            window = jobs if budget else jobs * 2
+            # A dying worker breaks the whole pool and fails every unit it held;
+            # those are rerun one at a time so only the one that kills its
+            # worker again is recorded as failed
+            suspects: List[List[Tuple[int, Path]]] = []
+            broken = False
+            while True:
+                retrying = bool(suspects) or any(s for _, _, s in in_flight.values())
+                while not broken and len(in_flight) < (1 if retrying else window):
+                    if held is None:
+                        if suspects:
+                            unit, suspect = suspects.pop(0), True
+                        else:
+                            unit, suspect = next(unit_iter, None), False
+                            if unit is None:
+                                break
+                        held = (unit, _unit_memory(unit) if budget else 0, suspect)
+                        if budget and not budget.try_acquire(held[1]):
+                            budget.waits += 1
+                            break
+                    elif budget and not budget.try_acquire(held[1]):
+                        break
+                    unit, memory, suspect = held
+                    try:
+                        fut = pool.submit(_process_unit, [p for _, p in unit], src, out_dir, embed,
+                                          tag_map, skip_existing, fps, pack, pack_size, pipe_decode, target,
+                                          ffmpeg_batch, decoded_cache, media_dir, media_format, md_cache,
+                                          ranged_tags, duration_policy, build_cache is not None)
+                    except BrokenProcessPool:
+                        # A worker died since the last wait; this unit waits
+                        # for the replacement pool
+                        if budget:
+                            budget.release(memory)
+                        broken = True
+                        break
+                    held = None
+                    in_flight[fut] = (unit, memory, suspect)
+                    retrying = retrying or suspect
+                if not in_flight:
+                    if not broken:
+                        break
+                    print("\nWarning: a worker process died; restarting the worker pool")
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=jobs)
+                    broken = False
+                    continue
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    unit, memory, suspect = in_flight.pop(fut)
+                    if budget:
+                        budget.release(memory)
+                    try:
+                        unit_results = fut.result()
+                    except BrokenProcessPool as e:
+                        # Worker process died (os._exit, the OOM killer, ...)
+                        broken = True
+                        if not suspect:
+                            suspects.append(unit)
+                            continue
+                        unit_results = [_new_result(p, "failed", error=f"worker process died: {e}") for _, p in unit]
+                    except Exception as e:
+                        unit_results = [_new_result(p, "failed", error=f"worker error: {e}") for _, p in unit]
+                    for (idx, _), result in zip(unit, unit_results):
+                        _record(idx, result)
+        finally:
+            pool.shutdown()
+
+    actual_makespan = time.time() - dispatch_start
+
+    if build_cache is not None:
+        build_cache.close()
+    if journal_writer is not None:
+        journal_writer.close()
+
+    schedule_info = {"policy": schedule, "actual_makespan_s": round(actual_makespan, 3)}
+    if scheduled:
+        # Replay the pre-run estimates (in estimated audio seconds) over the
+        # workers, in dispatch order and in discovery order, against the
+        # lower bound; nothing measured during the run feeds into these
+        costs = [cost for _, cost in scheduled]
+        workers = stage_counts["decode"] if pipeline else jobs
+        schedule_info["workers"] = workers
+        schedule_info["expected_makespan"] = round(simulate_makespan(costs, workers), 3)
+        schedule_info["discovery_makespan"] = round(simulate_makespan(discovery_costs, workers), 3)
+        ideal = max(sum(costs) / workers, max(costs, default=0.0))
+        schedule_info["ideal_makespan"] = round(ideal, 3)
+        # Unitless, so they compare; actual_makespan_s is wall-clock time and doesn't
+        if ideal > 0:
+            schedule_info["expected_vs_ideal"] = round(schedule_info["expected_makespan"] / ideal, 3)
+            schedule_info["discovery_vs_ideal"] = round(schedule_info["discovery_makespan"] / ideal, 3)
+
+    discovery["done"] = True
+    results = [results_by_index[i] for i in sorted(results_by_index)]
+
+    failed_files = [
+        {"file": r["input"], "error": r["error"]} for r in results if r["status"] == "failed"
+    ]
     
     print()  # newline after progress
     
@@ -198,61 +1301,48 @@ def process_directory(
         "skipped_count": skipped_count,
         "total_duration": total_duration,
         "failed_files": failed_files,
+        "conversions": count_conversions(results),
+        "jobs": jobs,
     }
+    if pipeline_stats is not None:
+        summary["pipeline"] = pipeline_stats
+    summary["schedule"] = schedule_info
+    if budget is not None:
+        summary["memory"] = budget.stats()
+    if decoded_cache is not None:
+        lookups = [r["pcm_cache"] for r in results if r.get("pcm_cache")]
+        summary["pcm_cache"] = {"hits": lookups.count("hit"), "misses": lookups.count("miss"),
+                                **decoded_cache.stats()}
+    if md_cache is not None:
+        lookups = [r["metadata_cache"] for r in results if r.get("metadata_cache")]
+        try:
+            entries = md_cache.stats()["entries"]
+        except Exception:
+            entries = None
+        summary["metadata_cache"] = {"hits": lookups.count("hit"), "misses": lookups.count("miss"),
+                                     "entries": entries}
+    if ranged_tags:
+        # Files served from the metadata cache read nothing and aren't counted
+        reads = [r["tag_bytes"] for r in results if r.get("tag_bytes")]
+        summary["tag_reads"] = {"files": len(reads), "bytes": sum(reads),
+                                "mean_bytes": sum(reads) // len(reads) if reads else 0,
+                                "max_bytes": max(reads, default=0)}
     
     # Write log file if requested
     if log_file:
-        with open(log_file, "w", encoding="utf-8") as f:
-            json.dump(summary, f, indent=2)
+        write_json_log(summary, log_file)
 
     # Write human-friendly CSV if requested
     if export_csv:
         try:
-            with open(export_csv, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow(["input", "output", "status", "error", "duration_s"])
-                for r in results:
-                    writer.writerow([
-                        r.get("input"),
-                        r.get("output"),
-                        r.get("status"),
-                        r.get("error"),
-                        f"{float(r.get('duration', 0.0)):.3f}",
-                    ])
+            write_results_csv(results, export_csv)
         except Exception as e:
             print(f"Warning: unable to write CSV report {export_csv}: {e}")
 
     # Write detailed metadata CSV if requested
     if export_metadata_csv:
         try:
-            with open(export_metadata_csv, "w", newline="", encoding="utf-8") as f:
-                writer = csv.writer(f)
-                writer.writerow([
-                    "input","output","status","error","duration_s",
-                    "Track Name","Track","Total Tracks","Genre","Artist","Album Artist","Talent","Composer","Source","Album","Catalog #","Description","Duration"
-                ])
-                for r in results:
-                    md = r.get("metadata") or {}
-                    writer.writerow([
-                        r.get("input"),
-                        r.get("output"),
-                        r.get("status"),
-                        r.get("error"),
-                        f"{float(r.get('duration', 0.0)):.3f}",
-                        md.get("track_name"),
-                        md.get("track"),
-                        md.get("total_tracks"),
-                        md.get("genre"),
-                        md.get("artist"),
-                        md.get("album_artist"),
-                        md.get("talent"),
-                        md.get("composer"),
-                        md.get("source"),
-                        md.get("album"),
-                        md.get("catalog_number"),
-                        md.get("description"),
-                        md.get("duration"),
-                    ])
+            write_metadata_csv(results, export_metadata_csv)
         except Exception as e:
             print(f"Warning: unable to write metadata CSV {export_metadata_csv}: {e}")
     
@@ -262,6 +1352,69 @@ def process_directory(
 # Note: The enhanced process_directory above is the canonical implementation.
 
 
+def print_schedule_stats(info: Dict[str, Any] | None) -> None:
+    """Print the wall-clock makespan and, on its own line, how the estimates rate the order.
+
+    The estimates are in estimated audio seconds, not wall-clock seconds,
+    so they are shown against the ideal rather than next to the actual time.
+    """
+    if not info or "expected_makespan" not in info:
+        return
+    print(f"Schedule:       {info['policy']} on {info['workers']} workers, {info['actual_makespan_s']:.1f}s wall clock")
+    line = (f"  estimated makespan (audio-s): {info['expected_makespan']:.0f} this order, "
+            f"{info['discovery_makespan']:.0f} discovery order, {info['ideal_makespan']:.0f} ideal")
+    if "expected_vs_ideal" in info:
+        line += f" ({info['expected_vs_ideal']:.2f}x vs {info['discovery_vs_ideal']:.2f}x ideal)"
+    print(line)
+
+
+def print_conversion_stats(counts: Dict[str, int] | None) -> None:
+    """Print how many files were imported directly, repacked or transcoded."""
+    if counts:
+        print("Conversion:     " + ", ".join(f"{counts.get(a, 0)} {a}" for a in CONVERSION_ACTIONS))
+
+
+def print_memory_stats(info: Dict[str, Any] | None) -> None:
+    """Print memory budget usage when --max-memory was given."""
+    if not info:
+        return
+    mb = 1024 * 1024
+    print(f"Memory:         peak {info['peak_admitted_bytes'] / mb:.0f} MB admitted of "
+          f"{info['budget_bytes'] / mb:.0f} MB budget, {info['waits']} waits")
+
+
+def print_pcm_cache_stats(info: Dict[str, Any] | None) -> None:
+    """Print decoded-PCM cache hits/misses when --pcm-cache was given."""
+    if not info:
+        return
+    print(f"PCM cache:      {info['hits']} hits, {info['misses']} misses, "
+          f"{info['entries']} entries ({info['bytes'] / (1024 * 1024):.0f} MB)")
+
+
+def print_metadata_cache_stats(info: Dict[str, Any] | None) -> None:
+    """Print metadata cache hits/misses (off with --no-metadata-cache)."""
+    if not info:
+        return
+    entries = f", {info['entries']} entries" if info.get("entries") is not None else ""
+    print(f"Metadata cache: {info['hits']} hits, {info['misses']} misses{entries}")
+
+
+def print_tag_read_stats(info: Dict[str, Any] | None) -> None:
+    """Print bytes read for tags when --ranged-tags was given."""
+    if not info:
+        return
+    print(f"Tag reads:      {info['files']} files, {info['bytes'] / 1024:.0f} KB total, "
+          f"{info['mean_bytes'] / 1024:.1f} KB/file (max {info['max_bytes'] / 1024:.1f} KB)")
+
+
+def print_pipeline_stats(stats: Dict[str, Any]) -> None:
+    """Print per-stage pipeline stats for tuning --stage-workers/--queue-depth."""
+    print(f"\nPipeline stages (queue depth {stats['queue_depth']}):")
+    for name, st in stats["stages"].items():
+        print(f"  {name:<7} workers={st['workers']:<3} busy={st['busy_s']:.1f}s "
+              f"util={st['utilization'] * 100:.0f}% queue max/avg={st['max_queue_depth']}/{st['avg_queue_depth']}")
+
+
 def main(argv: list[str] | None = None) -> int:
     from .__version__ import __version__
     
@@ -271,12 +1424,40 @@ def main(argv: list[str] | None = None) -> int:
     parser.add_argument("--embed", action="store_true", help="attempt essence embedding (requires ffmpeg + aaf2)")
     parser.add_argument("--no-recursive", action="store_true", help="do not recurse into subdirectories")
     parser.add_argument("--max-files", type=int, help="limit to N files for quick runs")
+    parser.add_argument("--stream", action="store_true", help="start converting while the directory walk is still running")
     parser.add_argument("--tag-map", help="path to JSON tag mapping file (optional)")
     parser.add_argument("--skip-existing", action="store_true", help="skip files if output AAF already exists")
+    parser.add_argument("--incremental", action="store_true", help="only rebuild inputs whose content or conversion options changed (build cache in output root)")
     parser.add_argument("--log-file", help="write detailed results to JSON log file")
+    parser.add_argument("--pack", choices=["folder", "album"], help="write one multi-track AAF per folder or per album instead of one per file")
+    parser.add_argument("--pack-size", type=int, help="max tracks per packed AAF (implies --pack folder)")
+    parser.add_argument("--schedule", choices=list(SCHEDULE_POLICIES), default="discovery", help="dispatch order: discovery (default), or largest first by file size or probed duration")
+    parser.add_argument("--sample-rate", type=parse_target_value, default=48000, help="target sample rate in Hz, or 'source' to keep PCM inputs' rate (default: 48000)")
+    parser.add_argument("--bit-depth", type=parse_target_value, choices=[None, 16, 24, 32], default=None, help="target bit depth 16/24/32, or 'source' (default: keep PCM inputs' depth; transcodes use 16)")
+    parser.add_argument("--ffmpeg-batch", type=int, default=1, help="decode up to N short files per ffmpeg process (for libraries of short clips)")
+    parser.add_argument("--pipe-decode", action="store_true", help="stream decoded PCM from ffmpeg into the AAF (no temp WAVs in the output folder)")
+    parser.add_argument("--max-memory", help="memory budget for concurrent conversions, e.g. 8G (big files wait for room)")
+    parser.add_argument("--link-media", help="write linked AAFs that reference mono WAVs kept in this folder instead of embedding the audio")
+    parser.add_argument("--mxf-media", help="write per-channel OP-Atom MXF media into this folder (e.g. for Avid MediaFiles) and AAFs linking it")
+    parser.add_argument("--pcm-cache", help="directory to cache decoded audio in, reused by later runs with other options (not with --pipe-decode)")
+    parser.add_argument("--pcm-cache-size", default="10G", help="size cap for --pcm-cache; least recently used entries are evicted (default: 10G)")
+    parser.add_argument("--no-metadata-cache", action="store_true",
+                        help=f"don't reuse tags read by earlier runs (cached in {default_metadata_cache_path()})")
+    parser.add_argument("--ranged-tags", action="store_true",
+                        help="read only tag blocks/stream headers in small ranged reads (for network storage)")
+    parser.add_argument("--duration-policy", choices=list(DURATION_POLICIES),
+                        help="Duration source: header estimate, full MP3 frame scan, or decoded PCM "
+                             "(default: pcm when embedding, else header)")
+    parser.add_argument("--shard", help="only process shard i of N (e.g. 2/4), partitioned by a stable hash of the relative path")
+    parser.add_argument("--journal", help="append each finished file to this crash-safe JSONL journal")
+    parser.add_argument("--resume", help="resume an interrupted run from its journal (skips finished files)")
     parser.add_argument("--export-csv", help="write per-file results to a CSV report")
     parser.add_argument("--export-metadata-csv", help="write per-file parsed metadata fields to a CSV report")
     parser.add_argument("--fps", type=float, default=24.0, help="frame rate for AAF timeline (default: 24.0)")
+    parser.add_argument("-j", "--jobs", type=int, help=f"number of parallel worker processes (default: {default_jobs()})")
+    parser.add_argument("--pipeline", action="store_true", help="use the staged probe/decode/embed pipeline instead of the process pool")
+    parser.add_argument("--stage-workers", help="pipeline threads per stage, e.g. probe=2,decode=8,embed=2")
+    parser.add_argument("--queue-depth", type=int, default=4, help="max files waiting between pipeline stages (default: 4)")
     parser.add_argument("--version", action="version", version=f"MXToAAF {__version__}")
 
     args = parser.parse_args(argv)
@@ -291,9 +1472,9 @@ def main(argv: list[str] | None = None) -> int:
             tag_map = json.load(fh)
 
     print(f"Processing {args.src} -> {args.out}")
-    print(f"Embed: {args.embed}, Skip existing: {args.skip_existing}")
+    print(f"Embed: {args.embed}, Skip existing: {args.skip_existing}, Incremental: {args.incremental}, Jobs: {args.jobs or default_jobs()}")
     
-    # Use enhanced process_directory (sequential only) with logging
+    # Use enhanced process_directory with logging
     summary = process_directory(
         args.src,
         args.out,
@@ -306,6 +1487,30 @@ def main(argv: list[str] | None = None) -> int:
         export_csv=args.export_csv,
         export_metadata_csv=args.export_metadata_csv,
         fps=args.fps,
+        jobs=args.jobs,
+        pipeline=args.pipeline,
+        stage_workers=parse_stage_workers(args.stage_workers) if args.stage_workers else None,
+        queue_depth=args.queue_depth,
+        incremental=args.incremental,
+        stream=args.stream,
+        journal=args.journal,
+        resume=args.resume,
+        pack=args.pack,
+        pack_size=args.pack_size,
+        schedule=args.schedule,
+        shard=parse_shard(args.shard) if args.shard else None,
+        max_memory=parse_size(args.max_memory) if args.max_memory else None,
+        pipe_decode=args.pipe_decode,
+        sample_rate=args.sample_rate,
+        bit_depth=args.bit_depth,
+        ffmpeg_batch=args.ffmpeg_batch,
+        pcm_cache=args.pcm_cache,
+        pcm_cache_size=parse_size(args.pcm_cache_size),
+        link_media=args.link_media,
+        mxf_media=args.mxf_media,
+        metadata_cache=None if args.no_metadata_cache else default_metadata_cache_path(),
+        ranged_tags=args.ranged_tags,
+        duration_policy=args.duration_policy,
     )
     
     print(f"\n{'='*60}")
@@ -316,6 +1521,14 @@ def main(argv: list[str] | None = None) -> int:
     print(f"⊘ Skipped:      {summary['skipped_count']}")
     print(f"✗ Failed:       {summary['failed_count']}")
     print(f"Duration:       {summary['total_duration']:.1f}s")
+    print_conversion_stats(summary.get('conversions'))
+    if summary.get('pipeline'):
+        print_pipeline_stats(summary['pipeline'])
+    print_schedule_stats(summary.get('schedule'))
+    print_memory_stats(summary.get('memory'))
+    print_pcm_cache_stats(summary.get('pcm_cache'))
+    print_metadata_cache_stats(summary.get('metadata_cache'))
+    print_tag_read_stats(summary.get('tag_reads'))
     
     if summary['failed_files']:
         print(f"\nFailed files:")
@@ -0,0 +1,135 @@
+"""Incremental build cache for MXToAAF batch runs
+
+A small SQLite database kept in the output root records, for every input
+that was converted successfully, the input's size/mtime/content hash, a
+fingerprint of every option that affects the output, and the size of the
+AAF (or manifest) that was written. A later run only rebuilds an input when
+one of those no longer matches:
+
+- unchanged size + mtime      -> up to date, no file content is read
+- mtime changed, same size    -> content hash decides (touch/copy is cheap)
+- different options           -> rebuild (e.g. new --fps or --tag-map)
+- output missing or resized   -> rebuild (e.g. half-written AAF after a crash)
+
+Records are only written after an output is complete, so an interrupted
+conversion is never treated as done. Batch and watch runs take the input's
+size, mtime and hash in the worker that converted it and pass them to
+`BuildCache.record`, so recording a result doesn't re-read the input.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .__version__ import __version__
+
+CACHE_FILENAME = ".mxtoaaf_cache.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS builds (
+    input TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    sha256 TEXT NOT NULL,
+    options TEXT NOT NULL,
+    output TEXT NOT NULL,
+    output_size INTEGER NOT NULL,
+    built_at REAL NOT NULL
+)
+"""
+
+
+def file_sha256(path: str | Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def options_fingerprint(options: Dict[str, Any]) -> str:
+    """Stable hash of every option that affects the written output."""
+    payload = dict(options)
+    payload["mxtoaaf_version"] = __version__
+    blob = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(blob).hexdigest()
+
+
+class BuildCache:
+    """SQLite-backed record of completed conversions, keyed by relative input path."""
+
+    def __init__(self, db_path: str | Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # Lookups may come from a pipeline feeder thread while results are
+        # recorded from the main thread; serialize access with a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        try:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        except sqlite3.DatabaseError:
+            pass
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def lookup(self, path: Path, key: str, options: str) -> str | None:
+        """Return the cached output path if `path` is up to date, else None."""
+        with self._lock:
+            return self._lookup(path, key, options)
+
+    def _lookup(self, path: Path, key: str, options: str) -> str | None:
+        row = self._conn.execute(
+            "SELECT size, mtime_ns, sha256, options, output, output_size FROM builds WHERE input = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        size, mtime_ns, sha, opts, output, output_size = row
+        if opts != options:
+            return None
+        try:
+            st = path.stat()
+            out_st = os.stat(output)
+        except OSError:
+            return None
+        if out_st.st_size != output_size or st.st_size != size:
+            return None
+        if st.st_mtime_ns != mtime_ns:
+            # Same size but touched/copied: fall back to the content hash
+            if file_sha256(path) != sha:
+                return None
+            self._conn.execute("UPDATE builds SET mtime_ns = ? WHERE input = ?", (st.st_mtime_ns, key))
+            self._conn.commit()
+        return output
+
+    def record(self, path: Path, key: str, options: str, output: str,
+               signature: Tuple[int, int, str] | None = None) -> None:
+        """Remember a successful conversion of `path` into `output`.
+
+        `signature` is the input's (size, mtime_ns, sha256) as the converting
+        worker saw it; without one the file is stat'ed and hashed here.
+        """
+        if signature is None:
+            st = path.stat()
+            signature = (st.st_size, st.st_mtime_ns, file_sha256(path))
+        size, mtime_ns, sha = signature
+        row = (key, size, mtime_ns, sha, options, str(output), os.path.getsize(output), time.time())
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO builds VALUES (?, ?, ?, ?, ?, ?, ?, ?)", row)
+            self._conn.commit()
+
+    def close(self) -> None:
+        try:
+            with self._lock:
+                self._conn.close()
+        except Exception:
+            pass
+
+
+__all__ = ["BuildCache", "CACHE_FILENAME", "file_sha256", "options_fingerprint"]
@@ -0,0 +1,244 @@
+"""Format-aware conversion planning for MXToAAF
+
+Every input is probed once (container headers only, no audio is read)
+and given one of three conversion paths:
+
+    direct     - PCM WAV already in the target format: imported as-is
+    repack     - PCM that only needs re-wrapping: big-endian AIFF/AIFC
+                 (byte-swapped on the fly) or WAVE_FORMAT_EXTENSIBLE with a
+                 PCM subformat; the samples are streamed into the AAF
+                 without ffmpeg
+    transcode  - anything else (compressed audio, float PCM, or PCM at the
+                 wrong rate/depth): decoded by ffmpeg to the target format
+
+The target rate defaults to 48 kHz and the target depth to "whatever the
+PCM source already uses" (transcodes then produce 16-bit). Transcodes keep
+the channel count the WAV/AIFF header gives; compressed inputs, whose
+headers aren't read here, are decoded to stereo. When PCM only
+misses the target rate/depth and ffmpeg isn't installed, it is imported
+as-is rather than failed, and the plan's reason says so.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+from .utils import ffmpeg_available
+
+CONVERSION_ACTIONS = ("direct", "repack", "transcode")
+
+# Output format of a transcode when the target leaves rate/depth open
+DEFAULT_SAMPLERATE = 48000
+DEFAULT_BITS = 16
+DEFAULT_CHANNELS = 2
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+# KSDATAFORMAT_SUBTYPE_PCM
+_PCM_SUBFORMAT = bytes.fromhex("0100000000001000800000aa00389b71")
+
+# AIFC compression types that are plain PCM: (big-endian?)
+_AIFC_PCM = {b"NONE": True, b"twos": True, b"sowt": False}
+
+
+@dataclass(frozen=True)
+class ConversionTarget:
+    """Requested output format; None leaves that property as the source has it."""
+    samplerate: int | None = DEFAULT_SAMPLERATE
+    bits: int | None = None
+
+
+@dataclass
+class AudioFormat:
+    container: str          # "wav" or "aiff"
+    pcm: bool               # integer PCM that can be imported without decoding
+    samplerate: int
+    channels: int
+    bits: int
+    data_offset: int = 0
+    data_size: int = 0
+    big_endian: bool = False
+    extensible: bool = False
+
+
+@dataclass
+class ConversionPlan:
+    action: str                      # one of CONVERSION_ACTIONS
+    reason: str
+    fmt: AudioFormat | None = None
+    samplerate: int = DEFAULT_SAMPLERATE
+    bits: int = DEFAULT_BITS
+    channels: int = DEFAULT_CHANNELS
+
+
+def _read_chunks(fh, size_fmt: str, end: int) -> Iterator[tuple[bytes, int, int]]:
+    """Yield (chunk id, payload offset, payload size) for a RIFF/IFF body."""
+    while fh.tell() + 8 <= end:
+        header = fh.read(8)
+        if len(header) < 8:
+            return
+        cid, size = header[:4], struct.unpack(size_fmt, header[4:])[0]
+        offset = fh.tell()
+        yield cid, offset, size
+        fh.seek(offset + size + (size & 1))
+
+
+def _extended_to_float(b: bytes) -> float:
+    """Decode the 80-bit IEEE extended float AIFF uses for its sample rate."""
+    exponent = struct.unpack(">H", b[:2])[0] & 0x7FFF
+    mantissa = struct.unpack(">Q", b[2:10])[0]
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+def _probe_wav(fh, file_size: int) -> AudioFormat | None:
+    fmt = None
+    for cid, offset, size in _read_chunks(fh, "<I", file_size):
+        if cid == b"fmt ":
+            raw = fh.read(min(size, 40))
+            tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", raw[:16])
+            extensible = tag == _WAVE_FORMAT_EXTENSIBLE
+            pcm = tag == _WAVE_FORMAT_PCM or (extensible and raw[24:40] == _PCM_SUBFORMAT)
+            fmt = AudioFormat("wav", pcm, rate, channels, bits, extensible=extensible)
+        elif cid == b"data" and fmt is not None:
+            fmt.data_offset = offset
+            # Streamed WAVs may leave the size unset; trust the file length
+            fmt.data_size = min(size, file_size - offset)
+            return fmt
+    return None
+
+
+def _probe_aiff(fh, file_size: int, aifc: bool) -> AudioFormat | None:
+    fmt = None
+    for cid, offset, size in _read_chunks(fh, ">I", file_size):
+        if cid == b"COMM":
+            raw = fh.read(min(size, 22))
+            channels, _, bits = struct.unpack(">hIh", raw[:8])
+            rate = _extended_to_float(raw[8:18])
+            big_endian, pcm = True, True
+            if aifc:
+                compression = raw[18:22]
+                pcm = compression in _AIFC_PCM
+                big_endian = _AIFC_PCM.get(compression, True)
+            fmt = AudioFormat("aiff", pcm, int(round(rate)), channels, bits, big_endian=big_endian)
+        elif cid == b"SSND" and fmt is not None:
+            data_offset = struct.unpack(">I", fh.read(8)[:4])[0]
+            fmt.data_offset = offset + 8 + data_offset
+            fmt.data_size = min(size - 8 - data_offset, file_size - fmt.data_offset)
+            return fmt
+    return None
+
+
+def parse_target_value(value: str) -> int | None:
+    """CLI helper: an integer target (e.g. 48000, 24) or "source" for None."""
+    if str(value).lower() == "source":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"invalid target {value!r}: expected a number or 'source'") from None
+
+
+def probe_audio_format(path: str | Path) -> AudioFormat | None:
+    """Read the WAV/AIFF headers of `path`; None for other (compressed) formats."""
+    try:
+        file_size = os.path.getsize(path)
+        with open(path, "rb") as fh:
+            head = fh.read(12)
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+                return _probe_wav(fh, file_size)
+            if head[:4] == b"FORM" and head[8:12] in (b"AIFF", b"AIFC"):
+                return _probe_aiff(fh, file_size, head[8:12] == b"AIFC")
+    except (OSError, struct.error):
+        pass
+    return None
+
+
+def plan_conversion(path: str | Path, target: ConversionTarget | None = None) -> ConversionPlan:
+    """Decide how `path` gets to AAF-ready PCM (see module docstring)."""
+    target = target or ConversionTarget()
+    fmt = probe_audio_format(path)
+    out_rate = target.samplerate or (fmt.samplerate if fmt and fmt.pcm else DEFAULT_SAMPLERATE)
+    out_bits = target.bits or (fmt.bits if fmt and fmt.pcm and fmt.bits in (16, 24, 32) else DEFAULT_BITS)
+    out_channels = fmt.channels if fmt and fmt.channels >= 1 else DEFAULT_CHANNELS
+
+    def _plan(action: str, reason: str) -> ConversionPlan:
+        return ConversionPlan(action, reason, fmt, out_rate, out_bits, out_channels)
+
+    if fmt is None:
+        return _plan("transcode", "not PCM WAV/AIFF")
+    if not fmt.pcm:
+        return _plan("transcode", f"{fmt.container} is not integer PCM")
+    if fmt.bits not in (16, 24, 32) or fmt.channels < 1:
+        return _plan("transcode", f"unsupported PCM layout ({fmt.bits}-bit, {fmt.channels} ch)")
+
+    mismatch = []
+    if target.samplerate and fmt.samplerate != target.samplerate:
+        mismatch.append(f"{fmt.samplerate} Hz")
+    if target.bits and fmt.bits != target.bits:
+        mismatch.append(f"{fmt.bits}-bit")
+    needs_repack = fmt.container == "aiff" or fmt.extensible
+    import_action = "repack" if needs_repack else "direct"
+    if mismatch:
+        if ffmpeg_available():
+            return _plan("transcode", f"source is {', '.join(mismatch)}")
+        return ConversionPlan(import_action, f"ffmpeg unavailable; importing at {', '.join(mismatch)}",
+                              fmt, fmt.samplerate, fmt.bits, fmt.channels)
+    if fmt.container == "aiff":
+        reason = "big-endian AIFF PCM, byte-swapped" if fmt.big_endian else "little-endian AIFC PCM"
+    elif fmt.extensible:
+        reason = "WAVE_FORMAT_EXTENSIBLE PCM, re-wrapped"
+    else:
+        reason = "PCM WAV in target format"
+    return ConversionPlan(import_action, reason, fmt, fmt.samplerate, fmt.bits, fmt.channels)
+
+
+class PCMFileReader:
+    """Stream the PCM samples of a probed WAV/AIFF as little-endian chunks.
+
+    Shaped like `utils.PCMPipe` (samplerate/channels/sampwidth + iterable
+    of interleaved chunks), so it can be passed to `create_music_aaf(pcm=...)`.
+    Big-endian samples are byte-swapped per chunk with strided slices.
+    """
+
+    def __init__(self, path: str | Path, fmt: AudioFormat, chunk_frames: int = 48000):
+        self.path = str(path)
+        self.fmt = fmt
+        self.samplerate = fmt.samplerate
+        self.channels = fmt.channels
+        self.sampwidth = fmt.bits // 8
+        self.chunk_frames = chunk_frames
+
+    def __iter__(self) -> Iterator[bytes]:
+        width = self.sampwidth
+        block = self.channels * width
+        remaining = self.fmt.data_size - self.fmt.data_size % block
+        with open(self.path, "rb") as fh:
+            fh.seek(self.fmt.data_offset)
+            while remaining > 0:
+                data = fh.read(min(remaining, self.chunk_frames * block))
+                if not data:
+                    break
+                remaining -= len(data)
+                if self.fmt.big_endian:
+                    swapped = bytearray(len(data))
+                    for k in range(width):
+                        swapped[k::width] = data[width - 1 - k::width]
+                    data = bytes(swapped)
+                yield data
+
+
+__all__ = [
+    "CONVERSION_ACTIONS",
+    "ConversionTarget",
+    "ConversionPlan",
+    "AudioFormat",
+    "PCMFileReader",
+    "probe_audio_format",
+    "plan_conversion",
+    "parse_target_value",
+]
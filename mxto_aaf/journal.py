@@ -0,0 +1,131 @@
+"""Append-only batch journal for crash-safe, resumable MXToAAF runs
+
+The journal is a JSON-lines file written while a batch runs:
+
+    {"event": "start", "src": ..., "out": ..., "options": {...}, "time": ...}
+    {"event": "started", "key": "Album/01 Song.mp3", "time": ...}
+    {"event": "done", "key": "Album/01 Song.mp3", "result": {...}, "time": ...}
+    {"event": "resume", "time": ...}
+
+Every line is flushed and fsync'd as soon as it is written, so after a
+power loss or a killed process the journal still lists every file that
+finished. `load_journal` tolerates a torn final line, and a journal
+reopened for appending is first cut back to its last complete line.
+Resuming skips the finished files (restoring their results for the final
+report) and re-queues anything that failed or was started but never
+finished.
+"""
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from typing import Any, Dict
+
+
+class BatchJournal:
+    """Thread-safe, fsync-per-line JSONL writer."""
+
+    def __init__(self, path: str | os.PathLike, append: bool = False):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        if append:
+            _drop_torn_tail(self.path)
+        self._fh = open(self.path, "a" if append else "w", encoding="utf-8")
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        event["time"] = time.time()
+        line = json.dumps(event, default=str) + "\n"
+        with self._lock:
+            self._fh.write(line)
+            self._fh.flush()
+            try:
+                os.fsync(self._fh.fileno())
+            except OSError:
+                pass
+
+    def start(self, src: str, out: str, options: Dict[str, Any]) -> None:
+        self._write({"event": "start", "src": src, "out": out, "options": options})
+
+    def resume(self) -> None:
+        self._write({"event": "resume"})
+
+    def started(self, key: str) -> None:
+        self._write({"event": "started", "key": key})
+
+    def done(self, key: str, result: Dict[str, Any]) -> None:
+        self._write({"event": "done", "key": key, "result": result})
+
+    def close(self) -> None:
+        with self._lock:
+            try:
+                self._fh.close()
+            except Exception:
+                pass
+
+
+def _drop_torn_tail(path: str, block: int = 4096) -> None:
+    """Truncate `path` after its last newline, dropping a line torn by a crash.
+
+    Otherwise the next appended record would be glued onto the fragment
+    and both would be lost as one unparseable line.
+    """
+    try:
+        fh = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with fh:
+        end = fh.seek(0, os.SEEK_END)
+        pos = end
+        while pos > 0:
+            start = max(0, pos - block)
+            fh.seek(start)
+            nl = fh.read(pos - start).rfind(b"\n")
+            if nl >= 0:
+                pos = start + nl + 1
+                break
+            pos = start
+        if pos < end:
+            fh.truncate(pos)
+
+
+def load_journal(path: str | os.PathLike) -> Dict[str, Any]:
+    """Read a journal and return its header, finished results and in-flight keys.
+
+    Returns:
+        Dict with keys: header (the "start" event or None), done (key ->
+        result dict, successful or skipped files only), failed (keys whose
+        last result was a failure), in_flight (keys to redo: started but
+        never finished, or failed)
+    """
+    header = None
+    done: Dict[str, Dict[str, Any]] = {}
+    failed = set()
+    started = set()
+    with open(path, "r", encoding="utf-8") as fh:
+        for line in fh:
+            try:
+                event = json.loads(line)
+            except ValueError:
+                # Torn write from a crash — ignore the partial line
+                continue
+            kind = event.get("event")
+            if kind == "start" and header is None:
+                header = event
+            elif kind == "started":
+                started.add(event.get("key"))
+            elif kind == "done" and isinstance(event.get("result"), dict):
+                key = event.get("key")
+                if event["result"].get("status") == "failed":
+                    # Retried on resume rather than replayed
+                    done.pop(key, None)
+                    failed.add(key)
+                else:
+                    done[key] = event["result"]
+                    failed.discard(key)
+    return {"header": header, "done": done, "failed": sorted(failed),
+            "in_flight": sorted((started | failed) - set(done))}
+
+
+__all__ = ["BatchJournal", "load_journal"]
@@ -0,0 +1,229 @@
+"""Persistent metadata cache for MXToAAF
+
+Reading tags means opening every file with mutagen (or spawning ffprobe),
+which dominates re-scans of a large library: duration scheduling and
+memory estimates probe every file, and every re-converted file is read
+again. This SQLite cache keeps each file's extracted `MusicMetadata`,
+keyed by its absolute path and the extraction variant (options that
+change the result, e.g. "duration=scan"; runs with different options
+keep separate entries) and checked against:
+
+- size and mtime (ns)        -> the file has not been rewritten
+- extractor version          -> `metadata.EXTRACTOR_VERSION` plus the
+                                mutagen version (or its absence) and
+                                whether the ffprobe fallback was available
+
+Any mismatch is a miss and the entry is replaced on the next extraction.
+Tag values are stored as JSON; values that are not plain strings/numbers
+(e.g. mutagen ID3 frame objects from WAV/AIFF tags) come back as their
+text, which is how every writer renders them anyway.
+
+One database is shared safely by threads and worker processes (WAL mode,
+one connection per process). Lookups and writes are best-effort: a locked
+or unreadable database just means the file is read again.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from .metadata import EXTRACTOR_VERSION, MusicMetadata
+from .utils import _get_ffprobe_path
+
+try:
+    from mutagen import version_string as _mutagen_version
+except Exception:  # pragma: no cover - optional dependency
+    _mutagen_version = None
+
+METADATA_CACHE_FILENAME = "metadata.sqlite"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (
+    path TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version TEXT NOT NULL,
+    data TEXT NOT NULL,
+    cached_at REAL NOT NULL,
+    PRIMARY KEY (path, variant)
+)
+"""
+
+# (pid, db path) -> (connection, lock); a forked worker opens its own
+_CONNECTIONS: Dict[Tuple[int, str], Tuple[sqlite3.Connection, threading.Lock]] = {}
+_CONNECTIONS_LOCK = threading.Lock()
+
+
+def extractor_version() -> str:
+    ffprobe = "yes" if _get_ffprobe_path() else "no"
+    return f"{EXTRACTOR_VERSION}|mutagen={_mutagen_version or 'none'}|ffprobe={ffprobe}"
+
+
+def default_metadata_cache_path() -> Path:
+    """Per-user cache location (the CLIs use it unless --no-metadata-cache)."""
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local") / "MXToAAF"
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Caches" / "MXToAAF"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "mxtoaaf"
+    return base / METADATA_CACHE_FILENAME
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _jsonable(v) for k, v in value.items()}
+    return str(value)
+
+
+class MetadataCache:
+    """SQLite-backed cache of `extract_music_metadata` results.
+
+    Only the database path is pickled, so an instance can be handed to
+    worker processes; each process connects on first use.
+    """
+
+    def __init__(self, db_path: str | Path, variant: str = ""):
+        self.db_path = Path(db_path)
+        # Extraction options that change results (e.g. "duration=scan") keep their own entries
+        self.variant = variant
+        self.version = extractor_version()
+        self.hits = 0
+        self.misses = 0
+
+    def __getstate__(self):
+        return {"db_path": self.db_path, "variant": self.variant, "version": self.version, "hits": 0, "misses": 0}
+
+    def _connection(self) -> Tuple[sqlite3.Connection, threading.Lock]:
+        key = (os.getpid(), str(self.db_path))
+        with _CONNECTIONS_LOCK:
+            entry = _CONNECTIONS.get(key)
+            if entry is None:
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+                conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+                try:
+                    conn.execute("PRAGMA journal_mode=WAL")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                except sqlite3.DatabaseError:
+                    pass
+                columns = [row[1] for row in conn.execute("PRAGMA table_info(metadata)")]
+                if columns and "variant" not in columns:
+                    conn.execute("DROP TABLE metadata")  # pre-variant layout; it's only a cache
+                conn.execute(_SCHEMA)
+                conn.commit()
+                entry = _CONNECTIONS[key] = (conn, threading.Lock())
+        return entry
+
+    def key(self, path: str | Path) -> Tuple[str, int, int] | None:
+        """(absolute path, size, mtime_ns) for `path`, or None if it can't be stat'ed."""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+    def get(self, key: Tuple[str, int, int] | None, path: str | Path | None = None) -> MusicMetadata | None:
+        """The cached metadata for `key` if still valid, else None (counted as a miss).
+
+        `path` is what the returned metadata's `path` is set to (defaults
+        to the absolute path in the key).
+        """
+        row = None
+        if key is not None:
+            try:
+                conn, lock = self._connection()
+                with lock:
+                    row = conn.execute(
+                        "SELECT size, mtime_ns, version, data FROM metadata WHERE path = ? AND variant = ?",
+                        (key[0], self.variant),
+                    ).fetchone()
+            except sqlite3.Error:
+                row = None
+        if row is None or tuple(row[:3]) != (key[1], key[2], self.version):
+            self.misses += 1
+            return None
+        try:
+            fields = json.loads(row[3])
+        except ValueError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        fields["path"] = str(path) if path is not None else key[0]
+        fields["bytes_read"] = 0
+        return MusicMetadata(**fields)
+
+    def put(self, key: Tuple[str, int, int] | None, md: MusicMetadata) -> None:
+        """Store `md` for the file state in `key` (taken before extraction)."""
+        if key is None:
+            return
+        fields = {k: _jsonable(v) for k, v in md.__dict__.items() if k not in ("path", "bytes_read")}
+        row = (key[0], self.variant, key[1], key[2], self.version, json.dumps(fields), time.time())
+        try:
+            conn, lock = self._connection()
+            with lock:
+                conn.execute("INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)", row)
+                conn.commit()
+        except sqlite3.Error:
+            pass
+
+    def fetch(self, path: str | Path, extract) -> Tuple[MusicMetadata, bool]:
+        """Cached metadata for `path`, else `extract(path)` stored for next
+        time; returns (metadata, hit)."""
+        key = self.key(path)
+        md = self.get(key, path)
+        if md is not None:
+            return md, True
+        md = extract(path)
+        self.put(key, md)
+        return md, False
+
+    def invalidate(self, path: str | Path | None = None) -> None:
+        """Drop the entries (every variant) for `path`, or every entry when `path` is None."""
+        conn, lock = self._connection()
+        with lock:
+            if path is None:
+                conn.execute("DELETE FROM metadata")
+            else:
+                conn.execute("DELETE FROM metadata WHERE path = ?", (os.path.abspath(path),))
+            conn.commit()
+
+    def prune(self) -> int:
+        """Remove entries for files that no longer exist or were written by
+        another extractor version (any variant); returns how many were removed."""
+        conn, lock = self._connection()
+        with lock:
+            rows = conn.execute("SELECT path, variant, version FROM metadata").fetchall()
+            stale = [(p, variant) for p, variant, version in rows
+                     if version != self.version or not os.path.exists(p)]
+            conn.executemany("DELETE FROM metadata WHERE path = ? AND variant = ?", stale)
+            conn.commit()
+        return len(stale)
+
+    def stats(self) -> Dict[str, int]:
+        conn, lock = self._connection()
+        with lock:
+            entries = conn.execute("SELECT COUNT(*) FROM metadata").fetchone()[0]
+        return {"hits": self.hits, "misses": self.misses, "entries": entries}
+
+    def close(self) -> None:
+        with _CONNECTIONS_LOCK:
+            entry = _CONNECTIONS.pop((os.getpid(), str(self.db_path)), None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+
+__all__ = ["MetadataCache", "METADATA_CACHE_FILENAME", "default_metadata_cache_path", "extractor_version"]
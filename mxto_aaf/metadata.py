@@ -5,6 +5,7 @@ Uses mutagen where available and falls back to simple defaults.
 from __future__ import annotations
 
 import os
+import re
 from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
@@ -14,10 +15,18 @@ except Exception:  # pragma: no cover
     MutagenFile = None
     
 try:
-    import json, subprocess
-except Exception:  # pragma: no cover - only used in fallback
-    json = None
-    subprocess = None
+    from mutagen._vorbis import VCommentDict, is_valid_key as _valid_vorbis_key
+    from mutagen.easyid3 import EasyID3
+    from mutagen.easymp4 import EasyMP4Tags
+    from mutagen.id3 import ID3
+    from mutagen.mp3 import BitrateMode
+except Exception:  # pragma: no cover
+    VCommentDict = EasyID3 = EasyMP4Tags = ID3 = BitrateMode = None
+    _valid_vorbis_key = None
+
+from .mpeg import scan_mpeg
+from .probe import default_probe_service
+from .tagread import read_tags
 
 
 @dataclass
@@ -37,18 +46,239 @@ class MusicMetadata:
     description: Optional[str] = None
     duration: Optional[float] = None
     raw: Dict[str, Any] = None
+    # Bytes read from the file for its tags and any duration scan (ranged mode; 0 from the cache)
+    bytes_read: Optional[int] = None
+
+
+# Where MusicMetadata.duration comes from:
+#   header - the container's header; for MP3s without a Xing/VBRI header
+#            mutagen estimates it from the first frame's bitrate (fast)
+#   scan   - like header, but such MP3s are counted frame by frame (reads
+#            the whole file)
+#   pcm    - header while probing; the AAF writer then replaces it with the
+#            decoded PCM's frame count / sample rate (exact, no extra read)
+DURATION_POLICIES = ("header", "scan", "pcm")
+
+# Bump whenever a change here alters what is extracted for the same file;
+# it invalidates entries in the persistent metadata cache (metacache.py)
+EXTRACTOR_VERSION = 2
+
+# Other spellings tried, in order, when a tag name is not present itself:
+# MP4 atoms, ID3 frame ids and Vorbis/upper-case keys of the same field
+_TAG_ALIASES: Dict[str, tuple] = {
+    # title
+    "title": ("\u00a9nam", "TIT2", "TITLE"),
+    # artist / performer
+    "artist": ("\u00a9ART", "TPE1", "performer", "ARTIST", "album_artist"),
+    # composer
+    "composer": ("\u00a9wrt", "TCOM", "COMPOSER"),
+    # album
+    "album": ("\u00a9alb", "TALB", "ALBUM"),
+    # track number
+    "tracknumber": ("trkn", "TRCK", "TRACK", "track", "tracknumber"),
+    # description / comment
+    "comment": ("desc", "COMM", "description", "COMMENT"),
+    # catalog number
+    "catalog": ("catalognumber", "cat", "CATALOGNUMBER", "catalog"),
+}
+
+# How each field is resolved from mutagen tags, in order. A field takes
+# the first truthy term (else the last one's value): a tag name, looked up
+# directly and then through _TAG_ALIASES; "=field" for a field resolved
+# above; or a literal None.
+_MUTAGEN_FIELDS = (
+    ("track_name", ("title",)),
+    ("artist", ("artist",)),
+    ("album_artist", ("album_artist", "albumartist", "album-artist")),
+    # talent historically maps to artist; keep explicit 'talent' if present
+    ("talent", ("talent", "=artist", "=album_artist", "authors")),
+    ("composer", ("composer", "COMPOSER")),
+    ("album", ("album",)),
+    # Prefer album or common publisher / label mappings
+    ("source", ("=album", "publisher", "label")),
+    ("track_field", ("tracknumber",)),
+    ("description", ("comment", "description", "notes")),
+    ("genre", ("genre", "GENRE", "music_genre", "style", "contentgroup")),
+    ("catalog", ("catalog", "catalognumber", "CATALOGNUMBER", None)),
+)
+
+_TAG, _FIELD, _LITERAL = 0, 1, 2
+
+
+def _compile_fields(fold: bool = False, valid_key=None) -> tuple:
+    """Resolve _MUTAGEN_FIELDS into lookup steps for one kind of tag mapping.
+
+    `fold` lower-cases every key (for mappings with case-insensitive keys,
+    looked up in a lower-cased copy); `valid_key` drops keys the format
+    cannot hold.
+    """
+    def _key(k):
+        return k.lower() if fold else k
+
+    table = []
+    for field, terms in _MUTAGEN_FIELDS:
+        steps = []
+        for term in terms:
+            if term is None:
+                steps.append((_LITERAL, None))
+            elif term.startswith("="):
+                steps.append((_FIELD, term[1:]))
+            else:
+                direct = _key(term) if valid_key is None or valid_key(term) else None
+                aliases = tuple(_key(k) for k in _TAG_ALIASES.get(term, ()) if valid_key is None or valid_key(k))
+                steps.append((_TAG, (direct, aliases)))
+        table.append((field, tuple(steps)))
+    return tuple(table)
+
+
+# One table per tag flavour mutagen returns with easy=True: ID3 frames
+# (WAV/AIFF) have case-sensitive frame keys; EasyID3 (MP3), EasyMP4 (M4A
+# atoms) and Vorbis comments are case-insensitive, and Vorbis keys must be
+# printable ASCII. Other tag types are looked up live with the exact table.
+_EXACT_FIELDS = _compile_fields()
+_FOLDED_FIELDS = _compile_fields(fold=True)
+_TAG_TABLES = []
+if ID3 is not None:
+    _TAG_TABLES = [
+        (ID3, _EXACT_FIELDS, False),
+        (EasyID3, _FOLDED_FIELDS, True),
+        (EasyMP4Tags, _FOLDED_FIELDS, True),
+        (VCommentDict, _compile_fields(fold=True, valid_key=_valid_vorbis_key), True),
+    ]
+_TABLE_BY_TYPE: Dict[type, tuple] = {}
+
+
+def _table_for(tags) -> tuple:
+    """(field table, folded?, live?) for a mutagen tags object, cached per type."""
+    cls = type(tags)
+    entry = _TABLE_BY_TYPE.get(cls)
+    if entry is None:
+        entry = next(((table, fold, False) for base, table, fold in _TAG_TABLES if isinstance(tags, base)),
+                     (_EXACT_FIELDS, False, True))
+        _TABLE_BY_TYPE[cls] = entry
+    return entry
+
+
+def _first_value(v):
+    return v[0] if isinstance(v, (list, tuple)) else v
+
+
+def _lookup_tag(tags, direct, aliases):
+    if direct is not None:
+        v = tags.get(direct)
+        if v:
+            return _first_value(v)
+    for a in aliases:
+        if a in tags:
+            return _first_value(tags.get(a))
+    return None
+
+
+def _resolve_fields(table: tuple, tags, out: dict) -> dict:
+    """Fill `out` field by field from `tags` (a mapping) following `table`."""
+    for field, steps in table:
+        value = None
+        for kind, arg in steps:
+            if kind == _TAG:
+                value = _lookup_tag(tags, *arg)
+            elif kind == _FIELD:
+                value = out[arg]
+            else:
+                value = arg
+            if value:
+                break
+        out[field] = value
+    return out
+
 
+# ffprobe format tags tried (exact keys) per field
+_FFPROBE_KEYS = {
+    "track_name": ("title", "TITLE", "\u00a9nam"),
+    "talent": ("artist", "ARTIST", "\u00a9ART", "author"),
+    "composer": ("composer", "COMPOSER"),
+    "album": ("album", "ALBUM", "\u00a9alb"),
+    "source": ("publisher", "label"),
+    "track": ("track", "TRACK", "tracknumber", "trkn", "TRCK"),
+    "genre": ("genre", "GENRE", "style", "contentgroup"),
+    "catalog": ("catalog", "catalog_number", "catalognumber", "grouping"),
+    "description": ("description", "comment", "desc", "COMMENTS", "COMM"),
+    "duration": ("duration", "DURATION"),
+}
 
-def extract_music_metadata(path: str) -> MusicMetadata:
+ID3_V1_GENRES = (
+    "Blues","Classic Rock","Country","Dance","Disco","Funk","Grunge","Hip-Hop","Jazz","Metal","New Age","Oldies","Other","Pop","R&B","Rap","Reggae","Rock","Techno","Industrial","Alternative","Ska","Death Metal","Pranks","Soundtrack","Euro-Techno","Ambient","Trip-Hop","Vocal","Jazz+Funk","Fusion","Trance","Classical","Instrumental","Acid","House","Game","Sound Clip","Gospel","Noise","AlternRock","Bass","Soul","Punk","Space","Meditative","Instrumental Pop","Instrumental Rock","Ethnic","Gothic","Darkwave","Techno-Industrial","Electronic","Pop-Folk","Eurodance","Dream","Southern Rock","Comedy","Cult","Gangsta","Top 40","Christian Rap","Pop/Funk","Jungle","Native American","Cabaret","New Wave","Psychadelic","Rave","Showtunes","Trailer","Lo-Fi","Tribal","Acid Punk","Acid Jazz","Polka","Retro","Musical","Rock & Roll","Hard Rock",
+)
+
+# Values like "(17)" or "(17) Rock" produced by some taggers
+_ID3_GENRE_RE = re.compile(r"^\(?\s*(\d{1,3})\s*\)?(?:\s*-?\s*(.*))?$")
+
+
+def _normalize_genre(g: Optional[str]) -> Optional[str]:
+    """Normalize/clean genre if it is an ID3 numeric code like "(17)" or "17"."""
+    if not g:
+        return g
+    s = str(g).strip()
+    m = _ID3_GENRE_RE.match(s)
+    if m:
+        idx = int(m.group(1))
+        remainder = (m.group(2) or '').strip()
+        name = ID3_V1_GENRES[idx] if 0 <= idx < len(ID3_V1_GENRES) else None
+        # Prefer explicit remainder text if present, else mapped name
+        return remainder or name or s
+    # Clean common placeholders
+    if s.lower() in {"", "unknown", "undef", "genre"}:
+        return None
+    return s
+
+
+def _split_track(track_field):
+    """"6/10" -> ("6", 10); anything else -> (track_field, None)."""
+    if track_field and isinstance(track_field, str) and "/" in track_field:
+        try:
+            parts = track_field.split("/")
+            return parts[0].strip(), (int(parts[1].strip()) if parts[1].strip().isdigit() else None)
+        except Exception:
+            # if parsing fails just leave the original
+            return track_field, None
+    return track_field, None
+
+
+def extract_music_metadata(path: str, cache=None, probe=None, ranged: bool = False,
+                           duration_policy: str = "header") -> MusicMetadata:
+    """Read tags/duration for `path`.
+
+    `cache` (a `metacache.MetadataCache`) is consulted first and filled on
+    a miss; an entry is only reused while the file's size and mtime and
+    the extractor version are unchanged. Files without mutagen-readable
+    tags are read with ffprobe through `probe` (a `probe.ProbeService`,
+    default: the per-process one, which bounds concurrent ffprobe runs).
+    `ranged=True` reads only the tag blocks and stream headers in small
+    blocks (see `tagread`) and records the bytes read in `bytes_read`,
+    including a "scan" policy's pass over the audio.
+    `duration_policy` is one of DURATION_POLICIES; a cache used with
+    "scan" should be created with a matching `variant`.
+    """
+    if cache is None:
+        return _extract_music_metadata(path, probe, ranged, duration_policy)
+    return cache.fetch(path, lambda p: _extract_music_metadata(p, probe, ranged, duration_policy))[0]
+
+
+def _extract_music_metadata(path: str, probe=None, ranged: bool = False,
+                            duration_policy: str = "header") -> MusicMetadata:
     raw = {}
     track_name = artist = album_artist = talent = composer = source = album = track = catalog = description = None
     total_tracks = None
     genre = None
     duration = None
+    bytes_read = None
 
     if MutagenFile is not None:
+        fields: Dict[str, Any] = {}
         try:
-            f = MutagenFile(path, easy=True)
+            if ranged:
+                f, bytes_read = read_tags(path)
+            else:
+                f = MutagenFile(path, easy=True)
             if f is not None:
                 # capture raw tags for fallbacks; some filetypes expose keys
                 # on different names (mp4 atoms, id3 frames) so keep the raw map
@@ -56,106 +286,58 @@ def extract_music_metadata(path: str) -> MusicMetadata:
                 info = getattr(f, "info", None)
                 if info and hasattr(info, "length"):
                     duration = float(info.length)
+                    # No Xing/VBRI header: the length above is a bitrate estimate
+                    if duration_policy == "scan" and getattr(info, "bitrate_mode", None) == BitrateMode.UNKNOWN:
+                        scanned, scan_bytes = scan_mpeg(path)
+                        duration = scanned or duration
+                        if bytes_read is not None:
+                            bytes_read += scan_bytes
 
-                def _first(tagname):
-                    # Attempt to find a tag by name exactly, or try common
-                    # aliases used across formats (ID3, MP4 atom names, etc.)
-                    if not getattr(f, "tags", None):
-                        return None
-
-                    # direct lookup
-                    v = f.tags.get(tagname)
-                    if v:
-                        return v[0] if isinstance(v, (list, tuple)) else v
-
-                    # aliases we will try
-                    aliases = {
-                        # title
-                        "title": ["\u00a9nam", "TIT2", "TITLE"],
-                        # artist / performer
-                        "artist": ["\u00a9ART", "TPE1", "performer", "ARTIST", "album_artist"],
-                        # composer
-                        "composer": ["\u00a9wrt", "TCOM", "COMPOSER"],
-                        # album
-                        "album": ["\u00a9alb", "TALB", "ALBUM"],
-                        # track number
-                        "tracknumber": ["trkn", "TRCK", "TRACK", "track", "tracknumber"],
-                        # description / comment
-                        "comment": ["desc", "COMM", "description", "COMMENT"],
-                        # catalog number
-                        "catalog": ["catalognumber", "cat", "CATALOGNUMBER", "catalog"],
-                    }
-
-                    for key, vals in aliases.items():
-                        if tagname == key:
-                            for a in vals:
-                                if a in f.tags:
-                                    vv = f.tags.get(a)
-                                    return vv[0] if isinstance(vv, (list, tuple)) else vv
-
-                    return None
-
-                track_name = _first("title")
-                artist = _first("artist")
-                album_artist = _first("album_artist") or _first("albumartist") or _first("album-artist")
-                # talent historically maps to artist; keep explicit 'talent' if present
-                talent = _first("talent") or artist or album_artist or _first("authors")
-                composer = _first("composer") or _first("COMPOSER")
-                album = _first("album")
-                # Prefer album or common publisher / label mappings
-                source = album or _first("publisher") or _first("label")
-                track_field = _first("tracknumber")
-                # handle common formats like "6/10" -> track=6, total_tracks=10
-                if track_field and isinstance(track_field, str) and "/" in track_field:
-                    try:
-                        parts = track_field.split("/")
-                        track = parts[0].strip()
-                        total_tracks = int(parts[1].strip()) if parts[1].strip().isdigit() else None
-                    except Exception:
-                        # if parsing fails just leave the original
-                        track = track_field
-                        total_tracks = None
-                else:
-                    track = track_field
-                    total_tracks = None
-                # many tags use 'catalog' or 'catalognumber' — also check raw
-                description = _first("comment") or _first("description") or _first("notes")
-                genre = _first("genre") or _first("GENRE") or _first("music_genre") or _first("style") or _first("contentgroup")
-                catalog = _first("catalog") or _first("catalognumber") or _first("CATALOGNUMBER") or None
-                # Some tag sets expose keys only in the raw tag dict — attempt
-                # to fall back to those values if the normal lookup didn't find them.
-                def _raw_first(*keys):
-                    for k in keys:
-                        v = raw.get(k)
-                        if v:
-                            return v[0] if isinstance(v, (list, tuple)) else v
-                    return None
-
-                artist = artist or _raw_first("artist", "ARTIST", "\u00a9ART")
-                album_artist = album_artist or _raw_first("album_artist", "albumartist", "album-artist")
-                # If talent is still missing, prefer an explicit 'talent' key, then artist/album_artist
-                talent = talent or _raw_first("talent") or artist or album_artist or _raw_first("authors")
+                tags = getattr(f, "tags", None)
+                table, fold, live = _table_for(tags) if tags else (_EXACT_FIELDS, False, False)
+                # Look tags up in one snapshot dict (lower-cased keys where the
+                # format ignores case) instead of through mutagen per alias
+                lookup = tags if live else ({k.lower(): v for k, v in raw.items()} if fold else raw)
+                _resolve_fields(table, lookup, fields)
         except Exception:
             pass
+        # Fields resolved before any failure are kept
+        track_name = fields.get("track_name")
+        artist = fields.get("artist")
+        album_artist = fields.get("album_artist")
+        talent = fields.get("talent")
+        composer = fields.get("composer")
+        album = fields.get("album")
+        source = fields.get("source")
+        # handle common formats like "6/10" -> track=6, total_tracks=10
+        if "track_field" in fields:
+            track, total_tracks = _split_track(fields["track_field"])
+        description = fields.get("description")
+        genre = fields.get("genre")
+        catalog = fields.get("catalog")
+        if "catalog" in fields:
+            # Some tag sets expose keys only in the raw tag dict — attempt
+            # to fall back to those values if the normal lookup didn't find them.
+            def _raw_first(*keys):
+                for k in keys:
+                    v = raw.get(k)
+                    if v:
+                        return _first_value(v)
+                return None
+
+            artist = artist or _raw_first("artist", "ARTIST", "\u00a9ART")
+            album_artist = album_artist or _raw_first("album_artist", "albumartist", "album-artist")
+            # If talent is still missing, prefer an explicit 'talent' key, then artist/album_artist
+            talent = talent or _raw_first("talent") or artist or album_artist or _raw_first("authors")
 
     # If mutagen didn't provide tags, try ffprobe (ffmpeg suite) as a robust
     # fallback — many systems have ffmpeg/ffprobe available and it understands
     # MP4/M4A atoms. This lets us read Finder-visible tags on macOS MP4 files
     # even when mutagen isn't installed in the Python environment.
-    if not raw and json is not None and subprocess is not None:
+    fmt = (probe or default_probe_service()).probe(path) if not raw else None
+    if fmt is not None:
         try:
-            cmd = ["ffprobe", "-v", "quiet", "-print_format", "json", "-show_format", "-show_entries", "format_tags", path]
-            
-            # On Windows, hide the console window to prevent flashing cmd.exe windows
-            startupinfo = None
-            if os.name == 'nt':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-            
-            proc = subprocess.run(cmd, capture_output=True, text=True, check=True, startupinfo=startupinfo)
-            j = json.loads(proc.stdout)
-            tags = j.get("format", {}).get("tags", {}) if isinstance(j, dict) else {}
+            tags = fmt.get("tags") or {}
             # normalize typical tag names (mp4 atoms etc.)
             def _try_tags(keynames):
                 for k in keynames:
@@ -163,12 +345,12 @@ def extract_music_metadata(path: str) -> MusicMetadata:
                         return tags[k]
                 return None
 
-            track_name = track_name or _try_tags(["title", "TITLE", "\u00a9nam"]) or _try_tags([k for k in tags.keys() if k.lower().endswith("title")])
-            talent = talent or _try_tags(["artist", "ARTIST", "\u00a9ART", "author"])
-            composer = composer or _try_tags(["composer", "COMPOSER"])
-            album = album or _try_tags(["album", "ALBUM", "\u00a9alb"])
-            source = source or album or _try_tags(["publisher", "label"])
-            track_field = track or _try_tags(["track", "TRACK", "tracknumber", "trkn", "TRCK"])
+            track_name = track_name or _try_tags(_FFPROBE_KEYS["track_name"]) or _try_tags([k for k in tags.keys() if k.lower().endswith("title")])
+            talent = talent or _try_tags(_FFPROBE_KEYS["talent"])
+            composer = composer or _try_tags(_FFPROBE_KEYS["composer"])
+            album = album or _try_tags(_FFPROBE_KEYS["album"])
+            source = source or album or _try_tags(_FFPROBE_KEYS["source"])
+            track_field = track or _try_tags(_FFPROBE_KEYS["track"])
             # parse track field for total_tracks if present
             if track_field and isinstance(track_field, str) and "/" in track_field:
                 try:
@@ -181,11 +363,11 @@ def extract_music_metadata(path: str) -> MusicMetadata:
             else:
                 track = track_field
             
-            genre = genre or _try_tags(["genre", "GENRE", "style", "contentgroup"]) 
-            catalog = catalog or _try_tags(["catalog", "catalog_number", "catalognumber", "grouping"])
-            description = description or _try_tags(["description", "comment", "desc", "COMMENTS", "COMM"]) or _try_tags([k for k in tags.keys() if k.lower().endswith("comment") or k.lower().endswith("description")])
+            genre = genre or _try_tags(_FFPROBE_KEYS["genre"])
+            catalog = catalog or _try_tags(_FFPROBE_KEYS["catalog"])
+            description = description or _try_tags(_FFPROBE_KEYS["description"]) or _try_tags([k for k in tags.keys() if k.lower().endswith("comment") or k.lower().endswith("description")])
             if not duration:
-                dur = _try_tags(["duration", "DURATION"]) or j.get("format", {}).get("duration")
+                dur = _try_tags(_FFPROBE_KEYS["duration"]) or fmt.get("duration")
                 try:
                     duration = float(dur) if dur is not None else None
                 except Exception:
@@ -193,12 +375,10 @@ def extract_music_metadata(path: str) -> MusicMetadata:
             # keep tags available for debugging
             raw.update(tags or {})
         except Exception:
-            # If ffprobe isn't present or parsing fails, just continue
+            # If parsing fails, just continue
             pass
 
     if not track_name:
-        import os
-
         track_name = os.path.splitext(os.path.basename(path))[0]
     # Final fallback: if artist/album_artist are still missing, try raw tag keys
     if not artist:
@@ -206,28 +386,6 @@ def extract_music_metadata(path: str) -> MusicMetadata:
     if not album_artist:
         album_artist = raw.get('album_artist') or raw.get('albumartist') or raw.get('album-artist')
 
-    # Normalize/clean genre if it is an ID3 numeric code like "(17)" or "17"
-    def _normalize_genre(g: Optional[str]) -> Optional[str]:
-        if not g:
-            return g
-        s = str(g).strip()
-        # Handle values like "(17)" or "(17) Rock" produced by some taggers
-        import re
-        m = re.match(r"^\(?\s*(\d{1,3})\s*\)?(?:\s*-?\s*(.*))?$", s)
-        if m:
-            idx = int(m.group(1))
-            remainder = (m.group(2) or '').strip()
-            ID3_V1_GENRES = [
-                "Blues","Classic Rock","Country","Dance","Disco","Funk","Grunge","Hip-Hop","Jazz","Metal","New Age","Oldies","Other","Pop","R&B","Rap","Reggae","Rock","Techno","Industrial","Alternative","Ska","Death Metal","Pranks","Soundtrack","Euro-Techno","Ambient","Trip-Hop","Vocal","Jazz+Funk","Fusion","Trance","Classical","Instrumental","Acid","House","Game","Sound Clip","Gospel","Noise","AlternRock","Bass","Soul","Punk","Space","Meditative","Instrumental Pop","Instrumental Rock","Ethnic","Gothic","Darkwave","Techno-Industrial","Electronic","Pop-Folk","Eurodance","Dream","Southern Rock","Comedy","Cult","Gangsta","Top 40","Christian Rap","Pop/Funk","Jungle","Native American","Cabaret","New Wave","Psychadelic","Rave","Showtunes","Trailer","Lo-Fi","Tribal","Acid Punk","Acid Jazz","Polka","Retro","Musical","Rock & Roll","Hard Rock",
-            ]
-            name = ID3_V1_GENRES[idx] if 0 <= idx < len(ID3_V1_GENRES) else None
-            # Prefer explicit remainder text if present, else mapped name
-            return remainder or name or s
-        # Clean common placeholders
-        if s.lower() in {"", "unknown", "undef", "genre"}:
-            return None
-        return s
-
     genre = _normalize_genre(genre)
 
     return MusicMetadata(
@@ -246,7 +404,8 @@ def extract_music_metadata(path: str) -> MusicMetadata:
         description=description,
         duration=duration,
         raw=raw,
+        bytes_read=bytes_read,
     )
 
 
-__all__ = ["extract_music_metadata", "MusicMetadata"]
+__all__ = ["extract_music_metadata", "MusicMetadata", "DURATION_POLICIES", "EXTRACTOR_VERSION"]
@@ -0,0 +1,104 @@
+"""MPEG audio frame scanning for MXToAAF
+
+mutagen reads an MP3's length from its Xing/VBRI header. Without one it
+estimates the length from the file size and the first frame's bitrate,
+which is exact for CBR but can be far off for VBR: a 10-minute VBR file
+with no Xing header was reported as 2:16. `scan_mpeg` walks
+every frame header in the file and adds up their samples. That is
+accurate, but it reads the whole file, which is why it is a duration
+policy of its own ("scan") and not the default.
+"""
+from __future__ import annotations
+
+import mmap
+from typing import Optional, Tuple
+
+# kbps by bitrate index, for (MPEG-1?, layer)
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+# Hz by sample-rate index, for the header's version bits (3 = MPEG-1, 2 = MPEG-2, 0 = MPEG-2.5)
+_SAMPLE_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}
+
+
+def _frame_header(b0: int, b1: int, b2: int) -> Optional[Tuple[int, int, int]]:
+    """(frame length in bytes, samples, sample rate) for a frame header, or None."""
+    if b0 != 0xFF or b1 & 0xE0 != 0xE0:
+        return None
+    version = (b1 >> 3) & 3
+    layer = 4 - ((b1 >> 1) & 3)
+    bitrate_index = b2 >> 4
+    rate_index = (b2 >> 2) & 3
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None  # reserved values, or free-format bitrate we can't size
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    rate = _SAMPLE_RATES[version][rate_index]
+    padding = (b2 >> 1) & 1
+    if layer == 1:
+        return (12 * bitrate // rate + padding) * 4, 384, rate
+    if layer == 2 or mpeg1:
+        return 144 * bitrate // rate + padding, 1152, rate
+    return 72 * bitrate // rate + padding, 576, rate
+
+
+def _skip_id3v2(buf, pos: int = 0) -> int:
+    # Some taggers stack several tags, so skip as many as there are
+    while buf[pos:pos + 3] == b"ID3" and len(buf) >= pos + 10:
+        size = 0
+        for byte in buf[pos + 6:pos + 10]:
+            size = (size << 7) | (byte & 0x7F)
+        pos += 10 + size + (10 if buf[pos + 5] & 0x10 else 0)
+    return pos
+
+
+def scan_mpeg(path: str) -> Tuple[Optional[float], int]:
+    """Length in seconds of the MPEG audio in `path`, counted frame by frame.
+
+    Junk between frames is skipped by re-syncing on the next valid header
+    with the stream's sample rate; trailing ID3v1/APE tags and a truncated
+    final frame are not counted. Returns (seconds or None if no frames
+    were found, bytes of audio scanned).
+    """
+    with open(path, "rb") as fh:
+        try:
+            buf = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty file
+            return None, 0
+        try:
+            end = len(buf)
+            pos = start = _skip_id3v2(buf)
+            samples = frames = 0
+            rate = None
+            while pos + 4 <= end:
+                header = _frame_header(buf[pos], buf[pos + 1], buf[pos + 2])
+                if header is not None and (rate is None or header[2] == rate) and pos + header[0] <= end:
+                    length, frame_samples, rate = header
+                    samples += frame_samples
+                    frames += 1
+                    pos += length
+                    continue
+                if buf[pos:pos + 3] == b"TAG" or buf[pos:pos + 8] == b"APETAGEX":
+                    break
+                nxt = buf.find(b"\xff", pos + 1)
+                if nxt < 0:
+                    pos = end
+                    break
+                pos = nxt
+        finally:
+            buf.close()
+    return (samples / rate if frames else None), max(0, min(pos, end) - start)
+
+
+def scan_mpeg_duration(path: str) -> Optional[float]:
+    """`scan_mpeg` without the byte count."""
+    return scan_mpeg(path)[0]
+
+
+__all__ = ["scan_mpeg", "scan_mpeg_duration"]
@@ -0,0 +1,152 @@
+"""On-disk cache of decoded PCM for MXToAAF
+
+Decoding MP3/M4A is the expensive part of a conversion, and it does not
+depend on --fps, --tag-map or any other AAF option. This cache keeps the
+per-channel mono WAVs ffmpeg produced, keyed by the input's content hash
+plus the decode parameters (rate, depth, channels), so re-running a
+library with different AAF options only has to write AAFs.
+
+Layout (one directory per entry, so an entry appears atomically):
+
+    <root>/ab/<key>/pcm.ch1.wav
+    <root>/ab/<key>/pcm.ch2.wav
+    <root>/.staging/...            decodes in progress
+
+The cache is shared safely between worker processes: entries are decoded
+into a private staging directory and renamed into place. Hits refresh the
+entry's mtime; when the total size exceeds `max_bytes`, least recently
+used entries are removed down to 90% of it (except ones used in the last
+few minutes, which another worker may be importing right now). Each
+process keeps a running total of the cache size, so the tree is only
+walked when that total passes the limit, not on every store; entries
+other processes added are picked up at that walk.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .cache import file_sha256
+
+DEFAULT_MAX_BYTES = 10 * 1024 ** 3
+
+# Entries used more recently than this are never evicted
+_EVICT_GRACE_S = 300.0
+
+_STAGING = ".staging"
+
+# Eviction frees space down to this fraction of max_bytes, so the next
+# walk of the tree is a good while of stores away
+_LOW_WATER = 0.9
+
+
+class PCMCache:
+    """Content-addressed store of decoded per-channel WAVs with an LRU size cap."""
+
+    def __init__(self, root: str | Path, max_bytes: int | None = DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._total: int | None = None  # running size estimate, walked lazily
+        (self.root / _STAGING).mkdir(parents=True, exist_ok=True)
+
+    def key(self, path: str | Path, samplerate: int, bits: int, channels: int = 2,
+            digest: str | None = None) -> str:
+        """Cache key for decoding `path` (its content, or its known `digest`) with these parameters."""
+        seed = f"{digest or file_sha256(path)}|{samplerate}|{bits}|{channels}"
+        return hashlib.sha256(seed.encode("utf-8")).hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    @staticmethod
+    def _channel_paths(entry: Path, channels: int) -> List[str]:
+        return [str(entry / f"pcm.ch{i}.wav") for i in range(1, channels + 1)]
+
+    def lookup(self, key: str, channels: int = 2) -> List[str] | None:
+        """Return the cached per-channel WAVs for `key`, or None."""
+        entry = self._entry(key)
+        paths = self._channel_paths(entry, channels)
+        if not all(os.path.exists(p) for p in paths):
+            return None
+        try:
+            os.utime(entry)
+        except OSError:
+            pass
+        return paths
+
+    def stage(self) -> str:
+        """A private directory to decode into; pass `<dir>/pcm` as the split prefix."""
+        return tempfile.mkdtemp(prefix="decode-", dir=self.root / _STAGING)
+
+    def commit(self, key: str, staging: str, channels: int = 2) -> List[str]:
+        """Move a finished decode from `staging` into the cache and return its paths."""
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.rename(staging, entry)
+        except OSError:
+            # Another worker committed the same key first; keep theirs
+            shutil.rmtree(staging, ignore_errors=True)
+        else:
+            if self.max_bytes is not None:
+                if self._total is None:
+                    self._total = self.stats()["bytes"]  # includes the new entry
+                else:
+                    self._total += self._entry_size(entry)
+                if self._total > self.max_bytes:
+                    self.evict(keep=key)
+        return self._channel_paths(entry, channels)
+
+    def discard(self, staging: str) -> None:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    @staticmethod
+    def _entry_size(entry: Path) -> int:
+        try:
+            return sum(f.stat().st_size for f in entry.iterdir())
+        except OSError:
+            return 0
+
+    def _entries(self) -> List[tuple[float, int, Path]]:
+        out = []
+        for shard in self.root.iterdir():
+            if shard.name == _STAGING or not shard.is_dir():
+                continue
+            for entry in shard.iterdir():
+                try:
+                    out.append((entry.stat().st_mtime, self._entry_size(entry), entry))
+                except OSError:
+                    continue
+        return out
+
+    def evict(self, keep: str | None = None) -> int:
+        """Remove least recently used entries once over `max_bytes`; returns bytes freed."""
+        if self.max_bytes is None:
+            return 0
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        freed = 0
+        if total > self.max_bytes:
+            target = self.max_bytes * _LOW_WATER
+            now = time.time()
+            for mtime, size, entry in sorted(entries, key=lambda e: e[0]):
+                if total - freed <= target:
+                    break
+                if entry.name == keep or now - mtime < _EVICT_GRACE_S:
+                    continue
+                shutil.rmtree(entry, ignore_errors=True)
+                freed += size
+        self._total = total - freed
+        return freed
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        return {"entries": len(entries), "bytes": sum(size for _, size, _ in entries)}
+
+
+__all__ = ["PCMCache", "DEFAULT_MAX_BYTES"]
@@ -0,0 +1,155 @@
+"""Staged pipeline engine for MXToAAF batch runs
+
+Each stage runs in its own small pool of threads and hands items to the
+next stage through a bounded queue, so different files can occupy
+different stages at the same time (one file probing tags while another is
+being decoded by ffmpeg and a third is being written into an AAF). The
+final stage ("report") runs in the calling thread.
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List
+
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage: `func(item)` is called by `workers` threads."""
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+
+class _StageStats:
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.errors = 0
+        self.busy = 0.0
+        self.max_queue_depth = 0
+        self._depth_total = 0
+        self._depth_samples = 0
+        self.lock = threading.Lock()
+
+    def sample_depth(self, depth: int) -> None:
+        with self.lock:
+            self.max_queue_depth = max(self.max_queue_depth, depth)
+            self._depth_total += depth
+            self._depth_samples += 1
+
+    def as_dict(self, wall: float) -> Dict[str, Any]:
+        capacity = wall * self.workers
+        return {
+            "workers": self.workers,
+            "items": self.items,
+            "errors": self.errors,
+            "busy_s": round(self.busy, 3),
+            "utilization": round(self.busy / capacity, 3) if capacity > 0 else 0.0,
+            "max_queue_depth": self.max_queue_depth,
+            "avg_queue_depth": round(self._depth_total / self._depth_samples, 2) if self._depth_samples else 0.0,
+        }
+
+
+def run_pipeline(
+    items: Iterable[Any],
+    stages: List[Stage],
+    on_result: Callable[[Any], None],
+    queue_depth: int = 4,
+) -> Dict[str, Any]:
+    """Push `items` through `stages`, calling `on_result` for each finished item.
+
+    Stage functions mutate/return the item; whatever a stage returns is
+    passed to the next one (``None`` means "pass the same item along").
+    Stage functions are expected to handle their own errors; an exception
+    escaping a stage is counted in that stage's stats and the item is
+    forwarded unchanged so it still reaches `on_result`.
+
+    Returns per-stage statistics (worker count, items, busy time,
+    utilization and input queue depths) plus the overall wall time.
+    """
+    queue_depth = max(1, int(queue_depth))
+    queues = [queue.Queue(maxsize=queue_depth) for _ in range(len(stages) + 1)]
+    stats = [_StageStats(s.name, max(1, int(s.workers))) for s in stages]
+    report_stats = _StageStats("report", 1)
+    remaining = [st.workers for st in stats]
+    remaining_lock = threading.Lock()
+    start = time.time()
+
+    def _put(idx: int, item: Any, st: _StageStats) -> None:
+        q = queues[idx]
+        q.put(item)
+        st.sample_depth(q.qsize())
+
+    def _feed() -> None:
+        first = stats[0] if stats else report_stats
+        try:
+            for item in items:
+                _put(0, item, first)
+        finally:
+            for _ in range(first.workers if stats else 1):
+                queues[0].put(_DONE)
+
+    def _worker(idx: int) -> None:
+        stage, st = stages[idx], stats[idx]
+        nxt = stats[idx + 1] if idx + 1 < len(stats) else report_stats
+        while True:
+            item = queues[idx].get()
+            if item is _DONE:
+                break
+            t0 = time.time()
+            try:
+                out = stage.func(item)
+                if out is not None:
+                    item = out
+            except Exception:
+                with st.lock:
+                    st.errors += 1
+            with st.lock:
+                st.busy += time.time() - t0
+                st.items += 1
+            _put(idx + 1, item, nxt)
+        # Last worker out closes the next stage's input
+        with remaining_lock:
+            remaining[idx] -= 1
+            last = remaining[idx] == 0
+        if last:
+            for _ in range(nxt.workers):
+                queues[idx + 1].put(_DONE)
+
+    threads = [threading.Thread(target=_feed, name="pipeline-feed", daemon=True)]
+    for idx, st in enumerate(stats):
+        for n in range(st.workers):
+            threads.append(threading.Thread(target=_worker, args=(idx,), name=f"pipeline-{st.name}-{n}", daemon=True))
+    for t in threads:
+        t.start()
+
+    final = queues[-1]
+    while True:
+        item = final.get()
+        if item is _DONE:
+            break
+        t0 = time.time()
+        try:
+            on_result(item)
+        except Exception:
+            report_stats.errors += 1
+        report_stats.busy += time.time() - t0
+        report_stats.items += 1
+
+    for t in threads:
+        t.join()
+
+    wall = time.time() - start
+    out = {st.name: st.as_dict(wall) for st in stats}
+    out["report"] = report_stats.as_dict(wall)
+    return {"queue_depth": queue_depth, "wall_s": round(wall, 3), "stages": out}
+
+
+__all__ = ["Stage", "run_pipeline"]
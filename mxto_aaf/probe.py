@@ -0,0 +1,98 @@
+"""ffprobe service for MXToAAF metadata extraction
+
+Files mutagen finds no tags in (untagged WAVs, formats it can't parse,
+or any file when mutagen isn't installed) are read with ffprobe instead.
+That is one process spawn per file, and on a library of untagged WAVs it
+sits on the critical path of every probe. ffprobe only takes one input
+per run, so the spawns can't be batched; instead `ProbeService` bounds
+how many run at once, shared by every thread that asks, and batch runs
+probe their files from a thread pool that size.
+
+The bound is per process: a `--jobs N` run has a service in each worker
+process, so up to N x DEFAULT_PROBE_WORKERS ffprobes can run at once.
+
+The binary is resolved like ffmpeg: the one bundled with a PyInstaller
+build first, then PATH.
+"""
+from __future__ import annotations
+
+import json
+import os
+import subprocess
+import threading
+from typing import Any, Dict
+
+from .utils import _get_ffprobe_path
+
+# Concurrent ffprobe processes per service, i.e. per process (they mostly wait on I/O)
+DEFAULT_PROBE_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+
+
+def probe_format(path: str, ffprobe: str | None = None) -> Dict[str, Any] | None:
+    """Run ffprobe on `path` and return its "format" section (tags,
+    duration, ...), or None if ffprobe is missing or can't read the file."""
+    ffprobe = ffprobe or _get_ffprobe_path()
+    if not ffprobe:
+        return None
+    cmd = [ffprobe, "-v", "quiet", "-print_format", "json", "-show_format", "-show_entries", "format_tags", path]
+
+    # On Windows, hide the console window to prevent flashing cmd.exe windows
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True, check=True, startupinfo=startupinfo)
+        j = json.loads(proc.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+    fmt = j.get("format") if isinstance(j, dict) else None
+    return fmt if isinstance(fmt, dict) else None
+
+
+class ProbeService:
+    """Runs at most `workers` ffprobe processes at a time in this process.
+
+    `probe()` may be called from any number of threads (pipeline probe
+    stage, duration scheduling, batch workers); callers beyond the limit
+    wait for a slot. Other processes (pool workers) have their own
+    service and their own limit. The ffprobe path is resolved once.
+    """
+
+    def __init__(self, workers: int = DEFAULT_PROBE_WORKERS, ffprobe: str | None = None):
+        self.workers = max(1, int(workers))
+        self.ffprobe = ffprobe or _get_ffprobe_path()
+        self.runs = 0
+        self._slots = threading.BoundedSemaphore(self.workers)
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return self.ffprobe is not None
+
+    def probe(self, path: str) -> Dict[str, Any] | None:
+        """ffprobe's "format" section for `path` (see `probe_format`)."""
+        if not self.ffprobe:
+            return None
+        with self._slots:
+            with self._lock:
+                self.runs += 1
+            return probe_format(path, self.ffprobe)
+
+
+_default_service: ProbeService | None = None
+_default_lock = threading.Lock()
+
+
+def default_probe_service() -> ProbeService:
+    """The per-process service `extract_music_metadata` uses."""
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            _default_service = ProbeService()
+        return _default_service
+
+
+__all__ = ["DEFAULT_PROBE_WORKERS", "ProbeService", "default_probe_service", "probe_format"]
@@ -0,0 +1,174 @@
+"""Batch report writers and shard report merging for MXToAAF
+
+`process_directory` writes its JSON log and CSV reports through the
+helpers here. `merge_reports` (CLI: ``mxtoaaf merge``) combines the
+reports written by several ``--shard i/N`` runs into one.
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+from typing import Any, Dict, List
+
+RESULT_COLUMNS = ["input", "output", "status", "error", "duration_s", "conversion"]
+
+# (CSV column, result["metadata"] key)
+METADATA_COLUMNS = [
+    ("Track Name", "track_name"),
+    ("Track", "track"),
+    ("Total Tracks", "total_tracks"),
+    ("Genre", "genre"),
+    ("Artist", "artist"),
+    ("Album Artist", "album_artist"),
+    ("Talent", "talent"),
+    ("Composer", "composer"),
+    ("Source", "source"),
+    ("Album", "album"),
+    ("Catalog #", "catalog_number"),
+    ("Description", "description"),
+    ("Duration", "duration"),
+]
+
+
+def _result_row(r: Dict[str, Any]) -> List[Any]:
+    return [
+        r.get("input"),
+        r.get("output"),
+        r.get("status"),
+        r.get("error"),
+        f"{float(r.get('duration') or 0.0):.3f}",
+        r.get("conversion"),
+    ]
+
+
+def write_json_log(summary: Dict[str, Any], path: str) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+
+
+def write_results_csv(results: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_COLUMNS)
+        for r in results:
+            writer.writerow(_result_row(r))
+
+
+def write_metadata_csv(results: List[Dict[str, Any]], path: str) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(RESULT_COLUMNS + [col for col, _ in METADATA_COLUMNS])
+        for r in results:
+            md = r.get("metadata") or {}
+            writer.writerow(_result_row(r) + [md.get(key) for _, key in METADATA_COLUMNS])
+
+
+def count_conversions(results: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Count results by conversion path (direct / repack / transcode)."""
+    counts: Dict[str, int] = {}
+    for r in results:
+        if r.get("conversion"):
+            counts[r["conversion"]] = counts.get(r["conversion"], 0) + 1
+    return counts
+
+
+def summarize(results: List[Dict[str, Any]], total_duration: float = 0.0) -> Dict[str, Any]:
+    """Build the standard summary dict (counts + failed files) for `results`."""
+    return {
+        "results": results,
+        "success_count": sum(1 for r in results if r.get("status") == "success"),
+        "failed_count": sum(1 for r in results if r.get("status") == "failed"),
+        "skipped_count": sum(1 for r in results if r.get("status") == "skipped"),
+        "conversions": count_conversions(results),
+        "total_duration": total_duration,
+        "failed_files": [
+            {"file": r.get("input"), "error": r.get("error")} for r in results if r.get("status") == "failed"
+        ],
+    }
+
+
+def _load_csv_results(path: str) -> List[Dict[str, Any]]:
+    columns = dict(METADATA_COLUMNS)
+    results = []
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            md = {key: (row.get(col) or None) for col, key in columns.items() if col in row}
+            results.append({
+                "input": row.get("input"),
+                "output": row.get("output") or None,
+                "status": row.get("status"),
+                "error": row.get("error") or None,
+                "duration": float(row.get("duration_s") or 0.0),
+                "metadata": md or None,
+                "conversion": row.get("conversion") or None,
+            })
+    return results
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    """Load a JSON log or a results/metadata CSV written by a batch run."""
+    if path.lower().endswith(".csv"):
+        results = _load_csv_results(path)
+        return summarize(results)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def merge_reports(
+    paths: List[str],
+    log_file: str | None = None,
+    export_csv: str | None = None,
+    export_metadata_csv: str | None = None,
+) -> Dict[str, Any]:
+    """Merge per-shard reports into one summary (and optionally write it out).
+
+    Results are de-duplicated by input path (a later report wins, so a
+    re-run shard overrides its earlier attempt) and sorted by input path.
+    The merged duration is the longest shard's, since shards run side by side.
+    """
+    by_input: Dict[str, Dict[str, Any]] = {}
+    longest = 0.0
+    for path in paths:
+        report = load_report(path)
+        longest = max(longest, float(report.get("total_duration") or 0.0))
+        for r in report.get("results", []):
+            by_input[r.get("input")] = r
+
+    merged = summarize([by_input[k] for k in sorted(by_input)], longest)
+    merged["merged_from"] = list(paths)
+
+    if log_file:
+        write_json_log(merged, log_file)
+    if export_csv:
+        write_results_csv(merged["results"], export_csv)
+    if export_metadata_csv:
+        write_metadata_csv(merged["results"], export_metadata_csv)
+    return merged
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="mxtoaaf merge", description="Merge per-shard batch logs/CSVs into one report")
+    parser.add_argument("reports", nargs="+", help="JSON logs or CSV reports from --shard runs")
+    parser.add_argument("--log-file", help="write the merged JSON log here")
+    parser.add_argument("--export-csv", help="write the merged per-file results CSV here")
+    parser.add_argument("--export-metadata-csv", help="write the merged metadata CSV here")
+    args = parser.parse_args(argv)
+
+    merged = merge_reports(args.reports, args.log_file, args.export_csv, args.export_metadata_csv)
+    print(f"Merged {len(args.reports)} reports: {len(merged['results'])} files")
+    print(f"✓ Success:      {merged['success_count']}")
+    print(f"⊘ Skipped:      {merged['skipped_count']}")
+    print(f"✗ Failed:       {merged['failed_count']}")
+    return 0 if merged["failed_count"] == 0 else 1
+
+
+__all__ = [
+    "write_json_log",
+    "write_results_csv",
+    "write_metadata_csv",
+    "summarize",
+    "count_conversions",
+    "load_report",
+    "merge_reports",
+]
@@ -0,0 +1,180 @@
+"""Work ordering for MXToAAF batch runs
+
+With several workers, the order in which files are handed out decides
+how long the run takes: a 70-minute suite picked up last keeps one worker
+busy long after the others have gone idle. Ordering work largest-first
+(LPT scheduling) avoids that tail.
+
+Policies:
+    discovery  - directory-walk order (default)
+    size       - largest input file first (one stat per file)
+    duration   - longest probed duration first (reads tags/headers; falls
+                 back to size for files whose length can't be read)
+
+`MemoryBudget` is the matching admission control: each conversion is
+charged a fixed working set plus a few copies of one essence chunk
+(essence is streamed in fixed-size chunks, so memory barely grows with
+track length), and work is only admitted while the estimated peaks of
+everything in flight fit in the configured budget.
+"""
+from __future__ import annotations
+
+import heapq
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from .metadata import extract_music_metadata
+
+SCHEDULE_POLICIES = ("discovery", "size", "duration")
+
+# Rough bytes per second of audio, used to turn file sizes into seconds
+# when a duration can't be probed (typical compressed-music bitrate)
+_FALLBACK_BYTES_PER_SECOND = 32000
+
+# Decoded PCM as written by the ffmpeg decode: 48 kHz, 16-bit, stereo
+PCM_BYTES_PER_SECOND = 48000 * 2 * 2
+
+# Essence is read, split and written in chunks of this many frames
+# (convert.PCMFileReader, utils.PCMPipe)
+ESSENCE_CHUNK_FRAMES = 48000
+
+# Widest frame budgeted for: 8 channels of 32-bit PCM
+_MAX_FRAME_BYTES = 8 * 4
+
+# Live copies of a chunk: the read buffer, its per-channel split, aaf2's write buffer
+PEAK_CHUNK_COPIES = 3
+
+# Per-conversion working set besides the chunks: aaf2's object tree,
+# decoder pipes and metadata (a 10-minute track peaked ~10 MB above an
+# idle interpreter)
+JOB_OVERHEAD_BYTES = 16 * 1024 * 1024
+
+# What does grow with length: the AAF's sector tables, measured at ~0.6%
+# of the essence and budgeted at 1% (rounded up as a safety margin)
+_TABLE_BYTES_PER_PCM_BYTE = 0.01
+
+_PCM_SUFFIXES = {".wav", ".aif", ".aiff"}
+
+
+def _size_cost(p: Path) -> float:
+    try:
+        return os.path.getsize(p) / _FALLBACK_BYTES_PER_SECOND
+    except OSError:
+        return 0.0
+
+
+def _duration_cost(p: Path, metadata_cache=None) -> float:
+    try:
+        duration = extract_music_metadata(str(p), cache=metadata_cache).duration
+    except Exception:
+        duration = None
+    return float(duration) if duration else _size_cost(p)
+
+
+def estimate_costs(paths: Iterable[Path], policy: str, probe_threads: int = 8,
+                   metadata_cache=None) -> Dict[Path, float]:
+    """Estimate the relative cost (in approximate audio seconds) of each file."""
+    paths = list(paths)
+    if policy == "duration":
+        with ThreadPoolExecutor(max_workers=max(1, probe_threads)) as pool:
+            costs = pool.map(lambda p: _duration_cost(p, metadata_cache), paths)
+            return dict(zip(paths, costs))
+    return {p: _size_cost(p) for p in paths}
+
+
+def estimate_peak_memory(p: Path, duration: float | None = None) -> int:
+    """Estimated peak bytes needed to convert `p`.
+
+    JOB_OVERHEAD_BYTES plus PEAK_CHUNK_COPIES essence chunks, plus the
+    AAF's sector tables, the only part that grows with the decoded PCM
+    size. That size comes from `duration` when the caller already probed
+    it, otherwise from the file size, so admission never reads tags on the
+    dispatching thread.
+    """
+    if duration:
+        pcm = float(duration) * PCM_BYTES_PER_SECOND
+    elif p.suffix.lower() in _PCM_SUFFIXES:
+        try:
+            pcm = os.path.getsize(p)  # already PCM
+        except OSError:
+            pcm = 0
+    else:
+        pcm = _size_cost(p) * PCM_BYTES_PER_SECOND
+    chunks = PEAK_CHUNK_COPIES * ESSENCE_CHUNK_FRAMES * _MAX_FRAME_BYTES
+    return int(JOB_OVERHEAD_BYTES + chunks + pcm * _TABLE_BYTES_PER_PCM_BYTE)
+
+
+def parse_size(spec: str) -> int:
+    """Parse a size like "8G", "512M", "1.5GB" or plain bytes."""
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([KMGT]?)I?B?\s*", str(spec).upper())
+    if not m:
+        raise ValueError(f"invalid size {spec!r}: expected e.g. 8G or 512M")
+    power = " KMGT".index(m.group(2) or " ")
+    return int(float(m.group(1)) * 1024 ** power)
+
+
+class MemoryBudget:
+    """Admit work while the sum of estimated peaks stays within `limit` bytes.
+
+    A single item bigger than the whole budget is still admitted once
+    nothing else is running, so oversized files run alone rather than never.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = int(limit)
+        self.in_use = 0
+        self.peak = 0
+        self.waits = 0
+        self._cond = threading.Condition()
+
+    def _fits(self, n: int) -> bool:
+        return self.in_use == 0 or self.in_use + n <= self.limit
+
+    def _take(self, n: int) -> None:
+        self.in_use += n
+        self.peak = max(self.peak, self.in_use)
+
+    def try_acquire(self, n: int) -> bool:
+        with self._cond:
+            if not self._fits(n):
+                return False
+            self._take(n)
+            return True
+
+    def acquire(self, n: int) -> None:
+        with self._cond:
+            if not self._fits(n):
+                self.waits += 1
+                self._cond.wait_for(lambda: self._fits(n))
+            self._take(n)
+
+    def release(self, n: int) -> None:
+        with self._cond:
+            self.in_use = max(0, self.in_use - n)
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        return {"budget_bytes": self.limit, "peak_admitted_bytes": self.peak, "waits": self.waits}
+
+
+def simulate_makespan(costs: List[float], workers: int) -> float:
+    """Makespan of handing `costs` out in order to the least-loaded worker."""
+    loads = [0.0] * max(1, workers)
+    heapq.heapify(loads)
+    for c in costs:
+        heapq.heappush(loads, heapq.heappop(loads) + c)
+    return max(loads) if loads else 0.0
+
+
+__all__ = [
+    "SCHEDULE_POLICIES",
+    "MemoryBudget",
+    "estimate_costs",
+    "estimate_peak_memory",
+    "parse_size",
+    "simulate_makespan",
+]
@@ -0,0 +1,94 @@
+"""Header-only (ranged) tag reading for MXToAAF
+
+Tags and stream headers are a tiny part of a file, and mutagen already
+reaches them by seeking: straight to the ID3v2 header and the ID3v1 /
+appended-tag footer, along RIFF/AIFF chunk headers, and down the MP4
+atom headers to moov/udta/meta/ilst (and the audio track's mdhd) without
+reading the atoms in between. Opened by path, though, each of those small
+reads goes through Python's buffered reader, which fetches st_blksize
+bytes at a time (often 1 MiB on SMB/NFS mounts), plus the OS's own
+read-ahead. An M4A whose moov sits at the end of the file then pulls
+megabytes over the network for a few hundred bytes of tags.
+
+`open_ranged()` hands mutagen a file that reads in `READ_BLOCK` blocks,
+with read-ahead turned off where the OS allows it, and counts the bytes
+it actually reads, so metadata-only scans transfer kilobytes per file.
+"""
+from __future__ import annotations
+
+import io
+import os
+from contextlib import contextmanager
+from typing import Any, Iterator, Tuple
+
+try:
+    from mutagen import File as MutagenFile
+except Exception:  # pragma: no cover - optional dependency
+    MutagenFile = None
+
+# Smallest read issued; header reads closer together than this share one
+READ_BLOCK = 4096
+
+
+class CountingReader(io.RawIOBase):
+    """Unbuffered file that counts the bytes (and read calls) it serves."""
+
+    def __init__(self, path: str):
+        self._f = open(path, "rb", buffering=0)
+        self.name = path  # mutagen also scores formats by file name
+        self.bytes_read = 0
+        self.reads = 0
+        if hasattr(os, "posix_fadvise"):
+            try:
+                os.posix_fadvise(self._f.fileno(), 0, 0, os.POSIX_FADV_RANDOM)
+            except OSError:
+                pass
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = self._f.readinto(b)
+        if n:
+            self.bytes_read += n
+            self.reads += 1
+        return n
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._f.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._f.tell()
+
+    def close(self) -> None:
+        self._f.close()
+        super().close()
+
+
+@contextmanager
+def open_ranged(path: str, block: int = READ_BLOCK) -> Iterator[Tuple[io.BufferedReader, CountingReader]]:
+    """Open `path` for small ranged reads; yields (file, counter)."""
+    raw = CountingReader(path)
+    f = io.BufferedReader(raw, buffer_size=block)
+    try:
+        yield f, raw
+    finally:
+        f.close()
+
+
+def read_tags(path: str, block: int = READ_BLOCK) -> Tuple[Any, int]:
+    """mutagen's `File(path, easy=True)` read with ranged reads.
+
+    Returns (mutagen file or None, bytes read from `path`).
+    """
+    if MutagenFile is None:
+        return None, 0
+    with open_ranged(path, block) as (f, counter):
+        audio = MutagenFile(f, easy=True)
+    return audio, counter.bytes_read
+
+
+__all__ = ["READ_BLOCK", "CountingReader", "open_ranged", "read_tags"]
@@ -5,38 +5,53 @@ import os
 import shutil
 import subprocess
 import sys
+import tempfile
 
 
-def _get_ffmpeg_path() -> str | None:
-    """Get path to ffmpeg, checking bundled version first, then system PATH.
+def _get_tool_path(name: str) -> str | None:
+    """Get path to an ffmpeg-suite binary, checking bundled version first, then system PATH.
     
-    When built with PyInstaller, ffmpeg is bundled in the 'binaries' directory
-    relative to the executable. Fall back to system PATH if not found.
+    When built with PyInstaller, ffmpeg and ffprobe are bundled in the
+    'binaries' directory relative to the executable. Fall back to system
+    PATH if not found.
     """
-    # Check for bundled FFmpeg (set by PyInstaller via --add-data)
+    # Check for bundled binary (set by PyInstaller via --add-data)
     if getattr(sys, 'frozen', False):
         # App is running as PyInstaller bundle
         base_path = sys._MEIPASS
         
-        # Check platform-specific bundled FFmpeg
+        # Check platform-specific bundled binary
         if os.name == 'nt':  # Windows
-            bundled_ffmpeg = os.path.join(base_path, 'binaries', 'ffmpeg.exe')
+            bundled = os.path.join(base_path, 'binaries', name + '.exe')
         else:  # macOS, Linux
-            bundled_ffmpeg = os.path.join(base_path, 'binaries', 'ffmpeg')
+            bundled = os.path.join(base_path, 'binaries', name)
         
-        if os.path.isfile(bundled_ffmpeg):
-            return bundled_ffmpeg
+        if os.path.isfile(bundled):
+            return bundled
     
     # Fall back to system PATH
-    system_ffmpeg = shutil.which("ffmpeg")
-    return system_ffmpeg
+    return shutil.which(name)
+
+
+def _get_ffmpeg_path() -> str | None:
+    return _get_tool_path("ffmpeg")
+
+
+def _get_ffprobe_path() -> str | None:
+    return _get_tool_path("ffprobe")
 
 
 def ffmpeg_available() -> bool:
     return _get_ffmpeg_path() is not None
 
 
-def convert_to_wav(src_path: str, dst_path: str, samplerate: int = 48000, bits: int = 24, channels: int = 2) -> None:
+def _pcm_codec(bits: int) -> str:
+    if bits not in (16, 24, 32):
+        raise ValueError(f"unsupported bit depth: {bits} (expected 16, 24 or 32)")
+    return f"pcm_s{bits}le"
+
+
+def convert_to_wav(src_path: str, dst_path: str, samplerate: int = 48000, bits: int = 16, channels: int = 2) -> None:
     if not ffmpeg_available():
         raise FileNotFoundError("ffmpeg not available in PATH")
 
@@ -44,55 +59,337 @@ def convert_to_wav(src_path: str, dst_path: str, samplerate: int = 48000, bits:
     
     # Force standard PCM WAV format (not EXTENSIBLE)
     # -write_cue 0: Don't add cue points
-    # The key is to use -acodec pcm_s16le for 16-bit or pcm_s24le for 24-bit
-    # and avoid extensible format by using 16-bit as fallback if needed
+    # The key is to use -acodec pcm_s16le for 16-bit or pcm_s24le for 24-bit;
+    # the wav muxer only switches to EXTENSIBLE for more than 2 channels
     cmd = [
         ffmpeg_path,
         "-y",                    # Overwrite output file
         "-i", src_path,         # Input file (auto-detect format)
         "-f", "wav",            # Force output format to WAV
-        "-acodec", "pcm_s16le",  # Use 16-bit PCM (more compatible, standard format)
-        "-ar", "48000",          # 48kHz sample rate
-        "-ac", "2",              # Stereo
+        "-acodec", _pcm_codec(bits),
+        "-ar", str(samplerate),
+        "-ac", str(channels),
         dst_path,               # Output file
     ]
 
+    _run_ffmpeg(cmd, src_path)
+
+    # Verify output file was created
+    if not os.path.exists(dst_path):
+        raise RuntimeError(f"FFmpeg produced no output file at {dst_path}")
+
+    file_size = os.path.getsize(dst_path)
+    if file_size < 100:  # Sanity check - WAV file should be much larger
+        raise RuntimeError(f"FFmpeg output file is suspiciously small ({file_size} bytes) - conversion likely failed")
+
+    # Make sure the data is on disk before anyone else opens it (this used
+    # to be a fixed half-second sleep, especially for Windows)
+    fsync_path(dst_path)
+
+
+def fsync_path(path: str) -> None:
+    """Flush a finished file to stable storage.
+
+    Opened for writing: Windows' fsync (_commit) fails on a read-only
+    descriptor, and Windows is where the old post-write sleep was needed.
+    """
+    fd = os.open(path, os.O_RDWR | getattr(os, "O_BINARY", 0))
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+# ffmpeg channel layout names for channelsplit, by channel count
+_CHANNEL_LAYOUTS = {1: "mono", 2: "stereo", 3: "2.1", 4: "quad", 6: "5.1", 8: "7.1"}
+
+
+def _split_graph(index: int, channels: int, samplerate: int) -> tuple[str, list[str]]:
+    """filter_complex fragment splitting input `index` into mono outputs.
+
+    Returns the fragment and its output labels in channel order.
+    """
+    if channels < 1:
+        raise ValueError(f"unsupported channel count for split: {channels}")
+    layout = _CHANNEL_LAYOUTS.get(channels)
+    split = "".join(f"[s{index}_{i}]" for i in range(1, channels + 1))
+    if layout is not None:
+        parts = [f"[{index}:a]aresample={samplerate},aformat=channel_layouts={layout},"
+                 f"channelsplit=channel_layout={layout}{split}"]
+        picks = ["c0"] * channels
+    else:
+        # No named layout (5, 7, 9+ channels): copy the stream and pick
+        # each channel by position
+        parts = [f"[{index}:a]aresample={samplerate},asplit={channels}{split}"]
+        picks = [f"c{i}" for i in range(channels)]
+    # channelsplit outputs keep their speaker position (FL, FR, ...), which
+    # the wav muxer writes as WAVE_FORMAT_EXTENSIBLE; pan them to plain mono
+    labels = []
+    for i, pick in enumerate(picks, start=1):
+        parts.append(f"[s{index}_{i}]pan=mono|c0={pick}[o{index}_{i}]")
+        labels.append(f"[o{index}_{i}]")
+    return ";".join(parts), labels
+
+
+def split_to_mono_wavs(
+    src_path: str,
+    dst_prefix: str,
+    channels: int = 2,
+    samplerate: int = 48000,
+    bits: int = 16,
+) -> list[str]:
+    """Decode `src_path` straight into one mono PCM WAV per channel.
+
+    A single ffmpeg run resamples, forces the channel layout and splits it
+    (``channelsplit``), writing ``<dst_prefix>.ch1.wav``, ``.ch2.wav``, ...
+    These can be imported as-is by `create_music_aaf(channel_wavs=...)`, so
+    no interleaved WAV is written and nothing is deinterleaved in Python.
+    Returns the per-channel paths in channel order.
+    """
+    if not ffmpeg_available():
+        raise FileNotFoundError("ffmpeg not available in PATH")
+    graph, labels = _split_graph(0, channels, samplerate)
+
+    outputs = [f"{dst_prefix}.ch{i}.wav" for i in range(1, channels + 1)]
+    cmd = [_get_ffmpeg_path(), "-y", "-i", src_path, "-filter_complex", graph]
+    for label, out in zip(labels, outputs):
+        cmd += ["-map", label, "-f", "wav", "-acodec", _pcm_codec(bits), out]
+
+    try:
+        _run_ffmpeg(cmd, src_path)
+        for out in outputs:
+            if not os.path.exists(out) or os.path.getsize(out) < 44:
+                raise RuntimeError(f"FFmpeg produced no usable output at {out}")
+    except Exception:
+        for out in outputs:
+            try:
+                os.remove(out)
+            except OSError:
+                pass
+        raise
+    return outputs
+
+
+def split_many_to_mono_wavs(
+    items: list[tuple[str, str]],
+    channels: int = 2,
+    samplerate: int = 48000,
+    bits: int = 16,
+) -> list[list[str] | Exception]:
+    """`split_to_mono_wavs` for many (src_path, dst_prefix) pairs in one ffmpeg run.
+
+    Spawning ffmpeg costs more than decoding a short clip, so short files
+    are given to a single invocation (one ``-i`` and one channelsplit
+    graph per input, one output per channel). If that run fails, each
+    input is retried on its own so one bad file only fails itself.
+    Returns, per item, the per-channel paths or the exception it raised.
+    """
+    if not items:
+        return []
+    if len(items) == 1:
+        try:
+            return [split_to_mono_wavs(items[0][0], items[0][1], channels, samplerate, bits)]
+        except Exception as e:
+            return [e]
+    if not ffmpeg_available():
+        raise FileNotFoundError("ffmpeg not available in PATH")
+
+    cmd = [_get_ffmpeg_path(), "-y"]
+    for src_path, _ in items:
+        cmd += ["-i", src_path]
+    graphs, maps, outputs = [], [], []
+    for index, (_, dst_prefix) in enumerate(items):
+        graph, labels = _split_graph(index, channels, samplerate)
+        graphs.append(graph)
+        paths = [f"{dst_prefix}.ch{i}.wav" for i in range(1, channels + 1)]
+        outputs.append(paths)
+        for label, out in zip(labels, paths):
+            maps += ["-map", label, "-f", "wav", "-acodec", _pcm_codec(bits), out]
+    cmd += ["-filter_complex", ";".join(graphs)] + maps
+
+    try:
+        _run_ffmpeg(cmd, f"{len(items)} files")
+        for paths in outputs:
+            for out in paths:
+                if not os.path.exists(out) or os.path.getsize(out) < 44:
+                    raise RuntimeError(f"FFmpeg produced no usable output at {out}")
+        return outputs
+    except Exception:
+        pass
+
+    results: list[list[str] | Exception] = []
+    for src_path, dst_prefix in items:
+        try:
+            results.append(split_to_mono_wavs(src_path, dst_prefix, channels, samplerate, bits))
+        except Exception as e:
+            results.append(e)
+    return results
+
+
+# ffmpeg's mxf_opatom muxer only writes 48 kHz, 16/24-bit PCM audio
+MXF_SAMPLERATE = 48000
+MXF_BITS = (16, 24)
+
+
+def _mxf_edit_rate(fps: float) -> str:
+    """Rational edit rate for `fps`, treating 23.976/29.97/59.94 as NTSC (x/1001)."""
+    ntsc = round(fps * 1.001)
+    if abs(fps - ntsc / 1.001) < 0.005:
+        return f"{ntsc * 1000}/1001"
+    if float(fps).is_integer():
+        return str(int(fps))
+    return f"{round(fps * 1000)}/1000"
+
+
+def split_to_opatom_mxfs(
+    src_path: str,
+    dst_prefix: str,
+    channels: int = 2,
+    bits: int = 16,
+    fps: float = 24.0,
+) -> list[str]:
+    """Decode `src_path` into one mono OP-Atom MXF per channel, as Avid MediaFiles stores audio.
+
+    Same single ffmpeg run as `split_to_mono_wavs`, but each channel goes
+    to ffmpeg's ``mxf_opatom`` muxer as ``<dst_prefix>.ch1.mxf``, ...
+    (always 48 kHz; 16 or 24-bit). The audio edit rate follows `fps` so
+    the media lines up with the project's frames. Link them with
+    `create_music_aaf(channel_wavs=..., link=True)`.
+    Returns the per-channel paths in channel order.
+    """
+    if bits not in MXF_BITS:
+        raise ValueError(f"OP-Atom MXF audio must be 16 or 24-bit, not {bits}")
+    if not ffmpeg_available():
+        raise FileNotFoundError("ffmpeg not available in PATH")
+    graph, labels = _split_graph(0, channels, MXF_SAMPLERATE)
+
+    name = os.path.basename(dst_prefix)
+    outputs = [f"{dst_prefix}.ch{i}.mxf" for i in range(1, channels + 1)]
+    cmd = [_get_ffmpeg_path(), "-y", "-i", src_path, "-filter_complex", graph]
+    for label, out in zip(labels, outputs):
+        cmd += ["-map", label, "-f", "mxf_opatom", "-mxf_audio_edit_rate", _mxf_edit_rate(fps),
+                "-metadata", f"material_package_name={name}", "-acodec", _pcm_codec(bits), out]
+
+    try:
+        _run_ffmpeg(cmd, src_path)
+        for out in outputs:
+            if not os.path.exists(out) or os.path.getsize(out) == 0:
+                raise RuntimeError(f"FFmpeg produced no usable output at {out}")
+    except Exception:
+        for out in outputs:
+            try:
+                os.remove(out)
+            except OSError:
+                pass
+        raise
+    return outputs
+
+
+def _ffmpeg_env(ffmpeg_path: str) -> dict:
     # On Windows, add the binaries directory to PATH so FFmpeg can find DLLs
     env = os.environ.copy()
     if os.name == 'nt' and getattr(sys, 'frozen', False):
         binaries_dir = os.path.dirname(ffmpeg_path)
         env['PATH'] = binaries_dir + os.pathsep + env.get('PATH', '')
+    return env
+
+
+def _hidden_startupinfo():
+    # On Windows, hide the console window to prevent flashing cmd.exe windows
+    startupinfo = None
+    if os.name == 'nt':
+        startupinfo = subprocess.STARTUPINFO()
+        startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+        startupinfo.wShowWindow = subprocess.SW_HIDE
+    return startupinfo
+
+
+def _run_ffmpeg(cmd: list[str], src_path: str) -> None:
     try:
-        # On Windows, hide the console window to prevent flashing cmd.exe windows
-        startupinfo = None
-        if os.name == 'nt':
-            startupinfo = subprocess.STARTUPINFO()
-            startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-            startupinfo.wShowWindow = subprocess.SW_HIDE
-        
         # Don't suppress output initially - capture both stderr and stdout for debugging
-        result = subprocess.run(cmd, check=False, capture_output=True, text=True, env=env, startupinfo=startupinfo)
+        result = subprocess.run(cmd, check=False, capture_output=True, text=True,
+                                env=_ffmpeg_env(cmd[0]), startupinfo=_hidden_startupinfo())
         
         if result.returncode != 0:
             # FFmpeg failed
             error_msg = result.stderr + result.stdout if (result.stderr or result.stdout) else f"FFmpeg exited with code {result.returncode}"
             raise RuntimeError(f"FFmpeg failed to convert {src_path}: {error_msg}")
-        
-        # Verify output file was created
-        if not os.path.exists(dst_path):
-            raise RuntimeError(f"FFmpeg produced no output file at {dst_path}")
-        
-        file_size = os.path.getsize(dst_path)
-        if file_size < 100:  # Sanity check - WAV file should be much larger
-            raise RuntimeError(f"FFmpeg output file is suspiciously small ({file_size} bytes) - conversion likely failed")
-        
-        # Wait a moment for file system to flush the data (especially important on Windows)
-        import time
-        time.sleep(0.5)
             
     except subprocess.CalledProcessError as e:
         error_msg = e.stderr or e.stdout or str(e)
         raise RuntimeError(f"FFmpeg failed to convert {src_path}: {error_msg}") from e
 
 
-__all__ = ["ffmpeg_available", "convert_to_wav"]
+class PCMPipe:
+    """Raw interleaved PCM decoded by ffmpeg and read from its stdout.
+
+    Nothing runs until the pipe is iterated; each iteration starts ffmpeg
+    and yields chunks of about `chunk_frames` frames, so a track can be
+    streamed into AAF essence without a temp WAV ever touching disk.
+    """
+
+    def __init__(
+        self,
+        src_path: str,
+        samplerate: int = 48000,
+        channels: int = 2,
+        chunk_frames: int = 48000,
+        bits: int = 16,
+    ):
+        self.src_path = src_path
+        self.samplerate = samplerate
+        self.channels = channels
+        self.chunk_frames = chunk_frames
+        self.codec = _pcm_codec(bits)
+        self.sampwidth = bits // 8
+
+    def __iter__(self):
+        if not ffmpeg_available():
+            raise FileNotFoundError("ffmpeg not available in PATH")
+        ffmpeg_path = _get_ffmpeg_path()
+        cmd = [
+            ffmpeg_path,
+            "-v", "error",
+            "-nostdin",
+            "-i", self.src_path,
+            "-f", self.codec[4:],
+            "-acodec", self.codec,
+            "-ar", str(self.samplerate),
+            "-ac", str(self.channels),
+            "pipe:1",
+        ]
+        # stderr goes to a temp file, not a pipe: nobody reads a pipe until
+        # stdout ends, so a decoder repeating warnings on a corrupt input
+        # would fill it and block ffmpeg (and us) forever
+        errfile = tempfile.TemporaryFile()
+        proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=errfile,
+                                env=_ffmpeg_env(ffmpeg_path), startupinfo=_hidden_startupinfo())
+        chunk_bytes = self.chunk_frames * self.channels * self.sampwidth
+        try:
+            while True:
+                data = proc.stdout.read(chunk_bytes)
+                if not data:
+                    break
+                yield data
+            if proc.wait() != 0:
+                errfile.seek(0)
+                err = errfile.read().decode("utf-8", "replace").strip()
+                raise RuntimeError(f"FFmpeg failed to decode {self.src_path}: {err or proc.returncode}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+                proc.wait()
+            proc.stdout.close()
+            errfile.close()
+
+
+__all__ = [
+    "ffmpeg_available",
+    "convert_to_wav",
+    "split_to_mono_wavs",
+    "split_many_to_mono_wavs",
+    "fsync_path",
+    "PCMPipe",
+]
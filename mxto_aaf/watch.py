@@ -0,0 +1,451 @@
+"""Watch-folder mode for MXToAAF (``mxtoaaf watch <src> --output <dir>``)
+
+Keeps running, converting audio that appears or changes under a delivery
+folder:
+
+- change detection uses inotify on Linux (via ctypes, no extra
+  dependency) and falls back to periodic directory scans elsewhere
+- a file is only converted once its size and mtime have stopped changing
+  for `settle` seconds, so half-copied deliveries are left alone
+- conversions run through the same per-file steps and options as batch
+  mode (conversion target, duration policy, metadata and decoded-PCM
+  caches) on a warm worker pool, so per-file latency is just decode + write
+- a worker process that dies (e.g. OOM-killed) is replaced; the files it
+  took down are retried one at a time, so only the culprit fails
+- the batch build cache (see `mxto_aaf.cache`) in the output root means
+  restarts only convert files that are new or changed since last time
+"""
+from __future__ import annotations
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import re
+import select
+import struct
+import sys
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Callable, Dict, Set
+
+from .batch import (
+    SUPPORTED,
+    _cache_key,
+    _cache_options,
+    _iter_audio_files,
+    _new_result,
+    _open_metadata_cache,
+    _process_single_file,
+    default_jobs,
+)
+from .cache import BuildCache, CACHE_FILENAME
+from .convert import ConversionTarget, parse_target_value
+from .metacache import default_metadata_cache_path
+from .metadata import DURATION_POLICIES
+from .pcmcache import DEFAULT_MAX_BYTES, PCMCache
+from .schedule import parse_size
+from .utils import ffmpeg_available
+
+# inotify event bits (linux/inotify.h)
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_DELETE_SELF = 0x00000400
+_IN_Q_OVERFLOW = 0x00004000
+_IN_IGNORED = 0x00008000
+_IN_ISDIR = 0x40000000
+_WATCH_MASK = _IN_MODIFY | _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")
+
+# Per-channel WAVs a decode writes next to its output (`<stem>.tmp.ch1.wav`,
+# ...; see batch._decode_step and the single-file CLI)
+_TEMP_WAV = re.compile(r"\.tmp\.ch\d+\.wav$", re.IGNORECASE)
+
+
+class _PollingWatcher:
+    """Portable fallback: rescan the tree and diff (size, mtime) snapshots."""
+
+    def __init__(self, src: Path, recursive: bool = True, interval: float = 2.0):
+        self.src = src
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, tuple]:
+        snap = {}
+        for p in _iter_audio_files(self.src, recursive=self.recursive):
+            try:
+                st = p.stat()
+            except OSError:
+                continue
+            snap[p] = (st.st_size, st.st_mtime_ns)
+        return snap
+
+    def changes(self, timeout: float) -> Set[Path]:
+        time.sleep(min(timeout, self.interval))
+        snap = self._scan()
+        changed = {p for p, sig in snap.items() if self._snapshot.get(p) != sig}
+        self._snapshot = snap
+        return changed
+
+    def close(self) -> None:
+        pass
+
+
+class _InotifyWatcher:
+    """Linux inotify watcher with one watch per directory (added as they appear)."""
+
+    def __init__(self, src: Path, recursive: bool = True):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._libc = libc
+        self.src = src
+        self.recursive = recursive
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, Path] = {}
+        self._add_tree(src)
+
+    def _add_dir(self, d: Path) -> None:
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(d)), _WATCH_MASK)
+        if wd >= 0:
+            self._dirs[wd] = d
+
+    def _add_tree(self, root: Path) -> Set[Path]:
+        """Watch `root` (and subdirectories) and return audio files already inside."""
+        self._add_dir(root)
+        found = set()
+        stack = [root]
+        while stack:
+            d = stack.pop()
+            try:
+                with os.scandir(d) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    if self.recursive:
+                        self._add_dir(Path(entry.path))
+                        stack.append(Path(entry.path))
+                elif os.path.splitext(entry.name)[1].lower() in SUPPORTED:
+                    found.add(Path(entry.path))
+        return found
+
+    def changes(self, timeout: float) -> Set[Path]:
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed: Set[Path] = set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & _IN_Q_OVERFLOW:
+                # Kernel queue overflowed; fall back to a full rescan
+                changed |= set(_iter_audio_files(self.src, recursive=self.recursive))
+                continue
+            if mask & _IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = parent / os.fsdecode(name)
+            if mask & _IN_ISDIR:
+                if self.recursive and mask & (_IN_CREATE | _IN_MOVED_TO):
+                    # New folder (possibly moved in whole): watch it and pick up its contents
+                    changed |= self._add_tree(path)
+            elif path.suffix.lower() in SUPPORTED:
+                changed.add(path)
+        return changed
+
+    def close(self) -> None:
+        try:
+            os.close(self._fd)
+        except OSError:
+            pass
+
+
+def _make_watcher(src: Path, recursive: bool, use_inotify: bool | None, interval: float):
+    if use_inotify is None:
+        use_inotify = sys.platform.startswith("linux")
+    if use_inotify:
+        try:
+            return _InotifyWatcher(src, recursive)
+        except Exception as e:
+            print(f"inotify unavailable ({e}); falling back to polling every {interval:.1f}s")
+    return _PollingWatcher(src, recursive, interval)
+
+
+def watch_directory(
+    src: str | Path,
+    out_dir: str | Path,
+    embed: bool = False,
+    tag_map: dict | None = None,
+    fps: float = 24.0,
+    jobs: int | None = None,
+    recursive: bool = True,
+    settle: float = 5.0,
+    poll_interval: float = 2.0,
+    use_inotify: bool | None = None,
+    stop: threading.Event | None = None,
+    on_result: Callable[[Dict[str, Any]], None] | None = None,
+    pipe_decode: bool = False,
+    sample_rate: int | None = 48000,
+    bit_depth: int | None = None,
+    pcm_cache: str | Path | None = None,
+    pcm_cache_size: int | None = DEFAULT_MAX_BYTES,
+    metadata_cache: str | Path | None = None,
+    ranged_tags: bool = False,
+    duration_policy: str | None = None,
+) -> Dict[str, int]:
+    """Convert new/changed audio under `src` until `stop` is set (or Ctrl-C).
+
+    Files already present but not up to date in the output's build cache
+    are converted first. `jobs=1` converts in-process; otherwise a process
+    pool of `jobs` workers stays warm for the whole session. `pipe_decode`
+    streams decoded PCM into the AAFs instead of writing temp WAVs.
+    `sample_rate`, `bit_depth`, `pcm_cache`, `pcm_cache_size`,
+    `metadata_cache`, `ranged_tags` and `duration_policy` mean what they
+    do for `batch.process_directory` (with the same defaults), so a file
+    converts to the same AAF either way.
+
+    Returns:
+        Dict with keys: success_count, failed_count
+    """
+    src = Path(src)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = max(1, int(jobs or default_jobs()))
+    stop = stop or threading.Event()
+    out_abs = out_dir.resolve()
+
+    cache = BuildCache(out_dir / CACHE_FILENAME)
+    if bit_depth not in (None, 16, 24, 32):
+        raise ValueError(f"bit_depth must be 16, 24 or 32, got {bit_depth}")
+    if pipe_decode and pcm_cache:
+        raise ValueError("pipe_decode streams decoded PCM without writing it; it can't fill a pcm_cache")
+    if duration_policy is None:
+        duration_policy = "pcm" if embed else "header"
+    if duration_policy not in DURATION_POLICIES:
+        raise ValueError(f"duration_policy must be one of {', '.join(DURATION_POLICIES)}, not {duration_policy!r}")
+    target = ConversionTarget(sample_rate, bit_depth)
+    decoded_cache = PCMCache(pcm_cache, pcm_cache_size) if pcm_cache else None
+    md_cache = _open_metadata_cache(metadata_cache, duration_policy)
+    file_options = (embed, tag_map, False, fps, pipe_decode, target, decoded_cache, None, "wav", md_cache,
+                    ranged_tags, duration_policy, True)
+    options = _cache_options(embed, tag_map, fps, None, None, sample_rate, bit_depth, None, "wav",
+                             duration_policy)
+    counts = {"success_count": 0, "failed_count": 0}
+
+    # Our own output and decoded-PCM cache (e.g. either inside the source)
+    own_dirs = [out_abs] + ([Path(pcm_cache).resolve()] if pcm_cache else [])
+
+    def _wanted(p: Path) -> bool:
+        if _TEMP_WAV.search(p.name):
+            return False
+        resolved = p.resolve()
+        for d in own_dirs:
+            try:
+                resolved.relative_to(d)
+                return False
+            except ValueError:
+                pass
+        return True
+
+    # Candidate -> (size, mtime_ns, time the signature was first seen)
+    settling: Dict[Path, tuple] = {}
+    in_flight: Dict[Any, Path] = {}
+    dirty_while_running: Set[Path] = set()
+    # A dying worker breaks the whole pool and fails every file it held;
+    # those are converted again one at a time, and only one that kills its
+    # worker again is recorded as failed
+    suspects: Set[Path] = set()
+    broken = False
+
+    def _note(p: Path) -> None:
+        if not _wanted(p):
+            return
+        if p in in_flight.values():
+            dirty_while_running.add(p)
+        else:
+            settling.setdefault(p, (None, None, 0.0))
+
+    def _finish(p: Path, result: Dict[str, Any]) -> None:
+        # Hashed by the worker; missing if the file changed while converting
+        signature = result.pop("input_signature", None)
+        if result["status"] == "success":
+            counts["success_count"] += 1
+            if signature:
+                try:
+                    cache.record(p, _cache_key(p, src), options, result["output"], signature)
+                except Exception as e:
+                    print(f"Warning: unable to update build cache for {p}: {e}")
+            print(f"✓ {p} -> {result['output']} ({result['duration']:.1f}s)")
+        else:
+            counts["failed_count"] += 1
+            print(f"✗ {p}: {result['error']}")
+        if on_result:
+            on_result(result)
+        if p in dirty_while_running:
+            dirty_while_running.discard(p)
+            settling[p] = (None, None, 0.0)
+
+    watcher = _make_watcher(src, recursive, use_inotify, poll_interval)
+    # Catch up on anything delivered while we weren't running
+    for p in _iter_audio_files(src, recursive=recursive):
+        if _wanted(p) and not cache.lookup(p, _cache_key(p, src), options):
+            settling[p] = (None, None, 0.0)
+
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    print(f"Watching {src} -> {out_dir} (settle {settle:.1f}s, jobs {jobs}). Press Ctrl-C to stop.")
+    try:
+        while not stop.is_set():
+            wait_for = 0.2 if (settling or in_flight) else 1.0
+            for p in watcher.changes(wait_for):
+                _note(p)
+
+            # Promote files whose size/mtime held still for `settle` seconds
+            now = time.time()
+            for p in list(settling):
+                try:
+                    st = p.stat()
+                except OSError:
+                    settling.pop(p, None)  # deleted or moved away
+                    suspects.discard(p)
+                    continue
+                size, mtime, since = settling[p]
+                if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                    settling[p] = (st.st_size, st.st_mtime_ns, now)
+                elif now - since >= settle:
+                    if pool is None:
+                        settling.pop(p)
+                        _finish(p, _process_single_file(p, src, out_dir, *file_options))
+                        continue
+                    if broken or (suspects and (p not in suspects or in_flight)):
+                        continue  # waits for the new pool, or for the retries to run alone
+                    try:
+                        fut = pool.submit(_process_single_file, p, src, out_dir, *file_options)
+                    except BrokenProcessPool:
+                        broken = True
+                        continue
+                    settling.pop(p)
+                    in_flight[fut] = p
+
+            if in_flight:
+                done, _ = wait(in_flight, timeout=0, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    p = in_flight.pop(fut)
+                    try:
+                        result = fut.result()
+                    except BrokenProcessPool as e:
+                        # Worker process died (os._exit, the OOM killer, ...)
+                        broken = True
+                        if p not in suspects:
+                            suspects.add(p)
+                            dirty_while_running.discard(p)
+                            settling[p] = (None, None, 0.0)
+                            continue
+                        result = _new_result(p, "failed", error=f"worker process died: {e}")
+                    except Exception as e:
+                        result = _new_result(p, "failed", error=f"worker error: {e}")
+                    suspects.discard(p)
+                    _finish(p, result)
+            if broken and not in_flight:
+                print("Warning: a worker process died; restarting the worker pool")
+                pool.shutdown(wait=False)
+                pool = ProcessPoolExecutor(max_workers=jobs)
+                broken = False
+    except KeyboardInterrupt:
+        print("\nStopping watch…")
+    finally:
+        watcher.close()
+        if pool is not None:
+            for fut, p in list(in_flight.items()):
+                try:
+                    _finish(p, fut.result())
+                except Exception:
+                    pass
+            pool.shutdown()
+        cache.close()
+        if md_cache is not None:
+            md_cache.close()
+    return counts
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="mxtoaaf watch", description="Continuously convert audio delivered into a folder")
+    parser.add_argument("src", help="folder to watch")
+    parser.add_argument("-o", "--output", required=True, help="output directory (mirrors the source tree)")
+    parser.add_argument("--embed", action="store_true", help="embed audio essence into AAF (requires ffmpeg + aaf2)")
+    parser.add_argument("--tag-map", help="JSON file mapping metadata fields to AAF tag names (optional)")
+    parser.add_argument("--fps", type=float, default=24.0, help="frame rate for AAF timeline (default: 24.0)")
+    parser.add_argument("-j", "--jobs", type=int, help=f"warm worker processes (default: {default_jobs()})")
+    parser.add_argument("--no-recursive", action="store_true", help="do not watch subdirectories")
+    parser.add_argument("--settle", type=float, default=5.0, help="seconds a file must stop growing before conversion (default: 5)")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="rescan interval when inotify is unavailable (default: 2)")
+    parser.add_argument("--poll", action="store_true", help="force polling instead of inotify")
+    parser.add_argument("--pipe-decode", action="store_true", help="stream decoded PCM from ffmpeg into the AAF (no temp WAVs)")
+    parser.add_argument("--sample-rate", type=parse_target_value, default=48000, help="target sample rate in Hz, or 'source' to keep PCM inputs' rate (default: 48000)")
+    parser.add_argument("--bit-depth", type=parse_target_value, choices=[None, 16, 24, 32], default=None, help="target bit depth 16/24/32, or 'source' (default: keep PCM inputs' depth; transcodes use 16)")
+    parser.add_argument("--pcm-cache", help="directory to cache decoded audio in, reused by later runs with other options (not with --pipe-decode)")
+    parser.add_argument("--pcm-cache-size", default="10G", help="size cap for --pcm-cache; least recently used entries are evicted (default: 10G)")
+    parser.add_argument("--no-metadata-cache", action="store_true",
+                        help=f"don't reuse tags read by earlier runs (cached in {default_metadata_cache_path()})")
+    parser.add_argument("--ranged-tags", action="store_true",
+                        help="read only tag blocks/stream headers in small ranged reads (for network storage)")
+    parser.add_argument("--duration-policy", choices=list(DURATION_POLICIES),
+                        help="Duration source: header estimate, full MP3 frame scan, or decoded PCM "
+                             "(default: pcm when embedding, else header)")
+    args = parser.parse_args(argv)
+
+    if not os.path.isdir(args.src):
+        print(f"Error: {args.src} is not a directory")
+        return 2
+    if args.embed and not ffmpeg_available():
+        print("ffmpeg not available — cannot embed. Install ffmpeg or run without --embed")
+        return 2
+
+    tag_map = None
+    if args.tag_map:
+        with open(args.tag_map, "r", encoding="utf-8") as fh:
+            tag_map = json.load(fh)
+
+    counts = watch_directory(
+        args.src,
+        args.output,
+        embed=args.embed,
+        tag_map=tag_map,
+        fps=args.fps,
+        jobs=args.jobs,
+        recursive=not args.no_recursive,
+        settle=args.settle,
+        poll_interval=args.poll_interval,
+        use_inotify=False if args.poll else None,
+        pipe_decode=args.pipe_decode,
+        sample_rate=args.sample_rate,
+        bit_depth=args.bit_depth,
+        pcm_cache=args.pcm_cache,
+        pcm_cache_size=parse_size(args.pcm_cache_size),
+        metadata_cache=None if args.no_metadata_cache else default_metadata_cache_path(),
+        ranged_tags=args.ranged_tags,
+        duration_policy=args.duration_policy,
+    )
+    print(f"✓ Success: {counts['success_count']}  ✗ Failed: {counts['failed_count']}")
+    return 0 if counts["failed_count"] == 0 else 1
+
+
+__all__ = ["watch_directory"]
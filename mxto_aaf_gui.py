@@ -16,6 +16,7 @@ from tkinter.scrolledtext import ScrolledText
 import os
 import sys
 import threading
+import multiprocessing
 import subprocess
 import webbrowser
 import importlib.metadata as importlib_metadata
@@ -45,7 +46,7 @@ from mxto_aaf.__version__ import __version__
 from mxto_aaf.batch import process_directory
 from mxto_aaf.metadata import extract_music_metadata
 from mxto_aaf.aaf import create_music_aaf
-from mxto_aaf.utils import convert_to_wav
+from mxto_aaf.utils import split_to_mono_wavs
 
 
 def launch_gui():
@@ -242,13 +243,16 @@ def launch_gui():
                     created = None
                     try:
                         if not inp.lower().endswith('.wav'):
-                            tmp = os.path.join(outp, base + ".tmp.wav")
-                            convert_to_wav(str(inp), tmp)
-                            created = create_music_aaf(tmp, md, dest, embed=embed, tag_map=None, fps=fps)
+                            channel_wavs = split_to_mono_wavs(str(inp), os.path.join(outp, base + ".tmp"))
                             try:
-                                os.remove(tmp)
-                            except Exception:
-                                pass
+                                created = create_music_aaf(str(inp), md, dest, embed=embed, tag_map=None,
+                                                           fps=fps, channel_wavs=channel_wavs)
+                            finally:
+                                for tmp in channel_wavs:
+                                    try:
+                                        os.remove(tmp)
+                                    except Exception:
+                                        pass
                         else:
                             created = create_music_aaf(str(inp), md, dest, embed=embed, tag_map=None, fps=fps)
                         dur = _time.time() - t0
@@ -584,6 +588,8 @@ def launch_gui():
 
 
 def main():
+    # Batch conversion uses worker processes; required for frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     launch_gui()
 
 
@@ -26,6 +26,7 @@ setup(
     packages=find_packages(),
     python_requires=">=3.10",
     install_requires=requirements,
+    extras_require={"fast": ["numpy"]},
     entry_points={
         "console_scripts": [
             "mxtoaaf=mxto_aaf.__main__:main",
@@ -0,0 +1,16 @@
+import wave
+from pathlib import Path
+
+import pytest
+
+
+@pytest.fixture
+def write_wav():
+    """Return a helper that writes `nframes` of 48 kHz 16-bit stereo silence to a WAV."""
+    def _write_wav(path: Path, nframes: int = 480):
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(48000)
+            wf.writeframes(b"\x00" * nframes * 4)
+    return _write_wav
@@ -1,5 +1,12 @@
+import multiprocessing
+import os
 from pathlib import Path
+
+import pytest
+
+from mxto_aaf import batch
 from mxto_aaf.batch import process_directory
+from mxto_aaf.utils import ffmpeg_available
 
 
 SAMPLES_DIR = Path('/Users/jasonbrodkey/Documents/SFX/pythonScripts/MXToAAF/Sample Media/wavTest_MX')
@@ -13,3 +20,271 @@ def test_process_directory_creates_manifests(tmp_path):
     # check that manifests were written
     for p in out.iterdir():
         assert p.suffix in {'.aaf', '.json', '.manifest.json'} or p.suffix == '.aaf'
+
+
+def test_process_directory_parallel_keeps_order(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(5):
+        write_wav(src / f'{i:02d} Track.wav')
+    out = tmp_path / 'out'
+    serial = process_directory(src, out / 'serial', embed=False, jobs=1)
+    parallel = process_directory(src, out / 'parallel', embed=False, jobs=3)
+    assert parallel['jobs'] == 3
+    assert parallel['success_count'] == 5
+    assert [r['input'] for r in parallel['results']] == [r['input'] for r in serial['results']]
+
+
+_real_process_unit = batch._process_unit
+
+
+def _exit_on_track_1(paths, *args):
+    # Stands in for a worker killed mid-conversion (OOM killer, crash)
+    if paths[0].name == '1.wav':
+        os._exit(9)
+    return _real_process_unit(paths, *args)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patch')
+def test_process_directory_survives_a_dead_worker(tmp_path, write_wav, monkeypatch):
+    monkeypatch.setattr(batch, '_process_unit', _exit_on_track_1)
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(6):
+        write_wav(src / f'{i}.wav')
+    log = tmp_path / 'log.json'
+    r = process_directory(src, tmp_path / 'out', embed=False, jobs=2, log_file=str(log))
+    # only the file that killed its worker fails; the pool is replaced and the
+    # units it took down with it are rerun
+    assert (r['success_count'], r['failed_count']) == (5, 1)
+    assert [f['file'] for f in r['failed_files']] == [str(src / '1.wav')]
+    assert 'worker process died' in r['failed_files'][0]['error']
+    assert log.exists()
+
+
+def test_process_directory_pipeline_mode(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(4):
+        write_wav(src / f'{i:02d} Track.wav')
+    r = process_directory(src, tmp_path / 'out', embed=False, pipeline=True,
+                          stage_workers={'decode': 2}, queue_depth=2)
+    assert r['success_count'] == 4
+    serial = process_directory(src, tmp_path / 'serial', embed=False, jobs=1)
+    assert [x['input'] for x in r['results']] == [x['input'] for x in serial['results']]
+    assert set(r['pipeline']['stages']) == {'probe', 'decode', 'embed', 'report'}
+    assert r['pipeline']['stages']['decode']['workers'] == 2
+
+
+def test_process_directory_stream_mode(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    (src / 'b').mkdir(parents=True)
+    (src / 'a').mkdir()
+    write_wav(src / 'a' / '1.wav')
+    write_wav(src / 'b' / '2.wav')
+    write_wav(src / '0.wav')
+    (src / 'notes.txt').write_text('x')
+    for kwargs in ({'jobs': 1}, {'jobs': 2}, {'pipeline': True}):
+        r = process_directory(src, tmp_path / 'out', embed=False, stream=True, **kwargs)
+        # files of a directory come before its subdirectories, names sorted
+        assert [Path(x['input']).relative_to(src).as_posix() for x in r['results']] == ['0.wav', 'a/1.wav', 'b/2.wav']
+        assert r['success_count'] == 3
+
+
+def test_process_directory_largest_first_schedule(tmp_path, write_wav):
+    from mxto_aaf.schedule import simulate_makespan
+
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i, n in enumerate((480, 48000, 4800)):
+        write_wav(src / f'{i}.wav', nframes=n)
+    r = process_directory(src, tmp_path / 'out', embed=False, jobs=1, schedule='duration')
+    # results stay in discovery order
+    assert [Path(x['input']).name for x in r['results']] == ['0.wav', '1.wav', '2.wav']
+    assert r['schedule']['policy'] == 'duration'
+    assert r['schedule']['expected_makespan'] == pytest.approx(53280 / 48000, abs=1e-3)
+    assert simulate_makespan([5, 4, 3, 3, 3], 2) == 10
+
+
+def test_largest_first_dispatch_order_with_workers(tmp_path, write_wav):
+    import json
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i, n in enumerate((4800, 48000, 480, 96000)):
+        write_wav(src / f'{i}.wav', nframes=n)
+    journal = tmp_path / 'run.jsonl'
+    r = process_directory(src, tmp_path / 'out', embed=False, jobs=2, schedule='size', journal=str(journal))
+    assert r['success_count'] == 4
+    events = [json.loads(line) for line in journal.read_text().splitlines()]
+    # "started" is journaled as each unit is handed to the pool
+    assert [e['key'] for e in events if e['event'] == 'started'] == ['3.wav', '1.wav', '0.wav', '2.wav']
+    info = r['schedule']
+    assert info['workers'] == 2
+    # Estimates only: largest-first on 2 workers beats discovery order and hits the bound
+    assert info['expected_makespan'] == info['ideal_makespan'] < info['discovery_makespan']
+    assert info['expected_vs_ideal'] == 1.0 < info['discovery_vs_ideal']
+
+
+def test_schedule_stats_keep_estimates_apart_from_wall_clock(capsys):
+    from mxto_aaf.batch import print_schedule_stats
+    print_schedule_stats({'policy': 'size', 'workers': 2, 'actual_makespan_s': 3.25,
+                          'expected_makespan': 100.0, 'discovery_makespan': 150.0, 'ideal_makespan': 100.0,
+                          'expected_vs_ideal': 1.0, 'discovery_vs_ideal': 1.5})
+    wall, estimates = capsys.readouterr().out.splitlines()
+    assert '3.2s wall clock' in wall and '100' not in wall
+    assert '1.00x vs 1.50x ideal' in estimates and '3.2' not in estimates
+
+
+def test_memory_budget_admits_oversize_item_alone():
+    from mxto_aaf.schedule import MemoryBudget, parse_size
+    assert parse_size("8G") == 8 * 1024 ** 3
+    assert parse_size("512M") == 512 * 1024 ** 2
+    budget = MemoryBudget(100)
+    assert budget.try_acquire(60)
+    assert not budget.try_acquire(60)
+    budget.release(60)
+    assert budget.try_acquire(500)  # nothing running: oversize item goes alone
+    budget.release(500)
+    assert budget.stats()["peak_admitted_bytes"] == 500
+
+
+def test_process_directory_memory_budget(tmp_path, write_wav):
+    from mxto_aaf.schedule import estimate_peak_memory
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(4):
+        write_wav(src / f'{i:02d} Track.wav')
+    for pipeline in (False, True):
+        r = process_directory(src, tmp_path / f'out{pipeline}', embed=False, jobs=2,
+                              pipeline=pipeline, max_memory=1)
+        assert r['success_count'] == 4
+        # a 1-byte budget admits one file at a time
+        single = max(estimate_peak_memory(p) for p in src.iterdir())
+        assert r['memory']['budget_bytes'] == 1
+        assert 0 < r['memory']['peak_admitted_bytes'] < 2 * single
+
+
+def test_estimate_peak_memory_does_not_read_tags(tmp_path, monkeypatch):
+    from mxto_aaf import schedule
+
+    def no_reads(*args, **kwargs):
+        raise AssertionError("metadata read while estimating memory")
+
+    monkeypatch.setattr(schedule, "extract_music_metadata", no_reads)
+    mp3 = tmp_path / 'song.mp3'
+    mp3.write_bytes(b"\x00" * 32000)
+    assert schedule.estimate_peak_memory(mp3) > 0
+    assert schedule.estimate_peak_memory(mp3, duration=2.0) > schedule.estimate_peak_memory(mp3)
+    # Essence is streamed in chunks: a 10-minute track costs tens of MB, not its PCM size
+    ten_minutes = schedule.estimate_peak_memory(mp3, duration=600.0)
+    assert schedule.JOB_OVERHEAD_BYTES < ten_minutes < 32 * 1024 * 1024
+
+
+def test_process_directory_ffmpeg_batch_keeps_results(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(5):
+        write_wav(src / f'{i:02d} Track.wav')
+    serial = process_directory(src, tmp_path / 'serial', embed=False, jobs=1)
+    batched = process_directory(src, tmp_path / 'batched', embed=False, jobs=2, ffmpeg_batch=3)
+    assert batched['success_count'] == 5
+    assert [r['input'] for r in batched['results']] == [r['input'] for r in serial['results']]
+    with pytest.raises(ValueError):
+        process_directory(src, tmp_path / 'x', pipeline=True, ffmpeg_batch=4)
+
+
+def test_ffmpeg_batch_decodes_short_transcodes_in_one_run(tmp_path, monkeypatch):
+    import wave
+    from mxto_aaf import utils
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(3):
+        # ~20 s of 128 kbps MPEG frames: a short clip that needs a transcode
+        (src / f'{i:02d} Sting.mp3').write_bytes((b"\xff\xfb\x90\x00" + b"\x00" * 413) * 770)
+    runs = []
+
+    def fake_run_ffmpeg(cmd, src_path):
+        runs.append([cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-i'])
+        for i, arg in enumerate(cmd):
+            if arg == '-acodec':
+                with wave.open(cmd[i + 2], 'wb') as wf:
+                    wf.setnchannels(1)
+                    wf.setsampwidth(2)
+                    wf.setframerate(48000)
+                    wf.writeframes(b"\x00" * 960)
+
+    monkeypatch.setattr(utils, '_get_ffmpeg_path', lambda: '/usr/bin/ffmpeg')
+    monkeypatch.setattr(utils, '_run_ffmpeg', fake_run_ffmpeg)
+    r = process_directory(src, tmp_path / 'out', embed=True, jobs=1, ffmpeg_batch=4)
+    assert r['success_count'] == 3
+    assert len(runs) == 1
+    assert sorted(Path(p).name for p in runs[0]) == ['00 Sting.mp3', '01 Sting.mp3', '02 Sting.mp3']
+
+
+def test_process_directory_link_media(tmp_path, write_wav):
+    import wave
+    import aaf2
+    src = tmp_path / 'src'
+    (src / 'album').mkdir(parents=True)
+    write_wav(src / 'album' / 'stereo.wav')
+    with wave.open(str(src / 'mono.wav'), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 960)
+    media = tmp_path / 'media'
+    r = process_directory(src, tmp_path / 'out', embed=True, jobs=1, link_media=media)
+    assert r['success_count'] == 2
+    # Stereo input is split into the media folder; mono is linked in place
+    assert sorted(p.name for p in (media / 'album').iterdir()) == ['stereo.ch1.wav', 'stereo.ch2.wav']
+    urls = {}
+    for name in ('album/stereo.aaf', 'mono.aaf'):
+        with aaf2.open(str(tmp_path / 'out' / name), 'r') as af:
+            assert not list(af.content.essencedata)
+            urls[name] = [m.descriptor['Locator'].value[0]['URLString'].value for m in af.content.sourcemobs()]
+    assert urls['album/stereo.aaf'] == [(media / 'album' / f'stereo.ch{c}.wav').resolve().as_uri() for c in (1, 2)]
+    assert urls['mono.aaf'] == [(src / 'mono.wav').resolve().as_uri()]
+
+
+@pytest.mark.skipif(not ffmpeg_available(), reason='needs ffmpeg')
+def test_process_directory_mxf_media(tmp_path, write_wav):
+    import aaf2
+    src = tmp_path / 'src'
+    src.mkdir()
+    write_wav(src / 'song.wav', nframes=9600)  # five 25 fps edit units
+    media = tmp_path / 'media'
+    r = process_directory(src, tmp_path / 'out', embed=True, jobs=1, mxf_media=media, fps=25.0)
+    assert r['success_count'] == 1
+    mxfs = [media / f'song.ch{c}.mxf' for c in (1, 2)]
+    assert all(p.exists() for p in mxfs)
+    with aaf2.open(str(tmp_path / 'out' / 'song.aaf'), 'r') as af:
+        assert not list(af.content.essencedata)
+        master = next(af.content.mastermobs())
+        assert master.comments['SampleRate'] == '48000'
+        assert master.comments['Number of Frames'] == '9600'
+        sources = list(af.content.sourcemobs())
+        assert [m.descriptor['Locator'].value[0]['URLString'].value for m in sources] == \
+            [p.resolve().as_uri() for p in mxfs]
+        # The MasterMob points at the MXF file packages' sound tracks
+        for slot, mob in zip(master.slots, sources):
+            clip = slot.segment['InputSegments'].value[0]
+            sound = next(s for s in mob.slots if s.media_kind == 'Sound')
+            assert (clip['SourceID'].value, clip['SourceMobSlotID'].value) == (mob.mob_id, sound.slot_id)
+
+
+def test_process_directory_mxf_media_rejects_32bit(tmp_path):
+    with pytest.raises(ValueError):
+        process_directory(tmp_path, tmp_path / 'out', embed=True, mxf_media=tmp_path / 'media', bit_depth=32)
+
+
+def test_process_directory_metadata_cache(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for i in range(3):
+        write_wav(src / f'{i:02d} Track.wav')
+    db = tmp_path / 'md.sqlite'
+    first = process_directory(src, tmp_path / 'a', embed=False, jobs=2, metadata_cache=db)
+    second = process_directory(src, tmp_path / 'b', embed=False, jobs=2, metadata_cache=db)
+    assert first['metadata_cache'] == {'hits': 0, 'misses': 3, 'entries': 3}
+    assert second['metadata_cache'] == {'hits': 3, 'misses': 0, 'entries': 3}
+    assert [r['metadata'] for r in second['results']] == [r['metadata'] for r in first['results']]
@@ -0,0 +1,61 @@
+import os
+from pathlib import Path
+from mxto_aaf.batch import process_directory
+
+
+def test_incremental_skips_unchanged_and_rebuilds_changed(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for name in ('a.wav', 'b.wav'):
+        write_wav(src / name)
+    out = tmp_path / 'out'
+
+    first = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    assert first['success_count'] == 2
+
+    again = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    assert again['skipped_count'] == 2
+
+    # touched but identical content -> still cached via content hash
+    st = (src / 'a.wav').stat()
+    os.utime(src / 'a.wav', ns=(st.st_atime_ns, st.st_mtime_ns + 10_000_000_000))
+    # changed content -> rebuilt
+    write_wav(src / 'b.wav', nframes=960)
+    r = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    by_name = {Path(x['input']).name: x['status'] for x in r['results']}
+    assert by_name == {'a.wav': 'skipped', 'b.wav': 'success'}
+
+    # a different option invalidates every entry
+    r = process_directory(src, out, embed=False, jobs=1, incremental=True, fps=25.0)
+    assert r['success_count'] == 2
+
+
+def test_incremental_rebuilds_when_output_is_damaged(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    write_wav(src / 'a.wav')
+    out = tmp_path / 'out'
+    first = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    with open(first['results'][0]['output'], 'a') as fh:
+        fh.write('truncated-or-partial')
+    r = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    assert r['success_count'] == 1
+
+
+def test_incremental_hashes_inputs_where_they_are_converted(tmp_path, write_wav, monkeypatch):
+    from mxto_aaf import cache
+
+    def hashed_while_recording(path, *args):
+        raise AssertionError(f"{path} hashed by the dispatcher")
+
+    src = tmp_path / 'src'
+    src.mkdir()
+    write_wav(src / 'a.wav')
+    out = tmp_path / 'out'
+    monkeypatch.setattr(cache, 'file_sha256', hashed_while_recording)
+    first = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    assert first['success_count'] == 1
+    assert 'input_signature' not in first['results'][0]
+    monkeypatch.undo()
+    # the worker's signature was recorded: a re-run is up to date
+    assert process_directory(src, out, embed=False, jobs=1, incremental=True)['skipped_count'] == 1
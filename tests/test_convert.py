@@ -0,0 +1,158 @@
+import struct
+import sys
+import wave
+
+import aaf2
+import pytest
+
+from mxto_aaf import utils
+from mxto_aaf.aaf import create_music_aaf
+from mxto_aaf.convert import ConversionTarget, PCMFileReader, plan_conversion, probe_audio_format
+from mxto_aaf.metadata import MusicMetadata
+
+
+def _write_wav(path, rate=48000, width=2, frames=100, channels=2):
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(channels)
+        wf.setsampwidth(width)
+        wf.setframerate(rate)
+        wf.writeframes(b"\x01\x02" * (channels * width * frames // 2))
+
+
+def _write_aiff(path, samples, rate=48000):
+    """Minimal 16-bit stereo AIFF (big-endian samples)."""
+    frames = len(samples) // 2
+    # 48000 as an 80-bit extended float
+    rate_ext = struct.pack(">HQ", 16383 + 15, rate << 48)
+    comm = struct.pack(">hIh", 2, frames, 16) + rate_ext
+    ssnd = struct.pack(">II", 0, 0) + struct.pack(f">{len(samples)}h", *samples)
+    body = b"AIFF" + b"COMM" + struct.pack(">I", len(comm)) + comm + b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    path.write_bytes(b"FORM" + struct.pack(">I", len(body)) + body)
+
+
+def _write_extensible_wav(path, frames=100):
+    fmt = struct.pack("<HHIIHH", 0xFFFE, 2, 48000, 48000 * 4, 4, 16)
+    fmt += struct.pack("<HHI", 22, 16, 3) + bytes.fromhex("0100000000001000800000aa00389b71")
+    data = b"\x01\x00\x02\x00" * frames
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", len(data)) + data
+    path.write_bytes(b"RIFF" + struct.pack("<I", len(body)) + body)
+
+
+def test_plan_direct_repack_and_transcode(tmp_path):
+    wav = tmp_path / "a.wav"
+    _write_wav(wav)
+    assert plan_conversion(wav).action == "direct"
+
+    ext = tmp_path / "ext.wav"
+    _write_extensible_wav(ext)
+    plan = plan_conversion(ext)
+    assert plan.action == "repack" and plan.fmt.extensible
+
+    aif = tmp_path / "a.aif"
+    _write_aiff(aif, [1, -1] * 10)
+    fmt = probe_audio_format(aif)
+    assert (fmt.samplerate, fmt.channels, fmt.bits, fmt.big_endian) == (48000, 2, 16, True)
+    assert plan_conversion(aif).action == "repack"
+
+    mp3 = tmp_path / "a.mp3"
+    mp3.write_bytes(b"ID3\x03\x00" + b"\x00" * 64)
+    plan = plan_conversion(mp3)
+    assert plan.action == "transcode"
+    assert (plan.samplerate, plan.bits) == (48000, 16)
+
+    # 24-bit source with a 16-bit target needs a real transcode (or, without
+    # ffmpeg, is imported as-is with the reason saying so)
+    wav24 = tmp_path / "b.wav"
+    _write_wav(wav24, width=3)
+    plan = plan_conversion(wav24, ConversionTarget(48000, 16))
+    assert plan.action == "transcode" or "ffmpeg unavailable" in plan.reason
+    assert plan_conversion(wav24, ConversionTarget(None, None)).action == "direct"
+
+
+def test_aiff_repack_byteswaps_into_aaf(tmp_path):
+    aif = tmp_path / "song.aif"
+    _write_aiff(aif, [i if c == 0 else -i for i in range(50) for c in (0, 1)])
+    plan = plan_conversion(aif)
+    md = MusicMetadata(path=str(aif), track_name="song", raw={})
+    out = create_music_aaf(str(aif), md, str(tmp_path / "song.aaf"), embed=True,
+                           pcm=PCMFileReader(aif, plan.fmt))
+    with aaf2.open(out, "r") as af:
+        left, right = (ed.open("r").read() for ed in af.content.essencedata)
+    assert struct.unpack("<3h", left[:6]) == (0, 1, 2)
+    assert struct.unpack("<3h", right[:6]) == (0, -1, -2)
+
+
+def test_process_directory_reports_conversion_path(tmp_path):
+    from mxto_aaf.batch import process_directory
+    src = tmp_path / "src"
+    src.mkdir()
+    _write_wav(src / "01.wav")
+    _write_aiff(src / "02.aif", [0, 0] * 10)
+    r = process_directory(src, tmp_path / "out", embed=True, jobs=1)
+    assert r["success_count"] == 2
+    assert [x["conversion"] for x in r["results"]] == ["direct", "repack"]
+    assert r["conversions"] == {"direct": 1, "repack": 1}
+
+
+def _convert_keeps_channel_counts(tmp_path):
+    from mxto_aaf.batch import process_directory
+    src = tmp_path / "src"
+    src.mkdir()
+    _write_wav(src / "mono.wav", rate=44100, channels=1)
+    _write_wav(src / "surround.wav", rate=44100, channels=6)
+    r = process_directory(src, tmp_path / "out", embed=True, jobs=1)
+    assert r["conversions"] == {"transcode": 2}
+    tracks = []
+    for result in r["results"]:
+        with aaf2.open(result["output"], "r") as af:
+            tracks.append(len(list(af.content.essencedata)))
+    return tracks
+
+
+def test_transcodes_keep_the_source_channel_count(tmp_path, monkeypatch):
+    from mxto_aaf import batch, convert
+    monkeypatch.setattr(convert, "ffmpeg_available", lambda: True)
+    calls = []
+
+    def fake_split(src, prefix, channels=2, samplerate=48000, bits=16):
+        calls.append(channels)
+        out = []
+        for c in range(1, channels + 1):
+            with wave.open(f"{prefix}.ch{c}.wav", "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(bits // 8)
+                wf.setframerate(samplerate)
+                wf.writeframes(b"\x00\x00" * 480)
+            out.append(f"{prefix}.ch{c}.wav")
+        return out
+
+    monkeypatch.setattr(batch, "split_to_mono_wavs", fake_split)
+    assert _convert_keeps_channel_counts(tmp_path) == calls == [1, 6]
+
+
+@pytest.mark.skipif(not utils.ffmpeg_available(), reason="needs ffmpeg")
+def test_ffmpeg_transcodes_keep_the_source_channel_count(tmp_path):
+    assert _convert_keeps_channel_counts(tmp_path) == [1, 6]
+
+
+def _fake_ffmpeg(tmp_path, exit_code):
+    # Floods stderr (well past a pipe buffer) before writing any PCM
+    script = tmp_path / "ffmpeg"
+    script.write_text(f"#!{sys.executable}\nimport sys\n"
+                      "sys.stderr.write('decode warning\\n' * 20000)\nsys.stderr.flush()\n"
+                      "sys.stdout.buffer.write(b'\\x00' * 4000)\n"
+                      f"sys.exit({exit_code})\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_pcm_pipe_survives_noisy_stderr(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_get_ffmpeg_path", lambda: _fake_ffmpeg(tmp_path, 0))
+    chunks = list(utils.PCMPipe("in.mp3", chunk_frames=100))
+    assert b"".join(chunks) == b"\x00" * 4000
+
+
+def test_pcm_pipe_reports_stderr_on_failure(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, "_get_ffmpeg_path", lambda: _fake_ffmpeg(tmp_path, 1))
+    with pytest.raises(RuntimeError, match="decode warning"):
+        list(utils.PCMPipe("in.mp3"))
@@ -1,5 +1,6 @@
 import wave
 import os
+import pytest
 from mxto_aaf.aaf import create_music_aaf
 from mxto_aaf.metadata import MusicMetadata
 
@@ -42,3 +43,197 @@ def test_cli_dry_run_with_sample(tmp_path):
     rc = cli.main([sample, "--dry-run", "-o", str(dst)])
     assert rc == 0
     assert (str(dst) + ".manifest.json")
+
+
+def test_pack_folder_writes_one_multi_mob_aaf(tmp_path):
+    from mxto_aaf.batch import process_directory
+    import aaf2
+
+    src = tmp_path / "Album"
+    src.mkdir()
+    for name in ("01 One.wav", "02 Two.wav", "03 Three.wav"):
+        make_sine(str(src / name))
+    out = tmp_path / "out"
+    r = process_directory(src, out, embed=True, jobs=1, pack="folder")
+    assert r["success_count"] == 3
+    outputs = {x["output"] for x in r["results"]}
+    assert outputs == {str(out / "Album.aaf")}
+    with aaf2.open(str(out / "Album.aaf"), "r") as af:
+        names = sorted(m.name for m in af.content.mastermobs())
+        assert names == ["01 One", "02 Two", "03 Three"]
+
+    r = process_directory(src, tmp_path / "chunked", embed=True, jobs=2, pack_size=2)
+    assert sorted({x["output"] for x in r["results"]}) == [
+        str(tmp_path / "chunked" / "Album_01.aaf"),
+        str(tmp_path / "chunked" / "Album_02.aaf"),
+    ]
+
+
+def test_embed_presplit_channel_wavs(tmp_path):
+    # Mono files as written by utils.split_to_mono_wavs: imported as-is
+    channel_wavs = []
+    for i in (1, 2):
+        path = tmp_path / f"song.tmp.ch{i}.wav"
+        with wave.open(str(path), "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(48000)
+            wf.writeframes(b"\x00" * 480 * 2)
+        channel_wavs.append(str(path))
+    src = tmp_path / "song.mp3"
+    src.write_bytes(b"not decoded here")
+    md = MusicMetadata(path=str(src), track_name="song", raw={})
+    out = create_music_aaf(str(src), md, str(tmp_path / "song.aaf"), embed=True, channel_wavs=channel_wavs)
+    import aaf2
+    with aaf2.open(out, 'r') as af:
+        master = list(af.content.mastermobs())[0]
+        items = dict(master.comments.items())
+        assert items['Channels'] == '2'
+        assert items['Filename'] == 'song.mp3'
+        assert items['BitDepth'] == '16'
+        assert len(list(af.content.sourcemobs())) == 2
+
+
+class _RawPCM:
+    """Interleaved 16-bit stereo chunks, shaped like utils.PCMPipe."""
+    samplerate = 48000
+    channels = 2
+    sampwidth = 2
+
+    def __init__(self, data: bytes, chunk: int):
+        self.data = data
+        self.chunk = chunk
+
+    def __iter__(self):
+        for i in range(0, len(self.data), self.chunk):
+            yield self.data[i:i + self.chunk]
+
+
+def test_embed_streamed_pcm_splits_channels(tmp_path):
+    import struct
+    import aaf2
+    data = b"".join(struct.pack("<hh", i, -i) for i in range(1000))
+    md = MusicMetadata(path="song.mp3", track_name="song", raw={})
+    # odd chunk size: frames straddle chunk boundaries
+    out = create_music_aaf("song.mp3", md, str(tmp_path / "song.aaf"), embed=True, pcm=_RawPCM(data, 1001))
+    with aaf2.open(out, 'r') as af:
+        items = dict(list(af.content.mastermobs())[0].comments.items())
+        assert items['Number of Frames'] == '1000'
+        assert items['Channels'] == '2'
+        left, right = (ed.open('r').read() for ed in af.content.essencedata)
+    assert struct.unpack("<3h", left[:6]) == (0, 1, 2)
+    assert struct.unpack("<3h", right[:6]) == (0, -1, -2)
+    assert len(left) == len(right) == 2000
+    assert not list(tmp_path.glob("*.wav"))
+
+
+def test_split_channels_numpy_matches_fallback(monkeypatch):
+    import mxto_aaf.aaf as aafmod
+    data = bytes(range(256)) * 6  # whole frames for 2 ch x 2/3/4 bytes
+    for width in (2, 3, 4):
+        fast = [bytes(b) for b in aafmod._split_channels(data, 2, width)]
+        monkeypatch.setattr(aafmod, "np", None)
+        slow = [bytes(b) for b in aafmod._split_channels(data, 2, width)]
+        monkeypatch.undo()
+        assert fast == slow
+        assert fast[0][:width] == data[:width] and fast[1][:width] == data[width:2 * width]
+
+
+def test_embed_interleaved_24bit_wav_splits_channels(tmp_path):
+    import aaf2
+    wav = tmp_path / "song.wav"
+    frames = [(i.to_bytes(3, "little"), (1000 + i).to_bytes(3, "little")) for i in range(500)]
+    with wave.open(str(wav), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(3)
+        wf.setframerate(48000)
+        wf.writeframes(b"".join(l + r for l, r in frames))
+    md = MusicMetadata(path=str(wav), track_name="song", raw={})
+    out = create_music_aaf(str(wav), md, str(tmp_path / "song.aaf"), embed=True)
+    with aaf2.open(out, 'r') as af:
+        left, right = (ed.open('r').read() for ed in af.content.essencedata)
+    assert left == b"".join(l for l, _ in frames)
+    assert right == b"".join(r for _, r in frames)
+
+
+def test_embed_mono_wav_streams_in_chunks(tmp_path, monkeypatch):
+    import aaf2
+    import mxto_aaf.aaf as aafmod
+    from mxto_aaf.convert import PCMFileReader
+    # Tiny chunks so the essence is written in many pieces
+    monkeypatch.setattr(aafmod, "PCMFileReader", lambda path, fmt: PCMFileReader(path, fmt, chunk_frames=7))
+    wav = tmp_path / "mono.wav"
+    data = bytes(range(200)) * 5
+    with wave.open(str(wav), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(data)
+    md = MusicMetadata(path=str(wav), track_name="mono", raw={})
+    out = create_music_aaf(str(wav), md, str(tmp_path / "mono.aaf"), embed=True)
+    with aaf2.open(out, 'r') as af:
+        src = [m for m in af.content.mobs if m.name == "mono.wav.PHYS"]
+        assert len(src) == 1
+        assert list(af.content.essencedata)[0].open('r').read() == data
+        items = dict(list(af.content.mastermobs())[0].comments.items())
+        assert items['Number of Frames'] == '500'
+
+
+def test_pan_definitions_registered_once_with_and_without_template(tmp_path, monkeypatch):
+    import aaf2
+    import mxto_aaf.aaf as aafmod
+    from mxto_aaf.aaf import create_album_aaf
+    tracks = []
+    for name in ("a", "b"):
+        wav = tmp_path / f"{name}.wav"
+        make_sine(str(wav))
+        tracks.append((str(wav), MusicMetadata(path=str(wav), track_name=name, raw={})))
+    for use_template in (True, False):
+        monkeypatch.setattr(aafmod, "USE_AAF_TEMPLATE", use_template)
+        out = create_album_aaf(tracks, str(tmp_path / f"album_{use_template}.aaf"))
+        with aaf2.open(out, 'r') as af:
+            assert len(list(af.dictionary['OperationDefinitions'].value)) == 1
+            assert len(list(af.dictionary['ParameterDefinitions'].value)) == 1
+            pans = [str(cp.value) for m in af.content.mastermobs() for sl in m.slots
+                    for p in sl.segment.parameters for cp in p['PointList'].value][::2]
+            assert pans == ['-1.0', '1.0', '-1.0', '1.0']
+
+
+def test_pcm_duration_replaces_probed_duration(tmp_path):
+    wav = tmp_path / "half.wav"
+    make_sine(str(wav), duration_s=0.5)
+    import aaf2
+    for pcm_duration, expected in ((False, "2.000"), (True, "0.500")):
+        md = MusicMetadata(path=str(wav), track_name="half", duration=2.0, raw={})
+        out = create_music_aaf(str(wav), md, str(tmp_path / f"{pcm_duration}.aaf"), embed=True,
+                               pcm_duration=pcm_duration)
+        if pcm_duration:
+            out, measured = out
+            assert measured == pytest.approx(0.5)
+        # the caller's metadata is left as probed
+        assert md.duration == 2.0
+        with aaf2.open(out, 'r') as af:
+            master = next(af.content.mastermobs())
+            assert master.comments['Duration'] == expected
+
+
+def test_template_outputs_get_their_own_identification(tmp_path):
+    import time
+    import aaf2
+    wav = tmp_path / "id.wav"
+    make_sine(str(wav))
+    stamps = []
+    for name in ("first", "second"):
+        md = MusicMetadata(path=str(wav), track_name=name, raw={})
+        out = create_music_aaf(str(wav), md, str(tmp_path / f"{name}.aaf"), embed=True)
+        with aaf2.open(out, 'r') as af:
+            idents = list(af.header['IdentificationList'].value)
+            assert len(idents) == 1
+            assert idents[0]['ProductName'].value == "PyAAF"
+            stamps.append((idents[0]['GenerationAUID'].value, idents[0]['Date'].value,
+                           af.header['LastModified'].value))
+        time.sleep(1.1)  # AAF timestamps have one-second resolution
+    (auid1, date1, mod1), (auid2, date2, mod2) = stamps
+    assert auid1 != auid2
+    assert date1 != date2
+    assert mod1 != mod2
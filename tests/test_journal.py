@@ -0,0 +1,75 @@
+import json
+from mxto_aaf.batch import process_directory
+from mxto_aaf.journal import load_journal
+
+
+def test_journal_records_every_file(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for name in ('a.wav', 'b.wav', 'c.wav'):
+        write_wav(src / name)
+    journal = tmp_path / 'run.jsonl'
+    process_directory(src, tmp_path / 'out', embed=False, jobs=2, journal=str(journal))
+    state = load_journal(journal)
+    assert state['header']['src'] == str(src)
+    assert sorted(state['done']) == ['a.wav', 'b.wav', 'c.wav']
+    assert state['in_flight'] == []
+
+
+def test_resume_skips_finished_and_requeues_in_flight(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for name in ('a.wav', 'b.wav', 'c.wav'):
+        write_wav(src / name)
+    out = tmp_path / 'out'
+    journal = tmp_path / 'run.jsonl'
+    # Simulate a crash: a.wav finished, b.wav in flight, torn last line
+    finished = {'input': str(src / 'a.wav'), 'output': 'previous.aaf', 'status': 'success',
+                'error': None, 'duration': 1.0, 'metadata': None}
+    journal.write_text(
+        json.dumps({'event': 'start', 'src': str(src), 'out': str(out), 'options': None}) + '\n'
+        + json.dumps({'event': 'started', 'key': 'a.wav'}) + '\n'
+        + json.dumps({'event': 'done', 'key': 'a.wav', 'result': finished}) + '\n'
+        + json.dumps({'event': 'started', 'key': 'b.wav'}) + '\n'
+        + '{"event": "done", "key": "b.w'
+    )
+    r = process_directory(src, out, embed=False, jobs=1, resume=str(journal))
+    assert [x['output'] for x in r['results']][0] == 'previous.aaf'
+    assert r['success_count'] == 3
+    assert not (out / 'a.aaf.manifest.json').exists()
+    assert (out / 'b.aaf.manifest.json').exists()
+    state = load_journal(journal)
+    assert sorted(state['done']) == ['a.wav', 'b.wav', 'c.wav']
+
+
+def test_append_drops_torn_last_line(tmp_path):
+    from mxto_aaf.journal import BatchJournal
+    journal = tmp_path / 'run.jsonl'
+    journal.write_text(json.dumps({'event': 'started', 'key': 'a.wav'}) + '\n' + '{"event": "done", "ke')
+    writer = BatchJournal(journal, append=True)
+    writer.done('a.wav', {'status': 'success'})
+    writer.close()
+    assert load_journal(journal)['done'] == {'a.wav': {'status': 'success'}}
+
+
+def test_resume_retries_failed_files(tmp_path, write_wav):
+    src = tmp_path / 'src'
+    src.mkdir()
+    for name in ('a.wav', 'b.wav'):
+        write_wav(src / name)
+    out = tmp_path / 'out'
+    journal = tmp_path / 'run.jsonl'
+    failed = {'input': str(src / 'a.wav'), 'output': None, 'status': 'failed',
+              'error': 'disk full', 'duration': 0.1, 'metadata': None}
+    journal.write_text(
+        json.dumps({'event': 'start', 'src': str(src), 'out': str(out), 'options': None}) + '\n'
+        + json.dumps({'event': 'started', 'key': 'a.wav'}) + '\n'
+        + json.dumps({'event': 'done', 'key': 'a.wav', 'result': failed}) + '\n'
+    )
+    state = load_journal(journal)
+    assert state['done'] == {} and state['failed'] == ['a.wav'] and state['in_flight'] == ['a.wav']
+    r = process_directory(src, out, embed=False, jobs=1, resume=str(journal))
+    assert r['success_count'] == 2 and r['failed_count'] == 0
+    assert (out / 'a.aaf.manifest.json').exists()
+    state = load_journal(journal)
+    assert sorted(state['done']) == ['a.wav', 'b.wav'] and state['failed'] == []
@@ -0,0 +1,87 @@
+import os
+import pickle
+
+from mxto_aaf import metacache, metadata
+from mxto_aaf.metacache import MetadataCache
+from mxto_aaf.metadata import MusicMetadata, extract_music_metadata
+
+
+def _counting_extractor(monkeypatch):
+    calls = []
+
+    def extract(path, *options):
+        calls.append(path)
+        return MusicMetadata(path=path, track_name=f"take {len(calls)}", track="3", total_tracks=9,
+                             duration=12.5, raw={"title": ["take"], "frame": object()})
+
+    monkeypatch.setattr(metadata, "_extract_music_metadata", extract)
+    return calls
+
+
+def test_rerun_hits_until_file_changes(tmp_path, monkeypatch):
+    calls = _counting_extractor(monkeypatch)
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"one")
+    cache = MetadataCache(tmp_path / "md.sqlite")
+
+    first = extract_music_metadata(str(src), cache=cache)
+    again = extract_music_metadata(str(src), cache=MetadataCache(tmp_path / "md.sqlite"))
+    assert len(calls) == 1
+    assert (again.path, again.track_name, again.total_tracks, again.duration) == (str(src), "take 1", 9, 12.5)
+    assert again.raw["title"] == ["take"] and isinstance(again.raw["frame"], str)
+    assert first.track_name == again.track_name
+
+    src.write_bytes(b"longer")  # size changes
+    assert extract_music_metadata(str(src), cache=cache).track_name == "take 2"
+    st = src.stat()
+    os.utime(src, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))  # mtime only
+    assert extract_music_metadata(str(src), cache=cache).track_name == "take 3"
+    assert extract_music_metadata(str(src), cache=cache).track_name == "take 3"
+    assert (cache.hits, cache.misses) == (1, 3)
+
+
+def test_extractor_version_and_invalidate(tmp_path, monkeypatch):
+    calls = _counting_extractor(monkeypatch)
+    src = tmp_path / "a.wav"
+    src.write_bytes(b"one")
+    db = tmp_path / "md.sqlite"
+    extract_music_metadata(str(src), cache=MetadataCache(db))
+
+    monkeypatch.setattr(metacache, "EXTRACTOR_VERSION", metadata.EXTRACTOR_VERSION + 1)
+    newer = MetadataCache(db)
+    extract_music_metadata(str(src), cache=newer)
+    extract_music_metadata(str(src), cache=newer)
+    assert len(calls) == 2
+
+    newer.invalidate(src)
+    extract_music_metadata(str(src), cache=newer)
+    assert len(calls) == 3
+    src.unlink()
+    assert newer.prune() == 1
+    assert newer.stats()["entries"] == 0
+
+
+def test_cache_pickles_without_connection(tmp_path, monkeypatch):
+    _counting_extractor(monkeypatch)
+    src = tmp_path / "a.m4a"
+    src.write_bytes(b"one")
+    cache = MetadataCache(tmp_path / "md.sqlite")
+    extract_music_metadata(str(src), cache=cache)
+    clone = pickle.loads(pickle.dumps(cache))
+    md, hit = clone.fetch(str(src), metadata._extract_music_metadata)
+    assert hit and md.track_name == "take 1"
+
+
+def test_variants_keep_their_own_entries(tmp_path, monkeypatch):
+    calls = _counting_extractor(monkeypatch)
+    src = tmp_path / "a.mp3"
+    src.write_bytes(b"one")
+    db = tmp_path / "md.sqlite"
+    header, scan = MetadataCache(db), MetadataCache(db, variant="duration=scan")
+    for _ in range(2):
+        extract_music_metadata(str(src), cache=header)
+        extract_music_metadata(str(src), cache=scan)
+    assert len(calls) == 2
+    assert (header.hits, scan.hits) == (1, 1)
+    assert header.prune() == 0
+    assert scan.stats()["entries"] == 2
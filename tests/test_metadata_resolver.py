@@ -0,0 +1,71 @@
+import struct
+import wave
+
+import pytest
+
+mutagen = pytest.importorskip("mutagen")
+
+from mutagen.easyid3 import EasyID3
+from mutagen.flac import FLAC
+from mutagen.id3 import TCON, TIT2, TPE1, TRCK, TXXX
+from mutagen.wave import WAVE
+
+from mxto_aaf.metadata import extract_music_metadata
+
+
+def _write_mp3(path, **tags):
+    # A few MPEG-1 Layer III frames (128 kbps, 44.1 kHz) so mutagen accepts the file
+    path.write_bytes((b"\xff\xfb\x90\x00" + b"\x00" * 413) * 8)
+    id3 = EasyID3()
+    for key, value in tags.items():
+        id3[key] = value
+    id3.save(str(path))
+
+
+def test_easy_id3_fields(tmp_path):
+    mp3 = tmp_path / "cue.mp3"
+    _write_mp3(mp3, title="Main Title", artist="Composer A", album="Score", tracknumber="6/10",
+               genre="(17)", catalognumber="CAT-1")
+    md = extract_music_metadata(str(mp3))
+    assert (md.track_name, md.artist, md.talent, md.album, md.source) == \
+        ("Main Title", "Composer A", "Composer A", "Score", "Score")
+    assert (md.track, md.total_tracks, md.genre, md.catalog_number) == ("6", 10, "Rock", "CAT-1")
+
+
+def test_id3_frames_in_wav_resolve_through_aliases(tmp_path):
+    path = tmp_path / "cue.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 960)
+    audio = WAVE(str(path))
+    audio.add_tags()
+    audio.tags.add(TIT2(encoding=3, text=["Sting"]))
+    audio.tags.add(TPE1(encoding=3, text=["Band B"]))
+    audio.tags.add(TRCK(encoding=3, text=["3"]))
+    audio.tags.add(TCON(encoding=3, text=["Unknown"]))
+    audio.tags.add(TXXX(encoding=3, desc="CATALOGNUMBER", text=["CAT-2"]))
+    audio.save()
+    md = extract_music_metadata(str(path))
+    # Frame keys are case-sensitive and only reachable through the aliases
+    assert (str(md.track_name), str(md.artist), str(md.track)) == ("Sting", "Band B", "3")
+    assert md.genre is None
+    assert md.catalog_number is None
+
+
+def test_vorbis_comments_without_title(tmp_path):
+    # STREAMINFO-only FLAC; the MP4/ID3 alias keys are not valid Vorbis keys
+    # and must not stop the other fields from resolving
+    info = struct.pack(">HH", 4096, 4096) + b"\x00" * 6
+    info += ((44100 << 44) | (1 << 41) | (15 << 36)).to_bytes(8, "big") + b"\x00" * 16
+    path = tmp_path / "cue.flac"
+    path.write_bytes(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+    audio = FLAC(str(path))
+    audio.add_tags()
+    audio["ARTIST"] = "Composer A"
+    audio["album"] = "Score"
+    audio["tracknumber"] = "2/9"
+    audio.save()
+    md = extract_music_metadata(str(path))
+    assert (md.track_name, md.artist, md.album, md.track, md.total_tracks) == ("cue", "Composer A", "Score", "2", 9)
@@ -0,0 +1,49 @@
+import pytest
+
+from mxto_aaf.metadata import extract_music_metadata
+from mxto_aaf.mpeg import scan_mpeg, scan_mpeg_duration
+
+
+def _frame(bitrate_index: int, size: int) -> bytes:
+    # MPEG-1 Layer III, 44.1 kHz, stereo
+    return bytes([0xFF, 0xFB, bitrate_index << 4, 0x00]) + b"\x00" * (size - 4)
+
+
+def _write_vbr_mp3(path):
+    # 128 kbps frames (417 bytes) then 320 kbps frames (1044 bytes), no Xing header
+    data = _frame(9, 417) * 100 + _frame(14, 1044) * 300
+    path.write_bytes(b"ID3\x03\x00\x00\x00\x00\x00\x00" + data + b"TAG" + b"\x00" * 125)
+
+
+def test_scan_counts_every_frame(tmp_path):
+    path = tmp_path / "vbr.mp3"
+    _write_vbr_mp3(path)
+    assert scan_mpeg_duration(str(path)) == pytest.approx(400 * 1152 / 44100)
+    # the ID3v2 header and the trailing ID3v1 tag are not read
+    assert scan_mpeg(str(path))[1] == 417 * 100 + 1044 * 300
+
+
+def test_scan_resyncs_past_junk(tmp_path):
+    path = tmp_path / "junk.mp3"
+    path.write_bytes(_frame(9, 417) * 10 + b"\xff\x00junk" * 7 + _frame(9, 417) * 10)
+    assert scan_mpeg_duration(str(path)) == pytest.approx(20 * 1152 / 44100)
+
+
+def test_duration_policy_scan(tmp_path):
+    pytest.importorskip("mutagen")
+    path = tmp_path / "vbr.mp3"
+    _write_vbr_mp3(path)
+    header = extract_music_metadata(str(path), duration_policy="header").duration
+    scanned = extract_music_metadata(str(path), duration_policy="scan").duration
+    # mutagen extrapolates the first frame's 128 kbps over the whole file
+    assert header > 20
+    assert scanned == pytest.approx(400 * 1152 / 44100)
+
+
+def test_ranged_scan_counts_the_scanned_bytes(tmp_path):
+    pytest.importorskip("mutagen")
+    path = tmp_path / "vbr.mp3"
+    _write_vbr_mp3(path)
+    header = extract_music_metadata(str(path), ranged=True, duration_policy="header")
+    scanned = extract_music_metadata(str(path), ranged=True, duration_policy="scan")
+    assert scanned.bytes_read == header.bytes_read + 417 * 100 + 1044 * 300
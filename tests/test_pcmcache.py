@@ -0,0 +1,102 @@
+import os
+import wave
+
+from mxto_aaf import pcmcache
+from mxto_aaf.pcmcache import PCMCache
+
+
+def _stage_entry(cache, payload=b"\x00" * 400):
+    staging = cache.stage()
+    for c in (1, 2):
+        with open(os.path.join(staging, f"pcm.ch{c}.wav"), "wb") as fh:
+            fh.write(payload)
+    return staging
+
+
+def test_key_depends_on_content_and_decode_params(tmp_path):
+    cache = PCMCache(tmp_path / "cache")
+    a = tmp_path / "a.mp3"
+    a.write_bytes(b"one")
+    key = cache.key(a, 48000, 16)
+    assert key == cache.key(a, 48000, 16)
+    assert key != cache.key(a, 44100, 16)
+    assert key != cache.key(a, 48000, 24)
+    a.write_bytes(b"two")
+    assert key != cache.key(a, 48000, 16)
+
+
+def test_commit_then_lookup(tmp_path):
+    cache = PCMCache(tmp_path / "cache")
+    assert cache.lookup("ab" * 32) is None
+    paths = cache.commit("ab" * 32, _stage_entry(cache))
+    assert cache.lookup("ab" * 32) == paths
+    assert all(os.path.exists(p) for p in paths)
+    assert cache.stats() == {"entries": 1, "bytes": 800}
+
+
+def test_evicts_least_recently_used(tmp_path, monkeypatch):
+    monkeypatch.setattr(pcmcache, "_EVICT_GRACE_S", 0.0)
+    cache = PCMCache(tmp_path / "cache", max_bytes=2000)
+    keys = ["aa" * 32, "bb" * 32, "cc" * 32]
+    for age, key in zip((30, 20), keys):
+        cache.commit(key, _stage_entry(cache))
+        entry = cache.root / key[:2] / key
+        os.utime(entry, (entry.stat().st_atime - age, entry.stat().st_mtime - age))
+    # Touch the oldest so the middle one becomes least recently used
+    cache.lookup(keys[0])
+    cache.commit(keys[2], _stage_entry(cache))
+    assert cache.lookup(keys[1]) is None
+    assert cache.lookup(keys[0]) and cache.lookup(keys[2])
+
+
+def test_rerun_with_other_options_skips_decode(tmp_path, monkeypatch):
+    import mxto_aaf.batch as batch
+
+    calls = []
+
+    def fake_split(src, prefix, channels=2, samplerate=48000, bits=16):
+        calls.append(src)
+        out = []
+        for c in range(1, channels + 1):
+            path = f"{prefix}.ch{c}.wav"
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(bits // 8)
+                wf.setframerate(samplerate)
+                wf.writeframes(b"\x00\x00" * 480)
+            out.append(path)
+        return out
+
+    monkeypatch.setattr(batch, "split_to_mono_wavs", fake_split)
+    src = tmp_path / "src"
+    src.mkdir()
+    (src / "song.mp3").write_bytes(b"not really an mp3")
+    cache_dir = tmp_path / "pcm"
+
+    first = batch.process_directory(src, tmp_path / "out1", embed=True, jobs=1, pcm_cache=cache_dir)
+    second = batch.process_directory(src, tmp_path / "out2", embed=True, jobs=1, pcm_cache=cache_dir, fps=25.0)
+
+    assert first["success_count"] == second["success_count"] == 1
+    assert len(calls) == 1
+    assert (first["pcm_cache"]["misses"], second["pcm_cache"]["hits"]) == (1, 1)
+    # Cached WAVs are not temp files: they survive the conversions
+    assert second["pcm_cache"]["entries"] == 1
+    assert not list((tmp_path / "out2").glob("*.wav"))
+
+
+def test_commits_under_the_limit_walk_the_tree_once(tmp_path, monkeypatch):
+    cache = PCMCache(tmp_path / "cache", max_bytes=10 ** 6)
+    walks = []
+    real_entries = cache._entries
+    monkeypatch.setattr(cache, "_entries", lambda: walks.append(1) or real_entries())
+    for i in range(20):
+        cache.commit(f"{i:02x}" * 32, _stage_entry(cache))
+    assert len(walks) == 1
+    assert cache.stats()["bytes"] == 20 * 800
+
+
+def test_pcm_cache_rejects_pipe_decode(tmp_path):
+    import pytest
+    from mxto_aaf.batch import process_directory
+    with pytest.raises(ValueError):
+        process_directory(tmp_path, tmp_path / "out", embed=True, pipe_decode=True, pcm_cache=tmp_path / "cache")
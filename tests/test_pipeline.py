@@ -0,0 +1,34 @@
+import time
+from mxto_aaf.pipeline import Stage, run_pipeline
+
+
+def test_pipeline_runs_every_stage_and_reports_stats():
+    seen = []
+
+    def slow_double(x):
+        time.sleep(0.01)
+        return x * 2
+
+    stats = run_pipeline(
+        range(10),
+        [Stage("a", lambda x: x + 1, 2), Stage("b", slow_double, 3)],
+        on_result=seen.append,
+        queue_depth=2,
+    )
+    assert sorted(seen) == [(i + 1) * 2 for i in range(10)]
+    assert set(stats["stages"]) == {"a", "b", "report"}
+    assert stats["stages"]["b"]["items"] == 10
+    assert stats["stages"]["b"]["workers"] == 3
+    assert stats["stages"]["b"]["busy_s"] > 0
+    assert stats["stages"]["a"]["max_queue_depth"] <= 2
+
+
+def test_pipeline_forwards_items_when_a_stage_raises():
+    seen = []
+
+    def boom(x):
+        raise ValueError("nope")
+
+    stats = run_pipeline([1, 2, 3], [Stage("boom", boom)], on_result=seen.append)
+    assert sorted(seen) == [1, 2, 3]
+    assert stats["stages"]["boom"]["errors"] == 3
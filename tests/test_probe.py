@@ -0,0 +1,63 @@
+import json
+import sys
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+
+from mxto_aaf import probe
+from mxto_aaf.metadata import extract_music_metadata
+from mxto_aaf.probe import ProbeService
+
+
+def _fake_ffprobe(tmp_path, tags):
+    # Stands in for the ffprobe binary: prints a format section for any input
+    script = tmp_path / "ffprobe"
+    out = {"format": {"duration": "2.5", "tags": tags}}
+    script.write_text(f"#!{sys.executable}\nprint({json.dumps(json.dumps(out))})\n")
+    script.chmod(0o755)
+    return str(script)
+
+
+def test_untagged_wav_reads_tags_through_service(tmp_path):
+    path = tmp_path / "01 Cue.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 960)
+    service = ProbeService(workers=2, ffprobe=_fake_ffprobe(tmp_path, {"title": "Sting", "artist": "Band B",
+                                                                        "track": "4/12"}))
+    md = extract_music_metadata(str(path), probe=service)
+    assert (md.track_name, md.talent, md.track, md.total_tracks) == ("Sting", "Band B", "4", 12)
+    assert service.runs == 1
+
+
+def test_service_bounds_concurrency(tmp_path, monkeypatch):
+    active, peak = [0], [0]
+    lock = threading.Lock()
+
+    def fake_probe_format(path, ffprobe=None):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        return {"tags": {"title": path}}
+
+    monkeypatch.setattr(probe, "probe_format", fake_probe_format)
+    service = ProbeService(workers=3, ffprobe="ffprobe")
+    paths = [f"{i}.wav" for i in range(12)]
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        results = list(pool.map(service.probe, paths))
+    assert [r["tags"]["title"] for r in results] == paths
+    assert peak[0] == 3
+    assert service.runs == 12
+
+
+def test_missing_ffprobe_returns_none(monkeypatch):
+    monkeypatch.setattr(probe, "_get_ffprobe_path", lambda: None)
+    service = ProbeService()
+    assert not service.available
+    assert service.probe("x.wav") is None
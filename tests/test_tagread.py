@@ -0,0 +1,63 @@
+import subprocess
+import wave
+
+import pytest
+
+mutagen = pytest.importorskip("mutagen")
+
+from mutagen import File as MutagenFile
+from mutagen.easyid3 import EasyID3
+from mutagen.id3 import TIT2, TPE1
+from mutagen.wave import WAVE
+
+from mxto_aaf.metadata import extract_music_metadata
+from mxto_aaf.tagread import read_tags
+from mxto_aaf.utils import _get_ffmpeg_path
+
+
+def _same_as_mutagen(path):
+    audio, nbytes = read_tags(str(path))
+    full = MutagenFile(str(path), easy=True)
+    assert type(audio) is type(full)
+    assert dict(audio.tags) == dict(full.tags)
+    assert audio.info.length == full.info.length
+    return nbytes
+
+
+def test_mp3_reads_only_tag_and_first_frames(tmp_path):
+    path = tmp_path / "long.mp3"
+    path.write_bytes((b"\xff\xfb\x90\x00" + b"\x00" * 413) * 5000)  # ~2 MB of frames
+    id3 = EasyID3()
+    id3["title"] = "Main Title"
+    id3["artist"] = "Composer A"
+    id3.save(str(path))
+    assert _same_as_mutagen(path) < 32 * 1024
+    md = extract_music_metadata(str(path), ranged=True)
+    assert (md.track_name, md.artist) == ("Main Title", "Composer A")
+    assert 0 < md.bytes_read < 32 * 1024
+    assert extract_music_metadata(str(path)).bytes_read is None
+
+
+def test_wav_id3_chunk_after_audio(tmp_path):
+    path = tmp_path / "long.wav"
+    with wave.open(str(path), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 48000 * 4 * 10)
+    audio = WAVE(str(path))
+    audio.add_tags()
+    audio.tags.add(TIT2(encoding=3, text=["Sting"]))
+    audio.tags.add(TPE1(encoding=3, text=["Band B"]))
+    audio.save()
+    assert _same_as_mutagen(path) < 32 * 1024
+
+
+@pytest.mark.skipif(_get_ffmpeg_path() is None, reason="ffmpeg not available")
+def test_m4a_with_moov_at_end(tmp_path):
+    path = tmp_path / "long.m4a"
+    subprocess.run([_get_ffmpeg_path(), "-v", "error", "-y", "-f", "lavfi", "-i", "sine=f=440:d=40",
+                    "-c:a", "aac", "-b:a", "256k", "-metadata", "title=Long One", "-metadata", "track=3/9",
+                    str(path)], check=True)
+    assert path.stat().st_size > 512 * 1024
+    assert _same_as_mutagen(path) < 64 * 1024
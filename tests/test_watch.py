@@ -0,0 +1,105 @@
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from mxto_aaf import watch
+from mxto_aaf.batch import process_directory
+from mxto_aaf.watch import watch_directory
+
+
+def _run_watch(tmp_path, write_wav, use_inotify, **options):
+    src = tmp_path / 'drop'
+    src.mkdir()
+    write_wav(src / 'existing.wav')
+    # a decode's per-channel temp file, e.g. from the CLI writing next to the source
+    write_wav(src / 'existing.tmp.ch1.wav')
+    out = tmp_path / 'out'
+    stop = threading.Event()
+    seen = []
+    t = threading.Thread(target=watch_directory, args=(src, out), kwargs=dict(
+        jobs=1, settle=0.2, poll_interval=0.1, use_inotify=use_inotify, stop=stop, on_result=seen.append,
+        **options))
+    t.start()
+    try:
+        time.sleep(0.5)
+        (src / 'new').mkdir()
+        write_wav(src / 'new' / 'arrived.wav')
+        deadline = time.time() + 10
+        while len(seen) < 2 and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        t.join(10)
+    assert sorted(Path(r['input']).name for r in seen) == ['arrived.wav', 'existing.wav']
+    assert (out / 'new' / 'arrived.aaf.manifest.json').exists()
+    return src, out, seen
+
+
+def test_watch_polling(tmp_path, write_wav):
+    _run_watch(tmp_path, write_wav, use_inotify=False)
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='inotify is Linux-only')
+def test_watch_inotify(tmp_path, write_wav):
+    _run_watch(tmp_path, write_wav, use_inotify=True)
+
+
+def test_watch_and_batch_share_the_build_cache(tmp_path, write_wav):
+    src, out, _ = _run_watch(tmp_path, write_wav, use_inotify=False)
+    # a batch run with the same options finds watch's entries up to date
+    r = process_directory(src, out, embed=False, jobs=1, incremental=True)
+    status = {Path(x['input']).name: x['status'] for x in r['results']}
+    assert status['existing.wav'] == status['arrived.wav'] == 'skipped'
+
+
+def test_watch_uses_the_batch_options(tmp_path, write_wav):
+    md_cache = tmp_path / 'tags.sqlite'
+    _, _, seen = _run_watch(tmp_path, write_wav, use_inotify=False, metadata_cache=md_cache,
+                            duration_policy='scan')
+    assert [r['metadata_cache'] for r in seen] == ['miss', 'miss']
+    assert md_cache.exists()
+    with pytest.raises(ValueError):
+        watch_directory(tmp_path / 'drop', tmp_path / 'out', pipe_decode=True, pcm_cache=tmp_path / 'pcm')
+
+
+_real_process_single_file = watch._process_single_file
+
+
+def _exit_on_boom(p, *args):
+    # Stands in for a worker killed mid-conversion (OOM killer, crash)
+    if p.name == 'boom.wav':
+        os._exit(9)
+    return _real_process_single_file(p, *args)
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork', reason='workers must inherit the patch')
+def test_watch_survives_a_dead_worker(tmp_path, write_wav, monkeypatch):
+    monkeypatch.setattr(watch, '_process_single_file', _exit_on_boom)
+    src = tmp_path / 'drop'
+    src.mkdir()
+    for name in ('boom.wav', 'fine.wav'):
+        write_wav(src / name)
+    stop = threading.Event()
+    seen = []
+    t = threading.Thread(target=watch_directory, args=(src, tmp_path / 'out'), kwargs=dict(
+        jobs=2, settle=0.2, poll_interval=0.1, use_inotify=False, stop=stop, on_result=seen.append))
+    t.start()
+    try:
+        deadline = time.time() + 20
+        while len(seen) < 2 and time.time() < deadline:
+            time.sleep(0.1)
+        # the pool was replaced: a later delivery still converts
+        write_wav(src / 'later.wav')
+        while len(seen) < 3 and time.time() < deadline:
+            time.sleep(0.1)
+    finally:
+        stop.set()
+        t.join(10)
+    status = {Path(r['input']).name: r['status'] for r in seen}
+    assert status == {'boom.wav': 'failed', 'fine.wav': 'success', 'later.wav': 'success'}
+    assert 'worker process died' in next(r['error'] for r in seen if r['status'] == 'failed')
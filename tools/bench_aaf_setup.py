@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Measure the fixed per-AAF cost of create_music_aaf on short files.
+
+For short tracks most of the time goes into building an empty AAF
+(header + dictionary) and saving it, not into the essence. This writes N
+AAFs from a short stereo WAV with and without the pre-built template
+(`mxto_aaf.aaf.USE_AAF_TEMPLATE`) and reports ms per AAF, split into
+open / add mobs / save.
+
+    python tools/bench_aaf_setup.py --files 20 --seconds 1
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mxto_aaf.aaf as aafmod  # noqa: E402
+from mxto_aaf.metadata import MusicMetadata  # noqa: E402
+
+
+def run(wav: str, out_dir: str, count: int) -> dict:
+    md = MusicMetadata(path=wav, track_name="bench", raw={})
+    totals = {"open": 0.0, "mobs": 0.0, "save": 0.0}
+    for i in range(count):
+        t0 = time.perf_counter()
+        f = aafmod._open_new_aaf(os.path.join(out_dir, f"{i}.aaf"))
+        t1 = time.perf_counter()
+        aafmod._add_music_mobs(f, wav, md, None, 24.0)
+        t2 = time.perf_counter()
+        f.close()
+        t3 = time.perf_counter()
+        totals["open"] += t1 - t0
+        totals["mobs"] += t2 - t1
+        totals["save"] += t3 - t2
+    return {k: v / count * 1000 for k, v in totals.items()}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=20, help="AAFs to write per mode (default: 20)")
+    parser.add_argument("--seconds", type=float, default=1.0, help="length of the test WAV (default: 1)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        wav = os.path.join(tmp, "short.wav")
+        with wave.open(wav, "wb") as wf:
+            wf.setnchannels(2)
+            wf.setsampwidth(2)
+            wf.setframerate(48000)
+            wf.writeframes(os.urandom(int(args.seconds * 48000) * 4))
+        print(f"{args.files} AAFs from a {args.seconds:g} s stereo WAV (ms per AAF):")
+        for label, use_template in (("fresh AAF", False), ("template", True)):
+            aafmod.USE_AAF_TEMPLATE = use_template
+            aafmod._open_new_aaf(os.path.join(tmp, "warmup.aaf")).close()
+            ms = run(wav, tmp, args.files)
+            print(f"  {label:>10}: open {ms['open']:6.1f}  mobs {ms['mobs']:6.1f}  save {ms['save']:6.1f}  "
+                  f"total {sum(ms.values()):6.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Micro-benchmark for splitting interleaved PCM into per-channel buffers.
+
+Compares the original per-sample loop (one Python slice per sample) with
+`mxto_aaf.aaf._split_channels` using memoryview casts / byte lanes (no
+NumPy) and using NumPy strided views, for 16/24/32-bit stereo, and the
+chunked WAV reader the AAF writer streams from (read + split per chunk).
+Outputs are checked against the loop.
+
+    python tools/bench_deinterleave.py --seconds 30
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import mxto_aaf.aaf as aafmod  # noqa: E402
+
+
+def loop_split(raw: bytes, nch: int, sampwidth: int) -> list[bytearray]:
+    """The original create_music_aaf split, kept here as the baseline."""
+    nframes = len(raw) // (nch * sampwidth)
+    bytes_per_frame = sampwidth * nch
+    channel_bytes = [bytearray() for _ in range(nch)]
+    for i in range(nframes):
+        off = i * bytes_per_frame
+        for c in range(nch):
+            start = off + c * sampwidth
+            channel_bytes[c].extend(raw[start:start + sampwidth])
+    return channel_bytes
+
+
+def stream_split(wav: str, nch: int, width: int) -> list[bytearray]:
+    out = [bytearray() for _ in range(nch)]
+    for chunk in aafmod._wav_reader(wav):
+        for buf, chdata in zip(out, aafmod._split_channels(chunk, nch, width)):
+            buf += memoryview(chdata)
+    return out
+
+
+def timed(fn, *args) -> tuple[float, list]:
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, [bytes(b) for b in out]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=10.0, help="audio length per test at 48 kHz stereo (default: 10)")
+    parser.add_argument("--skip-loop", action="store_true", help="don't time the per-sample loop (slow for long inputs)")
+    args = parser.parse_args(argv)
+
+    numpy = aafmod.np
+    nch, rate = 2, 48000
+    frames = int(args.seconds * rate)
+    print(f"{args.seconds:g} s stereo @ 48 kHz, NumPy {'available' if numpy is not None else 'NOT installed'}")
+    for width in (2, 3, 4):
+        raw = os.urandom(frames * nch * width)
+        results = {}
+        if not args.skip_loop:
+            results["per-sample loop"] = timed(loop_split, raw, nch, width)
+        aafmod.np = None
+        results["memoryview/lanes"] = timed(aafmod._split_channels, raw, nch, width)
+        aafmod.np = numpy
+        if numpy is not None:
+            results["numpy strided"] = timed(aafmod._split_channels, raw, nch, width)
+        with tempfile.TemporaryDirectory() as tmp:
+            wav = os.path.join(tmp, "in.wav")
+            with wave.open(wav, "wb") as wf:
+                wf.setnchannels(nch)
+                wf.setsampwidth(width)
+                wf.setframerate(rate)
+                wf.writeframes(raw)
+            results["chunked WAV"] = timed(stream_split, wav, nch, width)
+
+        reference = next(iter(results.values()))[1]
+        print(f"{width * 8}-bit:")
+        base = next(iter(results.values()))[0]
+        for label, (elapsed, out) in results.items():
+            ok = "ok" if out == reference else "MISMATCH"
+            print(f"  {label:>18}: {elapsed * 1000:9.1f} ms  ({base / elapsed:7.1f}x)  {ok}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""Duration accuracy and cost of the --duration-policy sources for MP3s.
+
+Writes VBR MP3s with no Xing header (a run of 128 kbps frames followed
+by 320 kbps frames, so mutagen's first-frame estimate is wrong) plus a
+CBR control, and reports for each the true length, the `header` estimate
+and the `scan` result, with ms per file for both.
+
+    python tools/bench_duration.py --seconds 600
+    python tools/bench_duration.py --corpus /Volumes/NAS/Music
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mxto_aaf.metadata import extract_music_metadata  # noqa: E402
+
+FRAME_SECONDS = 1152 / 44100
+FRAME_128K = b"\xff\xfb\x90\x00" + b"\x00" * 413
+FRAME_128K_PADDED = b"\xff\xfb\x92\x00" + b"\x00" * 414
+FRAME_320K = b"\xff\xfb\xe0\x00" + b"\x00" * 1040
+
+
+def cbr_frames(count: int) -> bytes:
+    # 128 kbps is 417.96 bytes per frame, so encoders pad most frames by one byte
+    exact = 128000 * 1152 / 8 / 44100
+    return b"".join(FRAME_128K_PADDED if int((i + 1) * exact) - int(i * exact) == 418 else FRAME_128K
+                    for i in range(count))
+
+
+def make_corpus(root: Path, seconds: int) -> list[tuple[str, float]]:
+    frames = int(seconds / FRAME_SECONDS)
+    out = []
+    for name, low in (("cbr.mp3", frames), ("vbr_75.mp3", frames * 3 // 4),
+                      ("vbr_25.mp3", frames // 4), ("vbr_05.mp3", frames // 20)):
+        path = root / name
+        path.write_bytes(cbr_frames(low) + FRAME_320K * (frames - low))
+        out.append((str(path), frames * FRAME_SECONDS))
+    return out
+
+
+def timed(path: str, policy: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    md = extract_music_metadata(path, duration_policy=policy)
+    return md.duration or 0.0, time.perf_counter() - start
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="measure the MP3s in this folder instead of a generated corpus")
+    parser.add_argument("--seconds", type=int, default=600, help="length of the generated files (default: 600)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            files = [(str(p), None) for p in sorted(Path(args.corpus).rglob("*")) if p.suffix.lower() == ".mp3"]
+        else:
+            files = make_corpus(Path(tmp), args.seconds)
+        if not files:
+            raise SystemExit("no MP3 files found")
+
+        totals = {"header": 0.0, "scan": 0.0}
+        differ = 0
+        print(f"{'file':<32} {'true':>9} {'header':>9} {'scan':>9}")
+        for path, true in files:
+            header, t_header = timed(path, "header")
+            scan, t_scan = timed(path, "scan")
+            totals["header"] += t_header
+            totals["scan"] += t_scan
+            differ += abs(header - scan) > 0.5
+            if len(files) <= 50:
+                shown = f"{true:9.2f}" if true is not None else f"{'?':>9}"
+                print(f"{os.path.basename(path)[:32]:<32} {shown} {header:9.2f} {scan:9.2f}")
+        n = len(files)
+        print(f"{n} files, {differ} where header and scan differ by more than 0.5 s")
+        for label, elapsed in totals.items():
+            print(f"  {label:>6}: {elapsed * 1000 / n:.2f} ms/file")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Time the ffprobe fallback on untagged files, one at a time vs concurrent.
+
+Writes N short untagged WAVs (so mutagen finds no tags and every file
+goes to ffprobe) and reads their metadata sequentially, then through a
+`mxto_aaf.probe.ProbeService` with 2..--workers concurrent ffprobe runs
+(the way batch and pack runs now probe their files). Reports ms per file
+and checks every pass returns the same metadata.
+
+    python tools/bench_ffprobe.py --files 200 --workers 8
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mxto_aaf.metadata import extract_music_metadata  # noqa: E402
+from mxto_aaf.probe import ProbeService  # noqa: E402
+
+
+def run(paths: list[str], service: ProbeService, workers: int) -> tuple[float, list]:
+    start = time.perf_counter()
+    if workers == 1:
+        out = [extract_music_metadata(p, probe=service) for p in paths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            out = list(pool.map(lambda p: extract_music_metadata(p, probe=service), paths))
+    return time.perf_counter() - start, out
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=200, help="untagged WAVs to probe (default: 200)")
+    parser.add_argument("--workers", type=int, default=8, help="largest number of concurrent ffprobe runs (default: 8)")
+    parser.add_argument("--ffprobe", help="ffprobe binary to use (default: bundled, then PATH)")
+    args = parser.parse_args(argv)
+
+    service = ProbeService(workers=1, ffprobe=args.ffprobe)
+    if not service.available:
+        raise SystemExit("ffprobe not found")
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for i in range(args.files):
+            path = os.path.join(tmp, f"{i:05d} Untagged.wav")
+            with wave.open(path, "wb") as wf:
+                wf.setnchannels(2)
+                wf.setsampwidth(2)
+                wf.setframerate(48000)
+                wf.writeframes(b"\x00" * 4800 * 4)
+            paths.append(path)
+
+        print(f"{args.files} untagged WAVs via {service.ffprobe} (ms per file):")
+        base, reference = None, None
+        workers = 1
+        while True:
+            elapsed, out = run(paths, ProbeService(workers=workers, ffprobe=service.ffprobe), workers)
+            base = base or elapsed
+            reference = reference or [vars(md) for md in out]
+            ok = "ok" if [vars(md) for md in out] == reference else "MISMATCH"
+            print(f"  {workers:>2} concurrent: {elapsed * 1000 / len(paths):7.2f}  ({base / elapsed:5.2f}x)  {ok}")
+            if workers >= args.workers:
+                break
+            workers = min(args.workers, workers * 2)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+"""Benchmark per-file tag extraction (`extract_music_metadata`).
+
+Generates a corpus of small tagged files (MP3 with ID3v2 via EasyID3,
+WAV/AIFF with ID3 frames, M4A atoms when ffmpeg is available, FLAC Vorbis
+comments on request) with randomly missing/odd fields, then times the
+original field resolution (one alias dict built per lookup, mutagen
+lookups per alias, genre regex and table rebuilt per call) against the
+current table-driven resolver and checks both return identical results.
+It also times a re-scan served from a warm persistent metadata cache
+(`mxto_aaf.metacache`), i.e. one stat plus one SQLite lookup per file.
+
+    python tools/bench_metadata.py --files 2000
+    python tools/bench_metadata.py --corpus ~/Music/library --repeat 1
+
+Only the mutagen path is compared; files without any tags (which fall
+back to ffprobe in both versions) are not generated.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import re
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mutagen import File as MutagenFile  # noqa: E402
+from mutagen.aiff import AIFF  # noqa: E402
+from mutagen.easyid3 import EasyID3  # noqa: E402
+from mutagen.easymp4 import EasyMP4  # noqa: E402
+from mutagen.flac import FLAC  # noqa: E402
+from mutagen.id3 import COMM, TALB, TCOM, TCON, TIT2, TPE1, TPE2, TRCK, TXXX  # noqa: E402
+from mutagen.wave import WAVE  # noqa: E402
+
+from mxto_aaf.metacache import MetadataCache  # noqa: E402
+from mxto_aaf.metadata import MusicMetadata, extract_music_metadata  # noqa: E402
+from mxto_aaf.utils import _get_ffmpeg_path  # noqa: E402
+
+FORMATS = ("mp3", "wav", "aiff", "m4a", "flac")
+
+
+def legacy_extract(path: str) -> MusicMetadata:
+    """The original mutagen-path resolution, kept here as the baseline."""
+    raw = {}
+    track_name = artist = album_artist = talent = composer = source = album = track = catalog = description = None
+    total_tracks = None
+    genre = None
+    duration = None
+    try:
+        f = MutagenFile(path, easy=True)
+        if f is not None:
+            raw.update({k: v for k, v in f.tags.items()} if getattr(f, "tags", None) else {})
+            info = getattr(f, "info", None)
+            if info and hasattr(info, "length"):
+                duration = float(info.length)
+
+            def _first(tagname):
+                if not getattr(f, "tags", None):
+                    return None
+                v = f.tags.get(tagname)
+                if v:
+                    return v[0] if isinstance(v, (list, tuple)) else v
+                aliases = {
+                    "title": ["\u00a9nam", "TIT2", "TITLE"],
+                    "artist": ["\u00a9ART", "TPE1", "performer", "ARTIST", "album_artist"],
+                    "composer": ["\u00a9wrt", "TCOM", "COMPOSER"],
+                    "album": ["\u00a9alb", "TALB", "ALBUM"],
+                    "tracknumber": ["trkn", "TRCK", "TRACK", "track", "tracknumber"],
+                    "comment": ["desc", "COMM", "description", "COMMENT"],
+                    "catalog": ["catalognumber", "cat", "CATALOGNUMBER", "catalog"],
+                }
+                for key, vals in aliases.items():
+                    if tagname == key:
+                        for a in vals:
+                            if a in f.tags:
+                                vv = f.tags.get(a)
+                                return vv[0] if isinstance(vv, (list, tuple)) else vv
+                return None
+
+            track_name = _first("title")
+            artist = _first("artist")
+            album_artist = _first("album_artist") or _first("albumartist") or _first("album-artist")
+            talent = _first("talent") or artist or album_artist or _first("authors")
+            composer = _first("composer") or _first("COMPOSER")
+            album = _first("album")
+            source = album or _first("publisher") or _first("label")
+            track_field = _first("tracknumber")
+            if track_field and isinstance(track_field, str) and "/" in track_field:
+                try:
+                    parts = track_field.split("/")
+                    track = parts[0].strip()
+                    total_tracks = int(parts[1].strip()) if parts[1].strip().isdigit() else None
+                except Exception:
+                    track = track_field
+                    total_tracks = None
+            else:
+                track = track_field
+                total_tracks = None
+            description = _first("comment") or _first("description") or _first("notes")
+            genre = _first("genre") or _first("GENRE") or _first("music_genre") or _first("style") or _first("contentgroup")
+            catalog = _first("catalog") or _first("catalognumber") or _first("CATALOGNUMBER") or None
+
+            def _raw_first(*keys):
+                for k in keys:
+                    v = raw.get(k)
+                    if v:
+                        return v[0] if isinstance(v, (list, tuple)) else v
+                return None
+
+            artist = artist or _raw_first("artist", "ARTIST", "\u00a9ART")
+            album_artist = album_artist or _raw_first("album_artist", "albumartist", "album-artist")
+            talent = talent or _raw_first("talent") or artist or album_artist or _raw_first("authors")
+    except Exception:
+        pass
+
+    if not track_name:
+        track_name = os.path.splitext(os.path.basename(path))[0]
+    if not artist:
+        artist = raw.get('artist') or raw.get('ARTIST') or raw.get('\u00a9ART')
+    if not album_artist:
+        album_artist = raw.get('album_artist') or raw.get('albumartist') or raw.get('album-artist')
+
+    def _normalize_genre(g):
+        if not g:
+            return g
+        s = str(g).strip()
+        m = re.match(r"^\(?\s*(\d{1,3})\s*\)?(?:\s*-?\s*(.*))?$", s)
+        if m:
+            idx = int(m.group(1))
+            remainder = (m.group(2) or '').strip()
+            ID3_V1_GENRES = [
+                "Blues","Classic Rock","Country","Dance","Disco","Funk","Grunge","Hip-Hop","Jazz","Metal","New Age","Oldies","Other","Pop","R&B","Rap","Reggae","Rock","Techno","Industrial","Alternative","Ska","Death Metal","Pranks","Soundtrack","Euro-Techno","Ambient","Trip-Hop","Vocal","Jazz+Funk","Fusion","Trance","Classical","Instrumental","Acid","House","Game","Sound Clip","Gospel","Noise","AlternRock","Bass","Soul","Punk","Space","Meditative","Instrumental Pop","Instrumental Rock","Ethnic","Gothic","Darkwave","Techno-Industrial","Electronic","Pop-Folk","Eurodance","Dream","Southern Rock","Comedy","Cult","Gangsta","Top 40","Christian Rap","Pop/Funk","Jungle","Native American","Cabaret","New Wave","Psychadelic","Rave","Showtunes","Trailer","Lo-Fi","Tribal","Acid Punk","Acid Jazz","Polka","Retro","Musical","Rock & Roll","Hard Rock",
+            ]
+            name = ID3_V1_GENRES[idx] if 0 <= idx < len(ID3_V1_GENRES) else None
+            return remainder or name or s
+        if s.lower() in {"", "unknown", "undef", "genre"}:
+            return None
+        return s
+
+    genre = _normalize_genre(genre)
+    return MusicMetadata(path=path, track_name=track_name, artist=artist, album_artist=album_artist,
+                         talent=talent, composer=composer, source=source, album=album, track=track,
+                         total_tracks=total_tracks, genre=genre, catalog_number=catalog,
+                         description=description, duration=duration, raw=raw)
+
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz frame header; 417-byte frames
+_MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+
+
+def _random_fields(rng: random.Random) -> dict:
+    def maybe(value, p=0.8):
+        return value if rng.random() < p else None
+
+    n = rng.randint(1, 20)
+    return {
+        "title": maybe(rng.choice([f"Cue {n}", "", "Main Title"])),
+        "artist": maybe(rng.choice(["Composer A", "Band B"])),
+        "albumartist": maybe("Various", 0.3),
+        "composer": maybe("Composer A", 0.5),
+        "album": maybe(rng.choice(["Library Vol 1", "Score"])),
+        "tracknumber": maybe(rng.choice([f"{n}/20", str(n), f"{n}/x"])),
+        "genre": maybe(rng.choice(["(17)", "17", "Rock", "(52) Electronica", "Unknown", "(200)"])),
+        "catalog": maybe(f"CAT-{n:04d}", 0.5),
+        "comment": maybe("library cue", 0.5),
+    }
+
+
+def _write_id3_frames(tags, fields: dict) -> None:
+    frames = {"title": TIT2, "artist": TPE1, "albumartist": TPE2, "composer": TCOM, "album": TALB,
+              "tracknumber": TRCK, "genre": TCON}
+    for key, cls in frames.items():
+        if fields[key] is not None:
+            tags.add(cls(encoding=3, text=[fields[key]]))
+    if fields["catalog"] is not None:
+        tags.add(TXXX(encoding=3, desc="CATALOGNUMBER", text=[fields["catalog"]]))
+    if fields["comment"] is not None:
+        tags.add(COMM(encoding=3, lang="eng", desc="", text=[fields["comment"]]))
+
+
+def _write_wav(path: str) -> None:
+    with wave.open(path, "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 4800)
+
+
+def _write_aiff(path: str) -> None:
+    frames = 1200
+    comm = struct.pack(">hIh", 2, frames, 16) + b"\x40\x0e\xbb\x80" + b"\x00" * 6  # 48000 as 80-bit float
+    ssnd = struct.pack(">II", 0, 0) + b"\x00" * (frames * 4)
+    body = b"AIFF" + b"COMM" + struct.pack(">I", len(comm)) + comm + b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    with open(path, "wb") as fh:
+        fh.write(b"FORM" + struct.pack(">I", len(body)) + body)
+
+
+def _write_flac(path: str) -> None:
+    # STREAMINFO only: 4096-sample blocks, 44.1 kHz, stereo, 16-bit, 0 samples
+    info = struct.pack(">HH", 4096, 4096) + b"\x00" * 6
+    info += ((44100 << 44) | (1 << 41) | (15 << 36)).to_bytes(8, "big") + b"\x00" * 16
+    with open(path, "wb") as fh:
+        fh.write(b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info)
+
+
+def make_corpus(folder: Path, count: int, formats: list[str], seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    m4a_template = None
+    if "m4a" in formats:
+        ffmpeg = _get_ffmpeg_path()
+        if ffmpeg:
+            m4a_template = str(folder / "template.m4a")
+            subprocess.run([ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", "sine=duration=0.1",
+                            "-c:a", "aac", m4a_template], check=True)
+        else:
+            print("ffmpeg not found; skipping m4a")
+            formats = [f for f in formats if f != "m4a"]
+    paths = []
+    for i in range(count):
+        fmt = formats[i % len(formats)]
+        fields = _random_fields(rng)
+        if not any(v is not None for v in fields.values()):
+            fields["title"] = "Untitled"
+        path = str(folder / f"clip_{i:05d}.{fmt}")
+        if fmt == "mp3":
+            with open(path, "wb") as fh:
+                fh.write(_MP3_FRAME * 8)
+            tags = EasyID3()
+            for key in ("title", "artist", "albumartist", "composer", "album", "tracknumber", "genre"):
+                if fields[key] is not None:
+                    tags[key] = fields[key]
+            if fields["catalog"] is not None:
+                tags["catalognumber"] = fields["catalog"]
+            tags.save(path)
+        elif fmt in ("wav", "aiff"):
+            (_write_wav if fmt == "wav" else _write_aiff)(path)
+            audio = WAVE(path) if fmt == "wav" else AIFF(path)
+            audio.add_tags()
+            _write_id3_frames(audio.tags, fields)
+            audio.save()
+        elif fmt == "m4a":
+            shutil.copyfile(m4a_template, path)
+            audio = EasyMP4(path)
+            for key in ("title", "artist", "albumartist", "album", "tracknumber", "genre", "comment"):
+                value = fields[key]
+                if key == "tracknumber" and value is not None and not value.replace("/", "").isdigit():
+                    value = value.split("/")[0]
+                if value is not None:
+                    audio[key] = value
+            audio.save()
+        else:
+            _write_flac(path)
+            audio = FLAC(path)
+            audio.add_tags()
+            for key, value in fields.items():
+                if value is not None:
+                    audio[key] = value
+            audio.save()
+        paths.append(path)
+    return paths
+
+
+def timed(fn, paths: list[str], repeat: int) -> tuple[float, list]:
+    best, out = float("inf"), []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = [fn(p) for p in paths]
+        best = min(best, time.perf_counter() - start)
+    return best, out
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=2000, help="tagged files to generate (default: 2000)")
+    parser.add_argument("--formats", default="mp3,wav,aiff,m4a",
+                        help=f"comma-separated subset of {','.join(FORMATS)} (default: mp3,wav,aiff,m4a)")
+    parser.add_argument("--corpus", help="time the audio files in this folder instead of a generated corpus")
+    parser.add_argument("--repeat", type=int, default=3, help="passes per implementation; best is reported (default: 3)")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(str(p) for p in Path(args.corpus).rglob("*") if p.suffix.lower().lstrip(".") in FORMATS + ("aif",))
+        else:
+            formats = [f.strip() for f in args.formats.split(",") if f.strip() in FORMATS]
+            print(f"Generating {args.files} tagged files ({', '.join(formats)}) ...")
+            paths = make_corpus(Path(tmp), args.files, formats)
+        if not paths:
+            raise SystemExit("no audio files found")
+
+        # Warm the page cache so both passes read the same way
+        timed(extract_music_metadata, paths, 1)
+        results = {
+            "original": timed(legacy_extract, paths, args.repeat),
+            "table-driven": timed(extract_music_metadata, paths, args.repeat),
+        }
+        cache = MetadataCache(Path(tmp) / "metadata.sqlite")
+        timed(lambda p: extract_music_metadata(p, cache=cache), paths, 1)
+        results["warm cache"] = timed(lambda p: extract_music_metadata(p, cache=cache), paths, args.repeat)
+        cache.close()
+        base = results["original"][0]
+        print(f"{len(paths)} files, best of {args.repeat}:")
+        for label, (elapsed, _) in results.items():
+            print(f"  {label:>12}: {elapsed * 1e6 / len(paths):8.1f} us/file  ({base / elapsed:5.2f}x)")
+
+        by_format: dict = {}
+        for path, old, new in zip(paths, results["original"][1], results["table-driven"][1]):
+            same, total = by_format.get(Path(path).suffix, (0, 0))
+            by_format[Path(path).suffix] = (same + (repr(vars(old)) == repr(vars(new))), total + 1)
+        for suffix, (same, total) in sorted(by_format.items()):
+            print(f"  {suffix:>5}: {same}/{total} identical")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
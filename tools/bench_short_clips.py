@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Benchmark batch throughput on a corpus of short clips.
+
+Generates N short MP3 clips (5-30 s sine tones) with ffmpeg, then measures
+files/sec for the decode step alone (one ffmpeg process per file vs
+split_many_to_mono_wavs) and for full conversions with and without
+--ffmpeg-batch. Requires ffmpeg and aaf2.
+
+    python tools/bench_short_clips.py --files 200 --jobs 4 --batch 16
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mxto_aaf.batch import process_directory  # noqa: E402
+from mxto_aaf.utils import _get_ffmpeg_path, split_many_to_mono_wavs, split_to_mono_wavs  # noqa: E402
+
+
+def make_corpus(folder: Path, count: int, seed: int = 1) -> None:
+    ffmpeg = _get_ffmpeg_path()
+    if not ffmpeg:
+        raise SystemExit("ffmpeg not found")
+    rng = random.Random(seed)
+    folder.mkdir(parents=True, exist_ok=True)
+    for i in range(count):
+        seconds = rng.randint(5, 30)
+        freq = rng.randint(200, 2000)
+        subprocess.run(
+            [ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=frequency={freq}:duration={seconds}",
+             "-ac", "2", "-ar", "44100", "-b:a", "192k", str(folder / f"clip_{i:04d}.mp3")],
+            check=True,
+        )
+
+
+def decode_only(files: list[Path], out: Path, batch: int) -> float:
+    out.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    if batch <= 1:
+        for f in files:
+            split_to_mono_wavs(str(f), str(out / f.stem))
+    else:
+        for i in range(0, len(files), batch):
+            split_many_to_mono_wavs([(str(f), str(out / f.stem)) for f in files[i:i + batch]])
+    elapsed = time.perf_counter() - start
+    shutil.rmtree(out, ignore_errors=True)
+    return elapsed
+
+
+def run(src: Path, out: Path, jobs: int, ffmpeg_batch: int) -> float:
+    shutil.rmtree(out, ignore_errors=True)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            summary = process_directory(src, out, embed=True, jobs=jobs, ffmpeg_batch=ffmpeg_batch)
+        finally:
+            sys.stdout = stdout
+    elapsed = time.perf_counter() - start
+    if summary["failed_count"]:
+        print(f"  warning: {summary['failed_count']} failed, e.g. {summary['failed_files'][0]}")
+    return elapsed
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=100, help="number of clips (default: 100)")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes (default: 1)")
+    parser.add_argument("--batch", type=int, default=16, help="files per ffmpeg run for the batched pass (default: 16)")
+    parser.add_argument("--corpus", help="reuse/create the clips here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(args.corpus) if args.corpus else Path(tmp) / "clips"
+        if not src.exists() or not any(src.glob("*.mp3")):
+            print(f"Generating {args.files} clips in {src} ...")
+            make_corpus(src, args.files)
+        files = sorted(src.glob("*.mp3"))
+        count = len(files)
+        passes = (("one ffmpeg per file", 1), (f"{args.batch} files per ffmpeg", args.batch))
+        print("Decode only:")
+        for label, batch in passes:
+            elapsed = decode_only(files, Path(tmp) / "decoded", batch)
+            print(f"  {label:>22}: {count} files in {elapsed:6.2f}s = {count / elapsed:6.1f} files/s")
+        print(f"Full conversion (jobs={args.jobs}):")
+        for label, batch in passes:
+            elapsed = run(src, Path(tmp) / "out", args.jobs, batch)
+            print(f"  {label:>22}: {count} files in {elapsed:6.2f}s = {count / elapsed:6.1f} files/s")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
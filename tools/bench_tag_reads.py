@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Bytes read per file to get tags: buffered open vs ranged reads.
+
+mutagen opening a path reads through Python's buffered file, which
+fetches `--buffer` bytes per read (st_blksize: 8 KiB locally, often
+1 MiB on SMB/NFS mounts). This counts the bytes each file actually pulls
+that way and with `mxto_aaf.tagread` (4 KiB ranged reads), and checks
+both give the same tags and length.
+
+    python tools/bench_tag_reads.py --buffer 1M
+    python tools/bench_tag_reads.py --corpus /Volumes/NAS/Music --buffer 1M
+
+The generated corpus has long MP3/WAV files (and an M4A with its moov
+atom at the end when ffmpeg is available).
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from mutagen import File as MutagenFile  # noqa: E402
+from mutagen.easyid3 import EasyID3  # noqa: E402
+from mutagen.id3 import TIT2  # noqa: E402
+from mutagen.wave import WAVE  # noqa: E402
+
+from mxto_aaf.schedule import parse_size  # noqa: E402
+from mxto_aaf.tagread import CountingReader, read_tags  # noqa: E402
+from mxto_aaf.utils import _get_ffmpeg_path  # noqa: E402
+
+SUFFIXES = {".mp3", ".m4a", ".wav", ".aif", ".aiff"}
+
+
+def make_corpus(root: Path, seconds: int) -> list[str]:
+    paths = []
+    mp3 = root / "long.mp3"
+    mp3.write_bytes((b"\xff\xfb\x90\x00" + b"\x00" * 413) * int(seconds * 38.28))  # 128 kbps frames
+    id3 = EasyID3()
+    id3["title"] = "Long MP3"
+    id3.save(str(mp3))
+    paths.append(str(mp3))
+
+    wav = root / "long.wav"
+    with wave.open(str(wav), "wb") as wf:
+        wf.setnchannels(2)
+        wf.setsampwidth(2)
+        wf.setframerate(48000)
+        wf.writeframes(b"\x00" * 48000 * 4 * seconds)
+    audio = WAVE(str(wav))
+    audio.add_tags()
+    audio.tags.add(TIT2(encoding=3, text=["Long WAV"]))
+    audio.save()
+    paths.append(str(wav))
+
+    ffmpeg = _get_ffmpeg_path()
+    if ffmpeg:
+        m4a = root / "long.m4a"
+        subprocess.run([ffmpeg, "-v", "error", "-y", "-f", "lavfi", "-i", f"sine=f=440:d={seconds}", "-ac", "2",
+                        "-c:a", "aac", "-b:a", "256k", "-metadata", "title=Long M4A", str(m4a)], check=True)
+        paths.append(str(m4a))
+    return paths
+
+
+def buffered_read(path: str, buffer_size: int):
+    counter = CountingReader(path)
+    with io.BufferedReader(counter, buffer_size=buffer_size) as f:
+        audio = MutagenFile(f, easy=True)
+    return audio, counter.bytes_read
+
+
+def summary(audio) -> tuple:
+    if audio is None:
+        return None, None
+    return dict(audio.tags or {}), getattr(audio.info, "length", None)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="measure the audio files in this folder instead of a generated corpus")
+    parser.add_argument("--buffer", default="1M", help="buffer size of the plain open, e.g. 8K or 1M (default: 1M)")
+    parser.add_argument("--seconds", type=int, default=300, help="length of the generated files (default: 300)")
+    args = parser.parse_args(argv)
+    buffer_size = parse_size(args.buffer)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.corpus:
+            paths = sorted(str(p) for p in Path(args.corpus).rglob("*") if p.suffix.lower() in SUFFIXES)
+        else:
+            paths = make_corpus(Path(tmp), args.seconds)
+        if not paths:
+            raise SystemExit("no audio files found")
+
+        totals = {"buffered": [0, 0.0], "ranged": [0, 0.0]}
+        mismatches = 0
+        print(f"{'file':<32} {'size':>10} {'buffered':>10} {'ranged':>10}")
+        for path in paths:
+            t0 = time.perf_counter()
+            plain, plain_bytes = buffered_read(path, buffer_size)
+            t1 = time.perf_counter()
+            ranged, ranged_bytes = read_tags(path)
+            t2 = time.perf_counter()
+            totals["buffered"][0] += plain_bytes
+            totals["buffered"][1] += t1 - t0
+            totals["ranged"][0] += ranged_bytes
+            totals["ranged"][1] += t2 - t1
+            same = summary(plain) == summary(ranged)
+            mismatches += not same
+            if len(paths) <= 50:
+                print(f"{os.path.basename(path)[:32]:<32} {os.path.getsize(path):>10} {plain_bytes:>10} "
+                      f"{ranged_bytes:>10}{'' if same else '  MISMATCH'}")
+        n = len(paths)
+        print(f"{n} files, mean bytes read per file:")
+        for label, (nbytes, elapsed) in totals.items():
+            print(f"  {label:>8}: {nbytes / n / 1024:9.1f} KB  ({elapsed * 1000 / n:.2f} ms/file)")
+        print(f"  {n - mismatches}/{n} identical tags and length")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())